@@ -138,48 +138,59 @@ class CrewBridge:
 
     # ── Inbox ──────────────────────────────────────────────────────
 
-    def check_inbox(self, unread_only: bool = True) -> List[dict]:
-        """Return messages addressed to this agent.
+    def check_inbox(self, unread_only: bool = True, limit: Optional[int] = None,
+                    before_id: Optional[int] = None, after_id: Optional[int] = None,
+                    include_body: bool = True) -> List[dict]:
+        """Return messages addressed to this agent, newest first.
 
         Args:
             unread_only: If True, only return queued/delivered messages.
+            limit: Page size (None = everything).
+            before_id: Return messages older than this id (next page back).
+            after_id: Return messages newer than this id, oldest first
+                (poll for new mail by passing the highest id seen).
+            include_body: If False, each dict carries "body_length" instead
+                of "body"; fetch bodies on demand with get_body().
 
         Returns:
-            List of message dicts: {id, from_name, message_type, subject,
-            body, priority, created_at, status}. Returns empty list on error.
+            List of message dicts: {id, from, type, subject, body,
+            priority, time, status}. Returns empty list on error.
         """
         try:
-            status_filter = "queued" if unread_only else None
             messages = bus.read_inbox(
-                self.agent_id, status_filter=status_filter,
-                db_path=self.db_path,
+                self.agent_id,
+                status_filter=("queued", "delivered") if unread_only else None,
+                limit=limit, before_id=before_id, after_id=after_id,
+                include_body=include_body, db_path=self.db_path,
             )
-            # Also get 'delivered' messages if unread_only
-            if unread_only:
-                delivered = bus.read_inbox(
-                    self.agent_id, status_filter="delivered",
-                    db_path=self.db_path,
-                )
-                messages.extend(delivered)
-                # Sort by created_at descending
-                messages.sort(key=lambda m: m.get("created_at", ""), reverse=True)
-
-            return [
-                {
+            results = []
+            for m in messages:
+                msg = {
                     "id": m["id"],
                     "from": m.get("from_name", str(m.get("from_agent_id", "?"))),
                     "type": m["message_type"],
                     "subject": m["subject"],
-                    "body": m["body"],
                     "priority": m["priority"],
                     "time": m["created_at"],
                     "status": m["status"],
                 }
-                for m in messages
-            ]
+                if include_body:
+                    msg["body"] = m["body"]
+                else:
+                    msg["body_length"] = m["body_length"]
+                results.append(msg)
+            return results
         except Exception as e:
             return []
 
+    def get_body(self, message_id: int) -> Optional[str]:
+        """Fetch the body of a message addressed to this agent (None otherwise)."""
+        try:
+            return bus.get_message_body(message_id, to_agent_id=self.agent_id,
+                                        db_path=self.db_path)
+        except Exception:
+            return None
+
     def get_tasks(self) -> List[dict]:
         """Return only unread task-type messages.
 
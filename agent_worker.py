@@ -2,7 +2,7 @@
 crew-bus Agent Worker — AI brain for all agents.
 
 Background thread that:
-  1. Polls the messages table for queued messages TO agents FROM the human
+  1. Waits for queued messages TO agents (woken by the bus, no idle polling)
   2. Sends them to the agent's configured LLM backend
   3. Writes the agent's reply back as a new message in the bus
 
@@ -19,21 +19,30 @@ Per-agent model selection: each agent can have its own model field.
 Global default stored in crew_config table ('default_model' key).
 """
 
+import asyncio
 import contextlib
+import email.utils
+import hashlib
 import json
 import os
+import queue
+import re
+import socket
 import sqlite3
 import threading
 import time
 import uuid
 import urllib.request
 import urllib.error
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
 import bus
+import context_budget
+import http_pool
 
 
 # ---------------------------------------------------------------------------
@@ -123,7 +132,7 @@ OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434/api/chat")
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3.2")
 KIMI_API_URL = "https://api.moonshot.ai/v1/chat/completions"
 KIMI_DEFAULT_MODEL = "kimi-k2.5"
-POLL_INTERVAL = 0.5  # seconds between queue checks
+POLL_INTERVAL = 0.5  # seconds between cross-process wakeup checks while idle
 WA_BRIDGE_URL = os.environ.get("WA_BRIDGE_URL", "http://localhost:3001")
 DASHBOARD_URL = os.environ.get("DASHBOARD_URL", "http://localhost:8420")
 
@@ -364,6 +373,51 @@ def _resolve_thinking(thinking_level: str, agent_type: str) -> str:
     return thinking_level
 
 
+# ---------------------------------------------------------------------------
+# Prompt-fragment cache
+# ---------------------------------------------------------------------------
+
+# (db path, agent id) -> {section: (stamp, value)}. Agent id None holds the
+# sections every agent shares (grok mode, human profile, crew knowledge,
+# crew roster). A stamp is the tuple of bus data versions a section was
+# built from, so unchanged sections are reused and only dirty ones rebuilt.
+_prompt_cache: dict = {}
+_prompt_cache_lock = threading.Lock()
+PROMPT_CACHE_MAX_AGENTS = 1024
+
+
+def _prompt_cache_for(db_path, agent_id) -> dict:
+    key = (str(db_path), agent_id)
+    with _prompt_cache_lock:
+        cache = _prompt_cache.get(key)
+        if cache is None:
+            if len(_prompt_cache) >= PROMPT_CACHE_MAX_AGENTS:
+                _prompt_cache.clear()
+            cache = _prompt_cache[key] = {}
+        return cache
+
+
+def _cached_section(cache: dict, name: str, stamp, build):
+    """Return section ``name`` if it was built at ``stamp``, else rebuild it.
+
+    ``build`` returns None on failure; failures are not cached. A None
+    stamp (versions unavailable) always rebuilds.
+    """
+    hit = cache.get(name)
+    if stamp is not None and hit is not None and hit[0] == stamp:
+        return hit[1]
+    value = build()
+    if stamp is not None and value is not None:
+        cache[name] = (stamp, value)
+    return value
+
+
+def clear_prompt_cache() -> None:
+    """Drop every cached prompt section; they are rebuilt on next use."""
+    with _prompt_cache_lock:
+        _prompt_cache.clear()
+
+
 def _build_system_prompt(agent_type: str, agent_name: str,
                          description: str = "",
                          agent_id: int = None,
@@ -372,28 +426,45 @@ def _build_system_prompt(agent_type: str, agent_name: str,
 
     Order: Soul → Human Profile → Thinking Mode → Integrity → Charter →
            Team Context → Skills → Memories → Error/Learning → Crew Comms
+
+    Sections that read the DB are cached per agent (see _prompt_cache) and
+    rebuilt only when the bus data versions they depend on change.
     """
+    # --- Current data versions (one query; {} disables the cache) ---
+    cache = shared = None
+    versions: dict = {}
+    if agent_id and db_path:
+        try:
+            versions = bus.get_data_versions(
+                ("agents", "config", "profile", "knowledge",
+                 f"skills:{agent_id}", f"memories:{agent_id}"),
+                db_path=db_path)
+        except Exception:
+            versions = {}
+        cache = _prompt_cache_for(db_path, agent_id)
+        shared = _prompt_cache_for(db_path, None)
+
+    def stamp(*domains):
+        if not versions:
+            return None
+        return (versions["epoch"],) + tuple(versions[d] for d in domains)
+
     # --- Load soul and thinking_level from DB ---
     soul = ""
     thinking_level = "auto"
     if agent_id and db_path:
-        try:
-            conn = bus.get_conn(db_path)
-            try:
-                row = conn.execute(
-                    "SELECT soul, thinking_level FROM agents WHERE id=?",
-                    (agent_id,),
-                ).fetchone()
-                if row:
-                    soul = row["soul"] or ""
-                    thinking_level = row["thinking_level"] or "auto"
-            finally:
-                conn.close()
-        except Exception:
-            pass
+        identity = _cached_section(
+            cache, "identity", stamp("agents"),
+            lambda: _load_identity(agent_id, db_path))
+        if identity:
+            soul, thinking_level = identity
 
     # --- Determine if Grok mode is active ---
-    grok_mode = _is_grok_mode(db_path)
+    if shared is not None:
+        grok_mode = _cached_section(
+            shared, "grok", stamp("config"), lambda: _is_grok_mode(db_path))
+    else:
+        grok_mode = _is_grok_mode(db_path)
     prompts = GROK_SYSTEM_PROMPTS if grok_mode else SYSTEM_PROMPTS
     default = GROK_DEFAULT_PROMPT if grok_mode else DEFAULT_PROMPT
 
@@ -429,178 +500,277 @@ def _build_system_prompt(agent_type: str, agent_name: str,
     if not agent_id or not db_path:
         return base
 
-    parts = [base]
+    # (priority, text): 0 is never trimmed; higher numbers are trimmed first
+    parts = [(0, base)]
 
     # --- Thinking mode injection ---
     level = _resolve_thinking(thinking_level, agent_type)
     if level != "standard" and level in THINKING_PROMPTS:
-        parts.append("THINKING MODE:\n" + THINKING_PROMPTS[level])
+        parts.append((1, "THINKING MODE:\n" + THINKING_PROMPTS[level]))
 
     # --- Inject human profile FIRST (tiny, critical — never gets truncated) ---
-    try:
-        if agent_type in ("right_hand", "guardian", "vault"):
-            conn = bus.get_conn(db_path)
-            try:
-                human_row = conn.execute(
-                    "SELECT id FROM agents WHERE agent_type='human' LIMIT 1"
-                ).fetchone()
-            finally:
-                conn.close()
-            if human_row:
-                profile = bus.get_extended_profile(human_row["id"], db_path=db_path)
-                if profile:
-                    parts.append(_format_profile_for_prompt(profile))
-    except Exception:
-        pass
+    if agent_type in ("right_hand", "guardian", "vault"):
+        profile = _cached_section(
+            shared, "profile", stamp("agents", "profile"),
+            lambda: _build_profile_section(db_path))
+        if profile:
+            parts.append((0, profile))
 
     # --- Inject INTEGRITY rules ---
     integrity = _load_integrity_rules()
     if integrity:
-        parts.append("INTEGRITY:\n" + integrity)
+        parts.append((0, "INTEGRITY:\n" + integrity))
 
     # --- Inject CREW CHARTER (simple guidelines) ---
     charter = _load_charter_rules()
     if charter and agent_type not in _CHARTER_EXEMPT:
-        parts.append("CREW GUIDELINES:\n" + charter)
+        parts.append((1, "CREW GUIDELINES:\n" + charter))
+
+    # --- Inject team roster / linked teams (managers) or team context (workers) ---
+    if agent_type in ("manager", "worker"):
+        team = _cached_section(
+            cache, "team:" + agent_type, stamp("agents"),
+            lambda: _build_team_sections(agent_type, agent_id, db_path))
+        if team:
+            parts.extend((2, t) for t in team)
+
+    # --- Inject skills ---
+    skills = _cached_section(
+        cache, "skills", stamp(f"skills:{agent_id}"),
+        lambda: _build_skills_section(agent_id, db_path))
+    if skills:
+        parts.append((2, skills))
+
+    # --- Inject memories, errors and learnings (tiered by agent importance) ---
+    parts.extend((3, m) for m in _memory_sections(
+        cache, stamp(f"memories:{agent_id}"), agent_type, agent_id, db_path))
+
+    # --- Inject shared crew knowledge (core agents) ---
+    if agent_type in ("right_hand", "guardian", "vault"):
+        knowledge = _cached_section(
+            shared, "knowledge", stamp("agents", "knowledge"),
+            lambda: _build_knowledge_section(db_path))
+        if knowledge:
+            parts.append((4, knowledge))
 
-    # --- Inject team roster + delegation ability for managers ---
-    if agent_type == "manager":
+    # --- Inject crew communication capabilities ---
+    # Every agent can DM other agents and call meetings
+    crew_comms = _cached_section(
+        shared, "crew_comms", stamp("agents"),
+        lambda: _build_crew_comms_section(db_path))
+    if crew_comms:
+        parts.append((2, crew_comms))
+
+    # --- Inject file sharing capabilities ---
+    parts.append((3, 
+        "FILE SHARING — you can send files and images to the human in chat.\n\n"
+        "1. INLINE IMAGE — renders directly in the chat bubble (preferred for images):\n"
+        "   Embed this JSON anywhere in your reply:\n"
+        "   {\"file_attach\": \"/tmp/yourfile.ext\"}\n"
+        "   The image appears inline. Use this when you want the human to SEE the image immediately.\n\n"
+        "2. TAPPABLE LINK — shows as a clickable link in the chat text:\n"
+        "   http://127.0.0.1:8420/api/download/filename.ext\n"
+        "   Works for any file in /tmp/. Use when you want the human to open or copy a link.\n\n"
+        "For generated images (via generate action): ALWAYS use file_attach — it renders inline automatically.\n"
+        "You can use BOTH in one reply: attach the image inline AND include a tappable link below it."
+    ))
+
+    # Token budget — tiered by agent importance; lowest-priority sections
+    # (knowledge, memories, file sharing) are trimmed first:
+    # Crew Boss: 2500 tokens (highest IQ, runs on best model, needs full crew awareness)
+    # Guardian:  2000 tokens (system knowledge + integrity + sentinel duties)
+    # Workers:   1650 tokens (description + crew comms + memories)
+    # Everyone:  1400 tokens (integrity rules + charter + skill + memories + comms)
+    max_tokens = SYSTEM_PROMPT_TOKENS.get(agent_type, SYSTEM_PROMPT_TOKENS["default"])
+    combined, _ = context_budget.fit_sections(parts, max_tokens)
+    return combined
+
+
+SYSTEM_PROMPT_TOKENS = {
+    "right_hand": 2500,
+    "guardian": 2000,
+    "manager": 1650,
+    "worker": 1650,
+    "default": 1400,
+}
+
+
+def _load_identity(agent_id: int, db_path: Path):
+    """(soul, thinking_level) for an agent, or None on a DB error."""
+    try:
+        conn = bus.get_conn(db_path)
         try:
-            conn = bus.get_conn(db_path)
-            try:
+            row = conn.execute(
+                "SELECT soul, thinking_level FROM agents WHERE id=?",
+                (agent_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+    except Exception:
+        return None
+    if not row:
+        return ("", "auto")
+    return (row["soul"] or "", row["thinking_level"] or "auto")
+
+
+def _build_profile_section(db_path: Path):
+    try:
+        conn = bus.get_conn(db_path)
+        try:
+            human_row = conn.execute(
+                "SELECT id FROM agents WHERE agent_type='human' LIMIT 1"
+            ).fetchone()
+        finally:
+            conn.close()
+        if not human_row:
+            return ""
+        profile = bus.get_extended_profile(human_row["id"], db_path=db_path)
+        return _format_profile_for_prompt(profile) if profile else ""
+    except Exception:
+        return None
+
+
+def _build_team_sections(agent_type: str, agent_id: int, db_path: Path):
+    """Team roster + linked departments (managers) or team line (workers)."""
+    parts = []
+    try:
+        conn = bus.get_conn(db_path)
+        try:
+            if agent_type == "manager":
                 workers = conn.execute(
                     "SELECT name, description FROM agents "
                     "WHERE parent_agent_id=? AND active=1 ORDER BY name",
                     (agent_id,)
                 ).fetchall()
-            finally:
-                conn.close()
-            if workers:
-                roster = (
-                    "YOUR TEAM:\n"
-                    + "\n".join(
-                        f"- {w['name']}"
-                        + (f": {w['description'][:80]}" if w['description'] else "")
-                        for w in workers
-                    )
-                    + "\n\nYour workers get tasks automatically and reply to you. "
-                    "Summarize their work for the human."
-                )
-                parts.append(roster)
-        except Exception:
-            pass
-
-        # Inject linked teams/departments this manager oversees
-        try:
-            linked_ids = bus.get_linked_teams(agent_id, db_path=db_path)
-            if linked_ids:
-                conn = bus.get_conn(db_path)
-                try:
-                    linked_names = []
-                    for lid in linked_ids:
-                        row = conn.execute(
-                            "SELECT name FROM agents WHERE id=?", (lid,)
-                        ).fetchone()
-                        if row:
-                            linked_names.append(row["name"])
-                    if linked_names:
-                        parts.append(
-                            "LINKED DEPARTMENTS (you oversee these teams):\n"
-                            + "\n".join(f"- {n}" for n in linked_names)
+                if workers:
+                    parts.append(
+                        "YOUR TEAM:\n"
+                        + "\n".join(
+                            f"- {w['name']}"
+                            + (f": {w['description'][:80]}" if w['description'] else "")
+                            for w in workers
                         )
-                finally:
-                    conn.close()
-        except Exception:
-            pass
-
-    # --- Inject team context for workers ---
-    if agent_type == "worker":
-        try:
-            conn = bus.get_conn(db_path)
-            try:
+                        + "\n\nYour workers get tasks automatically and reply to you. "
+                        "Summarize their work for the human."
+                    )
+                linked_names = []
+                for lid in bus.get_linked_teams(agent_id, db_path=db_path):
+                    row = conn.execute(
+                        "SELECT name FROM agents WHERE id=?", (lid,)
+                    ).fetchone()
+                    if row:
+                        linked_names.append(row["name"])
+                if linked_names:
+                    parts.append(
+                        "LINKED DEPARTMENTS (you oversee these teams):\n"
+                        + "\n".join(f"- {n}" for n in linked_names)
+                    )
+            else:
                 mgr = conn.execute(
-                    "SELECT name FROM agents WHERE id=?",
-                    (conn.execute(
-                        "SELECT parent_agent_id FROM agents WHERE id=?",
-                        (agent_id,)
-                    ).fetchone()["parent_agent_id"],)
+                    "SELECT m.name FROM agents a JOIN agents m "
+                    "ON m.id = a.parent_agent_id WHERE a.id=?",
+                    (agent_id,)
                 ).fetchone()
-            finally:
-                conn.close()
-            if mgr:
-                parts.append(
-                    f"You're on {mgr['name']}'s team. "
-                    "Do your best work and reply with results."
-                )
-        except Exception:
-            pass
+                if mgr:
+                    parts.append(
+                        f"You're on {mgr['name']}'s team. "
+                        "Do your best work and reply with results."
+                    )
+        finally:
+            conn.close()
+    except Exception:
+        return None
+    return parts
 
-    # --- Inject skills ---
+
+def _build_skills_section(agent_id: int, db_path: Path):
     try:
         skills = bus.get_agent_skills(agent_id, db_path=db_path)
-        if skills:
-            parts.append(_format_skills_for_prompt(skills))
+        return _format_skills_for_prompt(skills) if skills else ""
     except Exception:
-        pass
+        return None
+
+
+_MEMORY_LIMITS = {
+    "right_hand": 35, "guardian": 25,
+    "manager": 20, "worker": 20,
+}
 
-    # --- Inject memories (tiered by agent importance) ---
-    _memory_limits = {
-        "right_hand": 35, "guardian": 25,
-        "manager": 20, "worker": 20,
-    }
-    mem_limit = _memory_limits.get(agent_type, 15)
-    try:
-        memories = bus.get_agent_memories(agent_id, limit=mem_limit, db_path=db_path)
-        if memories:
-            parts.append(_format_memories_for_prompt(memories))
-    except Exception:
-        pass
 
-    # --- Inject error/learning memories (never-expire, high priority) ---
+def _build_memory_sections(agent_type: str, agent_id: int, db_path: Path):
+    """Memories, MISTAKES TO AVOID and WHAT WORKS WELL sections.
+
+    Returns (parts, memory_ids, expires_at) where expires_at is the earliest
+    expiry among the injected memories (the sections go stale then), or
+    None on a DB error.
+    """
+    mem_limit = _MEMORY_LIMITS.get(agent_type, 15)
     try:
+        memories = bus.get_agent_memories(agent_id, limit=mem_limit, db_path=db_path)
         errors = bus.get_agent_memories(
             agent_id, memory_type="error", limit=10, db_path=db_path)
-        if errors:
-            err_lines = ["MISTAKES TO AVOID:"]
-            for e in errors:
-                content = e["content"]
-                if len(content) > 120:
-                    content = content[:117] + "..."
-                err_lines.append(f"- {content}")
-            parts.append("\n".join(err_lines))
-    except Exception:
-        pass
-
-    try:
         learnings = bus.get_agent_memories(
             agent_id, memory_type="learning", limit=10, db_path=db_path)
-        if learnings:
-            learn_lines = ["WHAT WORKS WELL:"]
-            for l in learnings:
-                content = l["content"]
+    except Exception:
+        return None
+
+    parts = []
+    if memories:
+        parts.append(_format_memories_for_prompt(memories))
+    for title, entries in (("MISTAKES TO AVOID:", errors),
+                           ("WHAT WORKS WELL:", learnings)):
+        if entries:
+            lines = [title]
+            for e in entries:
+                content = e["content"]
                 if len(content) > 120:
                     content = content[:117] + "..."
-                learn_lines.append(f"- {content}")
-            parts.append("\n".join(learn_lines))
-    except Exception:
-        pass
+                lines.append(f"- {content}")
+            parts.append("\n".join(lines))
 
-    # --- Inject shared crew knowledge (core agents) ---
-    if agent_type in ("right_hand", "guardian", "vault"):
+    injected = memories + errors + learnings
+    expiries = [m["expires_at"] for m in injected if m.get("expires_at")]
+    return (parts, [m["id"] for m in injected], min(expiries) if expiries else None)
+
+
+def _memory_sections(cache: dict, stamp, agent_type: str, agent_id: int,
+                     db_path: Path) -> list:
+    """Cached memory sections; a hit still records the memories' access."""
+    name = "memories:" + agent_type
+    hit = cache.get(name)
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    if (stamp is not None and hit is not None and hit[0] == stamp
+            and (hit[1][2] is None or now < hit[1][2])):
+        parts, memory_ids, _ = hit[1]
         try:
-            shared = bus.get_shared_knowledge(limit=10, db_path=db_path)
-            if shared:
-                lines = ["SHARED CREW KNOWLEDGE:"]
-                for entry in shared:
-                    subj = entry.get("subject", "")[:60]
-                    cat = entry.get("category", "")
-                    lines.append(f"- [{cat}] {subj}")
-                parts.append("\n".join(lines))
+            bus.touch_agent_memories(memory_ids, db_path=db_path)
         except Exception:
             pass
+        return parts
+    built = _build_memory_sections(agent_type, agent_id, db_path)
+    if built is None:
+        return []
+    if stamp is not None:
+        cache[name] = (stamp, built)
+    return built[0]
 
-    # --- Inject crew communication capabilities ---
-    # Every agent can DM other agents and call meetings
+
+def _build_knowledge_section(db_path: Path):
+    try:
+        shared = bus.get_shared_knowledge(limit=10, db_path=db_path)
+    except Exception:
+        return None
+    if not shared:
+        return ""
+    lines = ["SHARED CREW KNOWLEDGE:"]
+    for entry in shared:
+        subj = entry.get("subject", "")[:60]
+        cat = entry.get("category", "")
+        lines.append(f"- [{cat}] {subj}")
+    return "\n".join(lines)
+
+
+def _build_crew_comms_section(db_path: Path):
     try:
         conn = bus.get_conn(db_path)
         try:
@@ -609,60 +779,24 @@ def _build_system_prompt(agent_type: str, agent_name: str,
             ).fetchall()
         finally:
             conn.close()
-        roster_list = ", ".join(a["name"] for a in all_agents)
-        crew_comms = (
-            "CREW COMMS — you can message any agent directly.\n"
-            f"Crew: {roster_list}\n\n"
-            "To DM an agent, you MUST include this exact JSON block in your reply:\n"
-            "{\"crew_action\":\"dm\",\"to\":\"AgentName\",\"message\":\"your message\"}\n\n"
-            "CRITICAL: The JSON block is what actually sends the DM. If you write "
-            "\"I'll DM Tom\" but don't include the JSON, NO message is sent. "
-            "Always include the literal JSON — the system parses it to deliver the DM.\n\n"
-            "You can send MULTIPLE DMs in one reply — just delegate to whoever makes sense.\n"
-            "If a task isn't your specialty, DM the right agent. Don't ask the human who to send it to.\n\n"
-            "When you receive a reply from another agent (a DM relay), "
-            "synthesize it into a clear, friendly answer for the human. "
-            "Attribute the source (e.g., 'Guardian reports...'). Keep it concise."
-        )
-        parts.append(crew_comms)
     except Exception:
-        pass
-
-    # --- Inject file sharing capabilities ---
-    parts.append(
-        "FILE SHARING — you can send files and images to the human in chat.\n\n"
-        "1. INLINE IMAGE — renders directly in the chat bubble (preferred for images):\n"
-        "   Embed this JSON anywhere in your reply:\n"
-        "   {\"file_attach\": \"/tmp/yourfile.ext\"}\n"
-        "   The image appears inline. Use this when you want the human to SEE the image immediately.\n\n"
-        "2. TAPPABLE LINK — shows as a clickable link in the chat text:\n"
-        "   http://127.0.0.1:8420/api/download/filename.ext\n"
-        "   Works for any file in /tmp/. Use when you want the human to open or copy a link.\n\n"
-        "For generated images (via generate action): ALWAYS use file_attach — it renders inline automatically.\n"
-        "You can use BOTH in one reply: attach the image inline AND include a tappable link below it."
+        return None
+    roster_list = ", ".join(a["name"] for a in all_agents)
+    return (
+        "CREW COMMS — you can message any agent directly.\n"
+        f"Crew: {roster_list}\n\n"
+        "To DM an agent, you MUST include this exact JSON block in your reply:\n"
+        "{\"crew_action\":\"dm\",\"to\":\"AgentName\",\"message\":\"your message\"}\n\n"
+        "CRITICAL: The JSON block is what actually sends the DM. If you write "
+        "\"I'll DM Tom\" but don't include the JSON, NO message is sent. "
+        "Always include the literal JSON — the system parses it to deliver the DM.\n\n"
+        "You can send MULTIPLE DMs in one reply — just delegate to whoever makes sense.\n"
+        "If a task isn't your specialty, DM the right agent. Don't ask the human who to send it to.\n\n"
+        "When you receive a reply from another agent (a DM relay), "
+        "synthesize it into a clear, friendly answer for the human. "
+        "Attribute the source (e.g., 'Guardian reports...'). Keep it concise."
     )
 
-    # Token budget guard — tiered by agent importance:
-    # Crew Boss: 10000 chars (highest IQ, runs on best model, needs full crew awareness)
-    # Guardian:  8000 chars (system knowledge + integrity + sentinel duties)
-    # Workers:   6500 chars (description + crew comms + memories)
-    # Everyone:  5500 chars (integrity rules + charter + skill + memories + comms)
-    if agent_type == "right_hand":
-        max_chars = 10000
-    elif agent_type == "guardian":
-        max_chars = 8000
-    elif agent_type == "manager":
-        max_chars = 6500
-    elif agent_type == "worker":
-        max_chars = 6500  # workers need room for crew comms
-    else:
-        max_chars = 5500
-    combined = "\n\n".join(parts)
-    if len(combined) > max_chars:
-        combined = combined[:max_chars] + "\n[memory truncated]"
-
-    return combined
-
 
 def _sanitize_skill_instructions(text: str) -> str:
     """Last-resort sanitization of skill instructions before prompt injection.
@@ -1657,6 +1791,219 @@ class _CircuitBreaker:
 _circuit = _CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
 
 
+# ---------------------------------------------------------------------------
+# Latency-aware routing — orders fallbacks by observed latency, hedges tails
+# ---------------------------------------------------------------------------
+
+ROUTER_ALPHA = 0.2               # EWMA weight of the newest observation
+ROUTER_WINDOW = 200              # latency samples kept per provider for percentiles
+ROUTER_MIN_SAMPLES = 10          # fewer samples than this: no percentile, no hedge
+ROUTER_FAILURE_COST_MS = 30_000  # what a failed attempt costs the caller
+ROUTER_DEMOTE_MS = 20_000        # a primary slower than this yields to a 2x faster fallback
+HEDGE_MIN_DELAY = 1.0            # seconds; bounds on the p95-derived hedge delay
+HEDGE_MAX_DELAY = 30.0
+
+
+class _LatencyRouter:
+    """Per-provider latency and error estimates for routing decisions.
+
+    Every attempt updates an EWMA of the provider's latency and of its
+    failure rate, and a ring of recent latencies for tail percentiles.
+    A provider's expected cost is ewma_ms + error_rate * ROUTER_FAILURE_COST_MS.
+    Estimates are seeded once per database from recent llm.call spans, so
+    a restart doesn't forget which provider is slow.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict = {}   # provider -> {ewma_ms, error_rate, count, samples}
+        self._seeded: set = set()
+
+    def record(self, provider: str, duration_ms: float, ok: bool = True) -> None:
+        with self._lock:
+            s = self._stats.get(provider)
+            if s is None:
+                s = self._stats[provider] = {"ewma_ms": None, "error_rate": 0.0, "count": 0,
+                                             "samples": deque(maxlen=ROUTER_WINDOW)}
+            s["count"] += 1
+            s["error_rate"] += ROUTER_ALPHA * ((0.0 if ok else 1.0) - s["error_rate"])
+            if ok:
+                ms = float(duration_ms)
+                prev = s["ewma_ms"]
+                s["ewma_ms"] = ms if prev is None else prev + ROUTER_ALPHA * (ms - prev)
+                s["samples"].append(ms)
+
+    def expected_ms(self, provider: str) -> Optional[float]:
+        """Expected cost of one attempt, or None if the provider is unseen."""
+        with self._lock:
+            s = self._stats.get(provider)
+            if s is None:
+                return None
+            return (s["ewma_ms"] or 0.0) + s["error_rate"] * ROUTER_FAILURE_COST_MS
+
+    def percentile(self, provider: str, q: float) -> Optional[float]:
+        with self._lock:
+            s = self._stats.get(provider)
+            samples = sorted(s["samples"]) if s else []
+        if len(samples) < ROUTER_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """Seconds to wait on ``provider`` before hedging: its p95, bounded."""
+        p95 = self.percentile(provider, 0.95)
+        if p95 is None:
+            return None
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, p95 / 1000))
+
+    def order(self, primary: str, fallbacks: list) -> list:
+        """Primary first, then fallbacks cheapest-first.
+
+        Unseen fallbacks go first so they get measured, and ties keep the
+        configured order. The primary is moved behind the best fallback
+        only when it is slower than ROUTER_DEMOTE_MS and at least twice as
+        slow as that fallback.
+        """
+        expected = {p: self.expected_ms(p) for p in [primary, *fallbacks]}
+        rest = sorted(fallbacks, key=lambda p: expected[p] or 0.0)
+        slow = expected[primary]
+        if rest and slow is not None and slow > ROUTER_DEMOTE_MS:
+            best = expected[rest[0]]
+            if best is not None and best * 2 < slow:
+                return [rest[0], primary] + rest[1:]
+        return [primary] + rest
+
+    def seed(self, db_path: Optional[Path]) -> None:
+        """Load estimates from this database's recent llm.call spans, once."""
+        key = str(db_path)
+        with self._lock:
+            if key in self._seeded:
+                return
+            self._seeded.add(key)
+        try:
+            spans = bus.get_telemetry(limit=ROUTER_WINDOW * 2, span_name="llm.call",
+                                      db_path=db_path)
+        except sqlite3.Error:
+            return
+        for span in reversed(spans):  # oldest first so the EWMA ends on the newest
+            try:
+                meta = json.loads(span.get("metadata") or "{}")
+            except ValueError:
+                continue
+            provider = meta.get("provider")
+            if not provider or meta.get("cache") == "hit" or meta.get("coalesced"):
+                continue
+            if span.get("status") == "error":
+                self.record(provider, 0, ok=False)
+                continue
+            ms = meta.get("attempt_ms", span.get("duration_ms"))
+            if ms is not None:
+                self.record(provider, ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            providers = list(self._stats)
+        out = {}
+        for p in providers:
+            with self._lock:
+                s = self._stats[p]
+                row = {"ewma_ms": s["ewma_ms"], "error_rate": round(s["error_rate"], 4),
+                       "count": s["count"]}
+            row["p50_ms"] = self.percentile(p, 0.5)
+            row["p95_ms"] = self.percentile(p, 0.95)
+            out[p] = row
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._seeded.clear()
+
+
+_router = _LatencyRouter()
+
+
+def get_router_stats() -> dict:
+    """Per-provider latency estimates: ewma_ms, error_rate, count, p50_ms, p95_ms."""
+    return _router.snapshot()
+
+
+def _record_attempts(outcomes: dict) -> None:
+    """Feed attempt outcomes {provider: (elapsed_ms, state)} to the circuit
+    breaker and the router. A cancelled attempt (a hedge loser, or a call
+    cut off by the message timeout) counts as a latency sample — a lower
+    bound on how slow it was — but not as a failure."""
+    for provider, (ms, state) in outcomes.items():
+        if state == "error":
+            _circuit.record_failure(provider)
+            _router.record(provider, ms, ok=False)
+        else:
+            if state == "ok":
+                _circuit.record_success(provider)
+            _router.record(provider, ms)
+
+
+def _hedged_call(primary: tuple, backup: tuple, delay: float, db_path) -> tuple:
+    """Call ``primary``; if it hasn't answered after ``delay`` seconds, race
+    ``backup`` against it. Both are (provider, messages, model).
+
+    The first non-error reply wins and the other request is cancelled
+    through its http_pool.CancelToken. Returns (result, provider,
+    outcomes) with outcomes {provider: (elapsed_ms, "ok" | "error" |
+    "cancelled")}; if every launched request fails, result is the first
+    error. A primary that fails before the hedge fires returns at once,
+    leaving the backup to the normal fallback chain.
+    """
+    done: queue.Queue = queue.Queue()
+    tokens: dict = {}
+    started: dict = {}
+
+    def launch(attempt):
+        provider, messages, use_model = attempt
+        token = tokens[provider] = http_pool.CancelToken()
+        started[provider] = time.monotonic()
+
+        def run():
+            with http_pool.cancel_scope(token):
+                try:
+                    result = _call_provider(provider, messages, use_model, db_path)
+                except Exception as e:
+                    result = f"(Error calling {provider}: {e})"
+            done.put((provider, result))
+
+        threading.Thread(target=run, daemon=True, name=f"llm-hedge-{provider}").start()
+
+    def elapsed_ms(provider):
+        return int((time.monotonic() - started[provider]) * 1000)
+
+    launch(primary)
+    hedge_at = started[primary[0]] + delay
+    outcomes: dict = {}
+    first_error = None
+    while True:
+        if http_pool.cancelled():
+            for token in tokens.values():
+                token.cancel()
+            return "(Error: LLM call cancelled after timeout)", primary[0], outcomes
+        if len(tokens) == 1 and time.monotonic() >= hedge_at:
+            launch(backup)
+        try:
+            provider, result = done.get(timeout=0.05)
+        except queue.Empty:
+            continue
+        if not _is_llm_error(result):
+            outcomes[provider] = (elapsed_ms(provider), "ok")
+            for other, token in tokens.items():
+                if other not in outcomes:
+                    token.cancel()
+                    outcomes[other] = (elapsed_ms(other), "cancelled")
+            return result, provider, outcomes
+        outcomes[provider] = (elapsed_ms(provider), "error")
+        first_error = first_error or result
+        if len(outcomes) == len(tokens):
+            return first_error, provider, outcomes
+
+
 def _get_fallback_order(db_path=None):
     """Return provider fallback order. Configurable via 'fallback_order' config key."""
     if db_path:
@@ -1689,6 +2036,183 @@ def _is_llm_error(text: str) -> bool:
     return any(text.startswith(p) for p in error_prefixes)
 
 
+# ---------------------------------------------------------------------------
+# Adaptive concurrency — per-provider AIMD limit, paced by Retry-After
+# ---------------------------------------------------------------------------
+
+LIMITER_INITIAL = 4              # requests in flight a provider starts with
+LIMITER_MIN = 1
+LIMITER_MAX = 16
+LIMITER_DECREASE = 0.5           # limit multiplier on a 429/503
+LIMITER_DECREASE_INTERVAL = 1.0  # seconds; one decrease per burst of throttles
+LIMITER_DEFAULT_RETRY = 1.0      # seconds to pause when a 429/503 names no delay
+LIMITER_MAX_RETRY = 300.0
+LIMITER_MAX_WAIT = 30.0          # queue at most this long, then let call_llm fall back
+
+
+class _ProviderLimiter:
+    """AIMD concurrency limit per cloud provider.
+
+    Each provider may have ``limit`` requests in flight; further callers
+    queue (cancellably) instead of piling onto a provider that is already
+    rate-limiting us. A success while the limit was the bottleneck grows
+    it by 1/limit (about +1 per round of requests); a 429 or 503 halves it
+    and pauses the provider for its Retry-After. A pause longer than the
+    caller could wait (LIMITER_MAX_WAIT) fails the call at once, so
+    call_llm moves on to the next provider.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._state: dict = {}
+        self._local = threading.local()
+
+    def _get(self, provider: str) -> dict:
+        s = self._state.get(provider)
+        if s is None:
+            s = self._state[provider] = {
+                "limit": float(LIMITER_INITIAL), "in_flight": 0, "queued": 0,
+                "paused_until": 0.0, "last_decrease": 0.0,
+                "requests": 0, "throttled": 0}
+        return s
+
+    def acquire(self, provider: str) -> Optional[str]:
+        """Wait for a slot. Returns None once granted, else an error string."""
+        self._local.throttle = None
+        start = time.monotonic()
+        with self._cond:
+            s = self._get(provider)
+            s["queued"] += 1
+            try:
+                while True:
+                    if http_pool.cancelled():
+                        return "(Error: LLM call cancelled after timeout)"
+                    now = time.monotonic()
+                    pause = s["paused_until"] - now
+                    if pause > LIMITER_MAX_WAIT - (now - start):
+                        return (f"(API error 429: {provider} is rate-limited "
+                                f"for another {pause:.0f}s)")
+                    if pause <= 0 and s["in_flight"] < int(s["limit"]):
+                        s["in_flight"] += 1
+                        s["requests"] += 1
+                        return None
+                    if now - start >= LIMITER_MAX_WAIT:
+                        return (f"(Error: {provider} request queue timed out "
+                                f"after {LIMITER_MAX_WAIT:.0f}s)")
+                    self._cond.wait(min(0.25, pause) if pause > 0 else 0.25)
+            finally:
+                s["queued"] -= 1
+
+    def throttled(self, retry_after: Optional[float]) -> None:
+        """Note a 429/503 for the request this thread is making."""
+        self._local.throttle = LIMITER_DEFAULT_RETRY if retry_after is None else retry_after
+
+    def release(self, provider: str, ok: bool) -> None:
+        throttle = getattr(self._local, "throttle", None)
+        self._local.throttle = None
+        with self._cond:
+            s = self._get(provider)
+            saturated = s["queued"] > 0 or s["in_flight"] >= int(s["limit"])
+            s["in_flight"] -= 1
+            now = time.monotonic()
+            if throttle is not None:
+                s["throttled"] += 1
+                s["paused_until"] = max(s["paused_until"],
+                                        now + min(throttle, LIMITER_MAX_RETRY))
+                if now - s["last_decrease"] >= LIMITER_DECREASE_INTERVAL:
+                    s["limit"] = max(LIMITER_MIN, s["limit"] * LIMITER_DECREASE)
+                    s["last_decrease"] = now
+            elif ok and saturated:
+                s["limit"] = min(LIMITER_MAX, s["limit"] + 1.0 / s["limit"])
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            return {p: {"limit": round(s["limit"], 2), "in_flight": s["in_flight"],
+                        "queued": s["queued"], "requests": s["requests"],
+                        "throttled": s["throttled"],
+                        "paused_for": round(max(0.0, s["paused_until"] - now), 1)}
+                    for p, s in self._state.items()}
+
+    def reset(self) -> None:
+        with self._cond:
+            self._state.clear()
+
+
+_limiter = _ProviderLimiter()
+
+
+def get_limiter_stats() -> dict:
+    """Per-provider gauges: limit, in_flight, queued, requests, throttled, paused_for."""
+    return _limiter.snapshot()
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a rate-limit reset value: "20", "1.5s", "6m0s", "250ms"."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(n) * scale[unit] for n, unit in parts)
+
+
+def _retry_after_seconds(headers) -> Optional[float]:
+    """Delay a 429/503 asks for: retry-after-ms, Retry-After (seconds or an
+    HTTP date), else the x-ratelimit-reset-* header of the exhausted limit."""
+    if headers is None:
+        return None
+    delay = _parse_duration(headers.get("retry-after-ms"))
+    if delay is not None:
+        return delay / 1000
+    value = headers.get("Retry-After")
+    if value:
+        delay = _parse_duration(value.strip()) if value.strip().isdigit() else None
+        if delay is not None:
+            return delay
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+            if when.tzinfo is None:
+                when = when.replace(tzinfo=timezone.utc)
+            return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+    resets = {kind: _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+              for kind in ("requests", "tokens")}
+    exhausted = [resets[k] for k in resets if resets[k] is not None
+                 and headers.get(f"x-ratelimit-remaining-{k}") == "0"]
+    known = [v for v in resets.values() if v is not None]
+    if exhausted:
+        return max(exhausted)
+    return min(known) if known else None
+
+
+def _note_throttle(e: urllib.error.HTTPError) -> None:
+    """Tell the limiter about a 429/503 so the provider is paced."""
+    if e.code in (429, 503):
+        _limiter.throttled(_retry_after_seconds(e.headers))
+
+
+def _limited(provider: str, call) -> str:
+    """Run ``call()`` in one of ``provider``'s limiter slots."""
+    error = _limiter.acquire(provider)
+    if error:
+        return error
+    ok = False
+    try:
+        result = call()
+        ok = not _is_llm_error(result)
+        return result
+    finally:
+        _limiter.release(provider, ok)
+
+
 # ---------------------------------------------------------------------------
 # LLM callers — routes to the right backend per agent
 # ---------------------------------------------------------------------------
@@ -1707,7 +2231,7 @@ def _call_ollama(messages: list, model: str = OLLAMA_MODEL) -> str:
         headers={"Content-Type": "application/json"},
     )
     try:
-        with urllib.request.urlopen(req, timeout=120) as resp:
+        with http_pool.urlopen(req, timeout=120) as resp:
             data = json.loads(resp.read().decode("utf-8"))
             return data.get("message", {}).get("content", "").strip()
     except urllib.error.URLError as e:
@@ -1739,7 +2263,7 @@ def _call_kimi(messages: list, model: str = KIMI_DEFAULT_MODEL,
         },
     )
     try:
-        with urllib.request.urlopen(req, timeout=120) as resp:
+        with http_pool.urlopen(req, timeout=120) as resp:
             data = json.loads(resp.read().decode("utf-8"))
             choices = data.get("choices", [])
             if choices:
@@ -1751,6 +2275,7 @@ def _call_kimi(messages: list, model: str = KIMI_DEFAULT_MODEL,
                 return text if text else "(Empty response from Kimi)"
             return "(Empty response from Kimi)"
     except urllib.error.HTTPError as e:
+        _note_throttle(e)
         body = e.read().decode("utf-8", errors="replace")[:200]
         return f"(Kimi API error {e.code}: {body})"
     except Exception as e:
@@ -1790,13 +2315,14 @@ def _call_claude(messages: list, model: str = "claude-sonnet-4-5-20250929",
         },
     )
     try:
-        with urllib.request.urlopen(req, timeout=120) as resp:
+        with http_pool.urlopen(req, timeout=120) as resp:
             data = json.loads(resp.read().decode("utf-8"))
             content = data.get("content", [])
             if content:
                 return content[0].get("text", "").strip()
             return "(Empty response from Claude)"
     except urllib.error.HTTPError as e:
+        _note_throttle(e)
         body_text = e.read().decode("utf-8", errors="replace")[:200]
         return f"(Claude API error {e.code}: {body_text})"
     except Exception as e:
@@ -1823,13 +2349,14 @@ def _call_openai_compat(messages: list, model: str, api_url: str,
 
     req = urllib.request.Request(api_url, data=payload, headers=headers)
     try:
-        with urllib.request.urlopen(req, timeout=120) as resp:
+        with http_pool.urlopen(req, timeout=120) as resp:
             data = json.loads(resp.read().decode("utf-8"))
             choices = data.get("choices", [])
             if choices:
                 return choices[0].get("message", {}).get("content", "").strip()
             return "(Empty response)"
     except urllib.error.HTTPError as e:
+        _note_throttle(e)
         body_text = e.read().decode("utf-8", errors="replace")[:200]
         return f"(API error {e.code}: {body_text})"
     except Exception as e:
@@ -1838,7 +2365,10 @@ def _call_openai_compat(messages: list, model: str, api_url: str,
 
 def _call_provider(provider: str, messages: list, specific_model: str = "",
                    db_path: Path = None) -> str:
-    """Call a single LLM provider. Returns the response text (or error string)."""
+    """Call a single LLM provider. Returns the response text (or error string).
+
+    Cloud providers are called through _limiter; local Ollama is not.
+    """
     if provider == "ollama":
         use_model = specific_model or OLLAMA_MODEL
         return _call_ollama(messages, model=use_model)
@@ -1846,32 +2376,287 @@ def _call_provider(provider: str, messages: list, specific_model: str = "",
     if provider == "kimi":
         use_model = specific_model or KIMI_DEFAULT_MODEL
         api_key = bus.get_config("kimi_api_key", "", db_path=db_path) if db_path else ""
-        return _call_kimi(messages, model=use_model, api_key=api_key)
+        return _limited(provider, lambda: _call_kimi(messages, model=use_model,
+                                                     api_key=api_key))
 
     if provider == "claude":
         use_model = specific_model or PROVIDERS["claude"][1]
         api_key = bus.get_config("claude_api_key", "", db_path=db_path) if db_path else ""
-        return _call_claude(messages, model=use_model, api_key=api_key)
+        return _limited(provider, lambda: _call_claude(messages, model=use_model,
+                                                       api_key=api_key))
 
     if provider in PROVIDERS:
         api_url, default_model, key_name = PROVIDERS[provider]
         use_model = specific_model or default_model
         api_key = bus.get_config(key_name, "", db_path=db_path) if (db_path and key_name) else ""
-        return _call_openai_compat(messages, model=use_model, api_url=api_url, api_key=api_key)
+        return _limited(provider, lambda: _call_openai_compat(
+            messages, model=use_model, api_url=api_url, api_key=api_key))
 
     # Unknown provider — try Ollama with the full string as model name
     return _call_ollama(messages, model=provider)
 
 
+# ---------------------------------------------------------------------------
+# Streaming LLM callers — yield text deltas as the provider generates them
+# ---------------------------------------------------------------------------
+
+STREAM_FLUSH_INTERVAL = 0.15  # min seconds between partial-reply writes
+
+
+def _iter_sse(resp):
+    """Yield the data payload of each server-sent event in a response."""
+    data_lines = []
+    for raw in resp:
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        if not line:
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+    if data_lines:
+        yield "\n".join(data_lines)
+
+
+def _stream_ollama(messages: list, model: str = OLLAMA_MODEL):
+    """Stream from local Ollama (NDJSON, one chunk per line)."""
+    payload = json.dumps({
+        "model": model,
+        "messages": messages,
+        "stream": True,
+        "options": {"temperature": 0.7, "num_predict": 1024},
+    }).encode("utf-8")
+    req = urllib.request.Request(
+        OLLAMA_URL, data=payload,
+        headers={"Content-Type": "application/json"},
+    )
+    with http_pool.urlopen(req, timeout=120) as resp:
+        for line in resp:
+            if not line.strip():
+                continue
+            chunk = json.loads(line.decode("utf-8"))
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"])
+            delta = chunk.get("message", {}).get("content", "")
+            if delta:
+                yield delta
+            if chunk.get("done"):
+                break
+
+
+def _stream_openai_compat(messages: list, model: str, api_url: str,
+                          api_key: str, options: Optional[dict] = None):
+    """Stream from an OpenAI-compatible endpoint (SSE chat.completion.chunk).
+
+    Kimi may answer in reasoning_content only; that text is yielded as a
+    fallback if no regular content arrived.
+    """
+    if not api_key:
+        raise RuntimeError("API key not configured for this model.")
+    body = {"model": model, "messages": messages, "stream": True,
+            "temperature": 0.7, "max_tokens": 1024}
+    body.update(options or {})
+    req = urllib.request.Request(
+        api_url, data=json.dumps(body).encode("utf-8"),
+        headers={
+            "Content-Type": "application/json; charset=utf-8",
+            "Authorization": f"Bearer {api_key}",
+            "User-Agent": "CrewBus/1.0",
+        },
+    )
+    got_content = False
+    reasoning = []
+    with http_pool.urlopen(req, timeout=120) as resp:
+        for data in _iter_sse(resp):
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            choices = chunk.get("choices") or []
+            if not choices:
+                continue
+            delta = choices[0].get("delta", {})
+            text = delta.get("content") or ""
+            if text:
+                got_content = True
+                yield text
+            elif delta.get("reasoning_content"):
+                reasoning.append(delta["reasoning_content"])
+    if not got_content and reasoning:
+        yield "".join(reasoning)
+
+
+def _stream_claude(messages: list, model: str, api_key: str):
+    """Stream from the Anthropic Messages API (SSE content_block_delta)."""
+    if not api_key:
+        raise RuntimeError("Claude API key not configured.")
+    system_text = ""
+    chat_messages = []
+    for msg in messages:
+        if msg["role"] == "system":
+            system_text = msg["content"]
+        else:
+            chat_messages.append({"role": msg["role"], "content": msg["content"]})
+    body = {"model": model, "max_tokens": 1024, "messages": chat_messages,
+            "stream": True}
+    if system_text:
+        body["system"] = system_text
+    req = urllib.request.Request(
+        "https://api.anthropic.com/v1/messages",
+        data=json.dumps(body).encode("utf-8"),
+        headers={
+            "Content-Type": "application/json",
+            "x-api-key": api_key,
+            "anthropic-version": "2023-06-01",
+        },
+    )
+    with http_pool.urlopen(req, timeout=120) as resp:
+        for data in _iter_sse(resp):
+            event = json.loads(data)
+            etype = event.get("type")
+            if etype == "content_block_delta":
+                text = event.get("delta", {}).get("text", "")
+                if text:
+                    yield text
+            elif etype == "error":
+                raise RuntimeError(event.get("error", {}).get("message", "stream error"))
+            elif etype == "message_stop":
+                break
+
+
+def _stream_provider(provider: str, messages: list, specific_model: str = "",
+                     db_path: Path = None):
+    """Streaming counterpart of _call_provider(); yields text deltas."""
+    if provider == "ollama":
+        return _stream_ollama(messages, model=specific_model or OLLAMA_MODEL)
+    if provider == "kimi":
+        api_key = bus.get_config("kimi_api_key", "", db_path=db_path) if db_path else ""
+        return _stream_openai_compat(
+            messages, model=specific_model or KIMI_DEFAULT_MODEL,
+            api_url=KIMI_API_URL, api_key=api_key,
+            options={"temperature": 0.6, "thinking": {"type": "disabled"}})
+    if provider == "claude":
+        api_key = bus.get_config("claude_api_key", "", db_path=db_path) if db_path else ""
+        return _stream_claude(messages, model=specific_model or PROVIDERS["claude"][1],
+                              api_key=api_key)
+    if provider in PROVIDERS:
+        api_url, default_model, key_name = PROVIDERS[provider]
+        api_key = bus.get_config(key_name, "", db_path=db_path) if (db_path and key_name) else ""
+        return _stream_openai_compat(messages, model=specific_model or default_model,
+                                     api_url=api_url, api_key=api_key)
+    return _stream_ollama(messages, model=provider)
+
+
+def _consume_stream(provider: str, messages: list, specific_model: str,
+                    db_path: Path, on_delta) -> str:
+    """Drive a provider stream, forwarding deltas. Returns the full text.
+
+    Errors before the first delta come back as "(Error ...)" strings so
+    call_llm can fall back to the next provider. Once text has been
+    published there is no clean way to switch providers, so a mid-stream
+    failure keeps the partial reply. Cloud providers stream through
+    _limiter, like _call_provider.
+    """
+    if provider != "ollama" and provider in PROVIDERS:
+        return _limited(provider, lambda: _drain_stream(
+            provider, messages, specific_model, db_path, on_delta))
+    return _drain_stream(provider, messages, specific_model, db_path, on_delta)
+
+
+def _drain_stream(provider: str, messages: list, specific_model: str,
+                  db_path: Path, on_delta) -> str:
+    parts = []
+    try:
+        for delta in _stream_provider(provider, messages, specific_model, db_path):
+            parts.append(delta)
+            on_delta(delta)
+    except urllib.error.HTTPError as e:
+        _note_throttle(e)
+        if not parts:
+            body_text = e.read().decode("utf-8", errors="replace")[:200]
+            return f"(API error {e.code}: {body_text})"
+        _logger.warning("Stream from '%s' cut off (HTTP %s)", provider, e.code)
+    except Exception as e:
+        if not parts:
+            return f"(Error streaming from {provider}: {e})"
+        _logger.warning("Stream from '%s' cut off: %s", provider, e)
+    text = "".join(parts).strip()
+    return text if text else "(Empty response)"
+
+
+class _ReplyStreamer:
+    """on_delta sink that publishes a partial reply to the human's chat.
+
+    The first delta inserts the reply row right away. Later deltas rewrite
+    its body at most every STREAM_FLUSH_INTERVAL. Text from the first
+    action block onward (``` or {") is held back, so raw crew_action or
+    wizard_action JSON never flashes in the chat. The finished,
+    post-processed reply replaces the body through
+    _insert_reply_direct(message_id=...).
+    """
+
+    def __init__(self, db_path: Path, from_id: int, to_id: int):
+        self.db_path = db_path
+        self.from_id = from_id
+        self.to_id = to_id
+        self.message_id: Optional[int] = None
+        self._parts: list = []
+        self._published = ""
+        self._last_flush = 0.0
+
+    def __call__(self, delta: str) -> None:
+        self._parts.append(delta)
+        now = time.monotonic()
+        if now - self._last_flush >= STREAM_FLUSH_INTERVAL:
+            self._last_flush = now
+            self._publish()
+
+    def _visible_text(self) -> str:
+        text = "".join(self._parts)
+        cut = len(text)
+        for marker in ("```", '{"'):
+            idx = text.find(marker)
+            if idx != -1:
+                cut = min(cut, idx)
+        return text[:cut].strip()
+
+    def _publish(self) -> None:
+        text = self._visible_text()
+        if not text or text == self._published:
+            return
+        try:
+            if self.message_id is None:
+                with bus.db_write(self.db_path) as conn:
+                    self.message_id = conn.execute(
+                        "INSERT INTO messages (from_agent_id, to_agent_id, message_type, "
+                        "subject, body, priority, status) VALUES (?, ?, 'report', "
+                        "'Chat reply', ?, 'normal', 'delivered')",
+                        (self.from_id, self.to_id, text),
+                    ).lastrowid
+            else:
+                bus.update_message_body(self.message_id, text, db_path=self.db_path)
+            self._published = text
+        except Exception as e:
+            _logger.debug("Partial reply publish failed: %s", e)
+
+
 def call_llm(system_prompt: str, user_message: str,
              chat_history: Optional[list] = None,
-             model: str = "", db_path: Path = None) -> str:
+             model: str = "", db_path: Path = None,
+             on_delta=None, agent_id: Optional[int] = None) -> str:
     """Route to the correct LLM backend based on model string.
 
+    Streaming: pass ``on_delta`` (a callable taking a text chunk) to have
+    the provider stream its answer — Ollama NDJSON, OpenAI-compatible or
+    Anthropic SSE — with each delta forwarded as it arrives. The return
+    value is still the full reply text.
+
     Includes automatic fallback chain with circuit breaker:
       - If the primary provider fails, tries the next configured provider
       - Providers with open circuits (recent repeated failures) are skipped
-      - Exponential backoff between retries (0.5s, 1s)
+      - The next provider is tried right away; pacing a provider that
+        answered 429/503 is _limiter's job (per-provider AIMD concurrency
+        limit plus its Retry-After)
 
     Model resolution order:
       1. Per-agent model field (passed in)
@@ -1882,16 +2667,48 @@ def call_llm(system_prompt: str, user_message: str,
       - "" or "ollama:*" or plain name → Ollama
       - "kimi" or "kimi:*" → Kimi K2.5 API
       - "openai:model@url" → custom OpenAI-compatible
+
+    Context budget: the prompt is fitted to each provider's context window
+    (capped by crew_config 'prompt_token_budget'); the oldest history is
+    replaced by a short extract when it doesn't fit. The estimated prompt
+    size is reported as prompt_tokens on the llm.call span.
+
+    Single-flight: concurrent calls whose prompt hashes to the same key
+    (provider, model, temperature, messages) share one provider request;
+    see _singleflight.
+
+    Response cache (opt-in, crew_config 'llm_cache' = 'on'): a reply to a
+    byte-identical prompt for the same provider and model is served from
+    bus.llm_cache for 'llm_cache_ttl' seconds. Agents listed (by id) in
+    'llm_cache_exclude' always call the provider.
+
+    Routing: fallbacks are tried cheapest-first by observed latency and
+    error rate (_router; crew_config 'llm_routing' = 'static' keeps the
+    configured order). With 'llm_hedge' = 'on', a non-streaming call that
+    runs past the provider's p95 latency is hedged: the next fallback is
+    asked too, the first good reply wins and the other is cancelled.
     """
-    messages = [{"role": "system", "content": system_prompt}]
-    if chat_history:
-        for msg in chat_history[-500:]:
-            messages.append(msg)
-    messages.append({"role": "user", "content": user_message})
+    history = chat_history[-500:] if chat_history else []
 
     # Resolve model
     if not model:
         model = bus.get_config("default_model", "", db_path=db_path) if db_path else ""
+    budget_cap = None
+    if db_path:
+        try:
+            budget_cap = int(bus.get_config("prompt_token_budget", "0", db_path=db_path)) or None
+        except (TypeError, ValueError):
+            budget_cap = None
+    fitted: dict = {}  # budget -> (messages, stats); fallbacks often share one
+    cache_ttl = _llm_cache_ttl(db_path, agent_id)
+
+    def fit_for(provider):
+        budget = context_budget.prompt_budget(provider, budget_cap)
+        if budget not in fitted:
+            fitted[budget] = context_budget.fit_messages(
+                system_prompt, history, user_message, budget, provider,
+                summarize=_summarize_dropped_history)
+        return fitted[budget]
 
     # Parse provider from model string
     if not model or model == "ollama":
@@ -1902,38 +2719,113 @@ def call_llm(system_prompt: str, user_message: str,
         specific_model = model.split(":", 1)[1] if ":" in model else ""
 
     # Build fallback list: primary first, then others (skip duplicates)
-    providers_to_try = [primary_provider]
-    for fb in _get_fallback_order(db_path):
-        if fb != primary_provider:
-            providers_to_try.append(fb)
+    fallbacks = [fb for fb in _get_fallback_order(db_path) if fb != primary_provider]
+    routing = bus.get_config("llm_routing", "latency", db_path=db_path) if db_path else "latency"
+    if routing == "static":
+        providers_to_try = [primary_provider] + fallbacks
+    else:
+        if db_path:
+            _router.seed(db_path)
+        providers_to_try = _router.order(primary_provider, fallbacks)
+    hedge = (on_delta is None and db_path is not None
+             and bus.get_config("llm_hedge", "off", db_path=db_path) == "on")
+    tried: set = set()
 
-    backoff = 0.5
     last_error = ""
     _llm_start = time.monotonic()
     _llm_provider_used = primary_provider
 
     for i, provider in enumerate(providers_to_try):
+        # The message engine gave up on this message — don't start new calls
+        if http_pool.cancelled():
+            last_error = "(Error: LLM call cancelled after timeout)"
+            break
+
+        if provider in tried:  # already raced as a hedge
+            continue
+
         # Check circuit breaker — skip providers that are failing repeatedly
         if not _circuit.allow_request(provider):
             _logger.debug("Skipping provider '%s' (circuit open)", provider)
             continue
+        tried.add(provider)
 
         # For fallback providers, only use default model (not the primary's specific model)
         use_model = specific_model if provider == primary_provider else ""
+        messages, budget_stats = fit_for(provider)
+
+        resolved_model = use_model or PROVIDERS.get(provider, ("", provider, ""))[1]
+        prompt_key = _llm_cache_key(provider, resolved_model, messages)
+        cache_key = prompt_key if cache_ttl else None
+        if cache_key:
+            cached = bus.llm_cache_get(cache_key, db_path=db_path)
+            if cached is not None:
+                if on_delta is not None:
+                    on_delta(cached)
+                try:
+                    bus.record_span("llm.call",
+                                    duration_ms=int((time.monotonic() - _llm_start) * 1000),
+                                    status="ok",
+                                    metadata={"provider": provider, "model": model,
+                                              "response_len": len(cached),
+                                              "cache": "hit", **budget_stats},
+                                    db_path=db_path)
+                except Exception:
+                    pass
+                return cached
+
+        hedge_delay = _router.hedge_delay(provider) if hedge else None
+        backup = None
+        if hedge_delay is not None:
+            backup = next((p for p in providers_to_try[i + 1:]
+                           if p not in tried and _circuit.allow_request(p)), None)
+        hedged: dict = {}  # filled by the leader: winner, outcomes
+
+        if on_delta is not None:
+            def upstream(provider=provider, messages=messages, use_model=use_model):
+                return _consume_stream(provider, messages, use_model, db_path, on_delta)
+        elif backup is not None:
+            def upstream(provider=provider, messages=messages, use_model=use_model,
+                         backup=backup, delay=hedge_delay, hedged=hedged):
+                result, winner, outcomes = _hedged_call(
+                    (provider, messages, use_model), (backup, fit_for(backup)[0], ""),
+                    delay, db_path)
+                hedged.update(winner=winner, outcomes=outcomes)
+                return result
+        else:
+            def upstream(provider=provider, messages=messages, use_model=use_model):
+                return _call_provider(provider, messages, use_model, db_path)
 
+        shared = False
+        attempt_start = time.monotonic()
         try:
-            result = _call_provider(provider, messages, use_model, db_path)
+            result, shared = _singleflight.do(prompt_key, upstream)
+            if shared and on_delta is not None and not _is_llm_error(result):
+                on_delta(result)
+        except _FlightCancelled:
+            # Our message timed out while the leader is still in flight;
+            # that says nothing about the provider.
+            last_error = "(Error: LLM call cancelled after timeout)"
+            break
         except Exception as e:
-            _circuit.record_failure(provider)
+            if not isinstance(e, _SharedFlightError):  # the leader already counted it
+                _record_attempts({provider: (
+                    int((time.monotonic() - attempt_start) * 1000),
+                    "cancelled" if http_pool.cancelled() else "error")})
             last_error = f"(Exception calling {provider}: {e})"
             _logger.warning("Provider '%s' raised exception: %s", provider, e)
-            if i < len(providers_to_try) - 1:
-                time.sleep(backoff)
-                backoff = min(backoff * 2, 4)
             continue
 
+        attempt_ms = int((time.monotonic() - attempt_start) * 1000)
+        state = "ok"
+        if _is_llm_error(result):
+            state = "cancelled" if http_pool.cancelled() else "error"
+        outcomes = hedged.get("outcomes") or {provider: (attempt_ms, state)}
+        if not shared:
+            _record_attempts(outcomes)
+        tried.update(outcomes)
+
         if _is_llm_error(result):
-            _circuit.record_failure(provider)
             last_error = result
             if provider != primary_provider:
                 _logger.info("Fallback provider '%s' also failed: %s",
@@ -1941,24 +2833,34 @@ def call_llm(system_prompt: str, user_message: str,
             else:
                 _logger.warning("Primary provider '%s' failed: %s",
                                 provider, result[:80])
-            if i < len(providers_to_try) - 1:
-                time.sleep(backoff)
-                backoff = min(backoff * 2, 4)
             continue
 
         # Success — record telemetry span
-        _circuit.record_success(provider)
+        winner = hedged.get("winner", provider)
         _llm_dur = int((time.monotonic() - _llm_start) * 1000)
+        if cache_key and not shared and winner == provider:
+            try:
+                bus.llm_cache_put(cache_key, result, ttl=cache_ttl, provider=provider,
+                                  model=resolved_model, db_path=db_path)
+            except Exception:
+                pass
         try:
             bus.record_span("llm.call", duration_ms=_llm_dur, status="ok",
-                            metadata={"provider": provider, "model": model,
-                                      "response_len": len(result)},
+                            metadata={"provider": winner, "model": model,
+                                      "response_len": len(result),
+                                      "attempt_ms": outcomes.get(winner, (attempt_ms,))[0],
+                                      "stream": on_delta is not None,
+                                      "conn_reused": http_pool.last_reused(),
+                                      "cache": "miss" if cache_key else "off",
+                                      "coalesced": shared,
+                                      "hedged": bool(hedged),
+                                      **budget_stats},
                             db_path=db_path)
         except Exception:
             pass
-        if provider != primary_provider:
-            _logger.info("Fallback to '%s' succeeded (primary '%s' was down)",
-                         provider, primary_provider)
+        if winner != primary_provider:
+            _logger.info("Fallback to '%s' succeeded (primary '%s' was slow or down)",
+                         winner, primary_provider)
         return result
 
     # All providers failed — record error telemetry
@@ -1966,7 +2868,8 @@ def call_llm(system_prompt: str, user_message: str,
     try:
         bus.record_span("llm.call", duration_ms=_llm_dur, status="error",
                         metadata={"provider": primary_provider, "model": model,
-                                  "error": last_error[:200]},
+                                  "error": last_error[:200],
+                                  **fit_for(primary_provider)[1]},
                         db_path=db_path)
     except Exception:
         pass
@@ -1974,6 +2877,104 @@ def call_llm(system_prompt: str, user_message: str,
     return last_error or "(All LLM providers failed — check your configuration.)"
 
 
+class _SingleFlight:
+    """Coalesces concurrent identical provider requests.
+
+    The first caller for a key (the leader) makes the request; callers that
+    arrive with the same key while it is in flight wait and get the
+    leader's result, or a _SharedFlightError if it raised. A leader that
+    was itself cancelled shares nothing: its waiters retry, one of them as
+    the new leader. A waiter cancelled while waiting raises _FlightCancelled.
+    Nothing is kept once the call returns; caching finished replies is
+    bus.llm_cache's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict = {}   # key -> [done Event, result, exception, leader cancelled]
+        self.stats = {"upstream": 0, "coalesced": 0}
+
+    def do(self, key: str, fn):
+        """Return (result, shared) — shared is True for a coalesced waiter."""
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = [threading.Event(), None, None, False]
+                    self.stats["upstream"] += 1
+                else:
+                    self.stats["coalesced"] += 1
+            if leader:
+                try:
+                    flight[1] = fn()
+                    return flight[1], False
+                except BaseException as e:
+                    flight[2] = e
+                    raise
+                finally:
+                    flight[3] = http_pool.cancelled()
+                    with self._lock:
+                        del self._flights[key]
+                    flight[0].set()
+            while not flight[0].wait(0.25):
+                if http_pool.cancelled():
+                    raise _FlightCancelled("request cancelled")
+            if flight[3]:
+                continue
+            if flight[2] is not None:
+                raise _SharedFlightError(str(flight[2])) from flight[2]
+            return flight[1], True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+class _SharedFlightError(Exception):
+    """A coalesced waiter's view of the leader's failed request."""
+
+
+class _FlightCancelled(Exception):
+    """A coalesced waiter was cancelled before the leader finished."""
+
+
+_singleflight = _SingleFlight()
+
+
+def get_singleflight_stats() -> dict:
+    """Cumulative provider requests made (upstream) and avoided (coalesced)."""
+    return _singleflight.snapshot()
+
+
+# Sampling temperature each provider call uses (part of the cache key)
+_PROVIDER_TEMPERATURE = {"kimi": 0.6}
+
+
+def _llm_cache_key(provider: str, model: str, messages: list) -> str:
+    payload = json.dumps(
+        [provider, model, _PROVIDER_TEMPERATURE.get(provider, 0.7), messages],
+        ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _llm_cache_ttl(db_path: Optional[Path], agent_id: Optional[int]) -> float:
+    """Cache TTL in seconds for this call, or 0 when caching is off."""
+    if not db_path:
+        return 0
+    try:
+        if bus.get_config("llm_cache", "off", db_path=db_path) != "on":
+            return 0
+        if agent_id is not None:
+            excluded = bus.get_config("llm_cache_exclude", "", db_path=db_path)
+            if str(agent_id) in {x.strip() for x in excluded.split(",")}:
+                return 0
+        return float(bus.get_config("llm_cache_ttl", str(bus.LLM_CACHE_TTL),
+                                    db_path=db_path))
+    except (ValueError, sqlite3.Error):
+        return 0
+
+
 # Keep legacy name for backwards compat with tests
 def call_ollama(system_prompt: str, user_message: str,
                 chat_history: Optional[list] = None,
@@ -1982,7 +2983,7 @@ def call_ollama(system_prompt: str, user_message: str,
     messages = [{"role": "system", "content": system_prompt}]
     if chat_history:
         for msg in chat_history[-500:]:
-            messages.append(msg)
+            messages.append({"role": msg["role"], "content": msg["content"]})
     messages.append({"role": "user", "content": user_message})
     return _call_ollama(messages, model=model)
 
@@ -2001,34 +3002,19 @@ def _get_recent_chat(db_path: Path, sender_id: int, agent_id: int,
     Also auto-summarizes older conversations into memory so agents
     don't lose context even after the 20-message window passes.
     """
+    # Direct conversation between sender and this agent (in-memory window)
+    rows, total_count = bus.get_conversation(sender_id, agent_id, limit,
+                                             db_path=db_path)
+
+    # Auto-summarize: if there are 600+ messages, compress the oldest
+    # ones beyond our window into a memory so nothing is lost
+    if total_count > 600:
+        _auto_summarize_old_chat(db_path, sender_id, agent_id, limit)
+
+    # For managers and right_hand: pull recent DMs from other agents
+    agent_row = bus.lookup_agent(agent_id, db_path=db_path)
     conn = bus.get_conn(db_path)
     try:
-        # Direct conversation between sender and this agent
-        rows = conn.execute("""
-            SELECT from_agent_id, body, subject
-            FROM messages
-            WHERE ((from_agent_id=? AND to_agent_id=?)
-                OR (from_agent_id=? AND to_agent_id=?))
-              AND body IS NOT NULL AND body != ''
-            ORDER BY created_at DESC LIMIT ?
-        """, (sender_id, agent_id, agent_id, sender_id, limit)).fetchall()
-
-        # Auto-summarize: if there are 20+ messages, compress the oldest
-        # ones beyond our window into a memory so nothing is lost
-        total_count = conn.execute("""
-            SELECT COUNT(*) as c FROM messages
-            WHERE ((from_agent_id=? AND to_agent_id=?)
-                OR (from_agent_id=? AND to_agent_id=?))
-              AND body IS NOT NULL AND body != ''
-        """, (sender_id, agent_id, agent_id, sender_id)).fetchone()["c"]
-
-        if total_count > 600:
-            _auto_summarize_old_chat(db_path, sender_id, agent_id, limit)
-
-        # For managers and right_hand: pull recent DMs from other agents
-        agent_row = conn.execute(
-            "SELECT agent_type FROM agents WHERE id=?", (agent_id,)
-        ).fetchone()
         worker_rows = []
         if agent_row and agent_row["agent_type"] == "manager":
             worker_rows = conn.execute("""
@@ -2057,11 +3043,12 @@ def _get_recent_chat(db_path: Path, sender_id: int, agent_id: int,
 
     history = []
 
-    for row in reversed(rows):  # oldest first
+    for row in rows:  # oldest first
         role = "user" if row["from_agent_id"] == sender_id else "assistant"
         text = row["body"] if row["body"] else row["subject"]
         if text:
-            history.append({"role": role, "content": text})
+            # "id" keys the token-estimate cache; call_llm strips it
+            history.append({"role": role, "content": text, "id": row["id"]})
 
     # Inject crew/team DMs AFTER chat history (near the end) so the LLM
     # sees them as fresh context right before the user's latest message
@@ -2132,6 +3119,23 @@ def _extract_message_essence(body: str, is_human: bool) -> list:
     return points[:3]
 
 
+def _summarize_dropped_history(dropped: list) -> str:
+    """One-message stand-in for chat history trimmed by the context budget.
+
+    Zero LLM cost: key points from the most recent dropped messages.
+    """
+    points = []
+    for msg in dropped[-20:]:
+        body = msg.get("content") or ""
+        if len(body) < 10 or body.startswith("[") or body.startswith("=="):
+            continue
+        points.extend(_extract_message_essence(body, msg.get("role") == "user"))
+    if not points:
+        return ""
+    return (f"[Earlier conversation ({len(dropped)} messages) condensed] "
+            + " | ".join(points[-12:]))
+
+
 def _auto_summarize_old_chat(db_path: Path, sender_id: int, agent_id: int,
                               recent_limit: int = 20):
     """Compress old messages beyond the chat window into agent memories.
@@ -2156,11 +3160,10 @@ def _auto_summarize_old_chat(db_path: Path, sender_id: int, agent_id: int,
             # Get the oldest messages that will fall outside the window
             old_msgs = conn.execute("""
                 SELECT id, from_agent_id, body, created_at FROM messages
-                WHERE ((from_agent_id=? AND to_agent_id=?)
-                    OR (from_agent_id=? AND to_agent_id=?))
+                WHERE conversation_key = ?
                   AND body IS NOT NULL AND body != ''
-                ORDER BY created_at ASC LIMIT 20
-            """, (sender_id, agent_id, agent_id, sender_id)).fetchall()
+                ORDER BY id ASC LIMIT 20
+            """, (bus.conversation_key(sender_id, agent_id),)).fetchall()
         finally:
             conn.close()
 
@@ -2261,65 +3264,109 @@ def _check_memory_command(text: str, agent_id: int,
 # Worker loop
 # ---------------------------------------------------------------------------
 
+def _worker_id() -> str:
+    """Identity used for message leases: host:pid (one per worker process)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _LeaseKeeper:
+    """Holds the leases on one batch of claimed messages.
+
+    A background thread renews the leases every LEASE_SECONDS/3 until
+    each message is completed or the batch ends. If this process dies,
+    renewal stops, the leases run out, and another worker re-claims the
+    messages.
+    """
+
+    def __init__(self, worker_id: str, message_ids: list, db_path: Path):
+        self.worker_id = worker_id
+        self.db_path = db_path
+        self._pending = set(message_ids)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew_loop, daemon=True,
+                                        name="lease-keeper")
+        self._thread.start()
+
+    def _renew_loop(self):
+        while not self._stop.wait(LEASE_SECONDS / 3):
+            with self._lock:
+                ids = list(self._pending)
+            try:
+                renewed = bus.renew_leases(ids, self.worker_id,
+                                           lease_seconds=LEASE_SECONDS,
+                                           db_path=self.db_path)
+                if renewed < len(ids):
+                    _logger.warning("Lost %d message lease(s)", len(ids) - renewed)
+            except Exception as e:
+                _logger.warning("Lease renewal failed: %s", e)
+
+    def complete(self, row) -> None:
+        with self._lock:
+            self._pending.discard(row["id"])
+        try:
+            if not bus.complete_message(row["id"], self.worker_id, db_path=self.db_path):
+                _logger.warning("Message %s completed after its lease was lost", row["id"])
+        except Exception as e:
+            _logger.warning("Completing message %s failed: %s", row["id"], e)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
 def _process_queued_messages(db_path: Path):
-    """Process all queued messages. Human→agent gets LLM. Agent→agent just delivers."""
+    """Process all queued messages. Human→agent gets LLM. Agent→agent just delivers.
+
+    Messages are claimed with a lease (bus.claim_messages) rather than
+    flipped to 'delivered' up front, so several worker processes can
+    share one bus and a crash mid-turn re-queues the message instead of
+    losing it. Each message is completed once its turn finishes.
+    """
+    worker_id = _worker_id()
+    ids = bus.claim_messages(worker_id, lease_seconds=LEASE_SECONDS,
+                             limit=CLAIM_BATCH, db_path=db_path)
+    if not ids:
+        return
+
     conn = bus.get_conn(db_path)
     try:
-        # Pick up ALL queued messages to active agents
-        rows = conn.execute("""
+        placeholders = ",".join("?" * len(ids))
+        rows = conn.execute(f"""
             SELECT m.id, m.from_agent_id, m.to_agent_id, m.body, m.subject,
+                   m.priority, m.created_at,
                    a.agent_type, a.name, a.model, h.agent_type AS sender_type
             FROM messages m
             JOIN agents a ON m.to_agent_id = a.id
             JOIN agents h ON m.from_agent_id = h.id
-            WHERE m.status = 'queued'
-              AND a.active = 1
-            ORDER BY m.created_at ASC
-        """).fetchall()
+            WHERE m.id IN ({placeholders})
+            ORDER BY m.created_at ASC, m.id ASC
+        """, ids).fetchall()
     finally:
         conn.close()
 
     if not rows:
         return
 
-    # Mark all as 'delivered' immediately so they don't get re-picked
-    # on the next poll cycle while we're processing them.
-    with bus.db_write(db_path) as conn:
-        for row in rows:
-            conn.execute("UPDATE messages SET status='delivered' WHERE id=?",
-                         (row["id"],))
-
-    # Every message gets processed — agent reads it, thinks, replies.
-    # Human messages first (priority, sequential), then agent-to-agent in parallel.
-    human_msgs = [r for r in rows if r["sender_type"] == "human"]
-    agent_msgs = [r for r in rows if r["sender_type"] != "human"]
-
-    for row in human_msgs:
-        _process_with_timeout(row, db_path)
-
     # Track which managers had tasks fanned out to workers this cycle.
     # After workers process those tasks (and reply via _insert_reply_direct),
     # we'll have the manager synthesize the worker reports for the human.
     managers_with_fanout: set[int] = set()
 
-    for row in agent_msgs:
+    for row in rows:
         if row["sender_type"] == "manager" and row["agent_type"] == "worker":
             managers_with_fanout.add(row["from_agent_id"])
 
-    # Agent-to-agent messages in parallel (up to 10 concurrent).
-    MAX_PARALLEL_AGENT_MSGS = 10
-    if agent_msgs:
-        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_AGENT_MSGS) as pool:
-            futures = {
-                pool.submit(_process_single_message, row, db_path): row
-                for row in agent_msgs
-            }
-            for f in as_completed(futures, timeout=MSG_TIMEOUT * 2):
-                try:
-                    f.result()
-                except Exception as e:
-                    row = futures[f]
-                    print(f"[agent_worker] parallel msg error for {row.get('name', '?')}: {e}")
+    # Every message gets processed — agent reads it, thinks, replies — in
+    # per-agent FIFO order, one turn per agent at a time, with agents
+    # sharing the engine by weighted fair queueing (see _FairScheduler).
+    keeper = _LeaseKeeper(worker_id, ids, db_path)
+    flights_before = _singleflight.snapshot()
+    try:
+        _engine.run_batch(rows, db_path, on_done=keeper.complete)
+    finally:
+        keeper.stop()
+    _record_singleflight_cycle(flights_before, len(rows), db_path)
 
     # After workers have processed their tasks and replied to their manager,
     # have each manager synthesize the worker reports for the human.
@@ -2327,24 +3374,291 @@ def _process_queued_messages(db_path: Path):
         _synthesize_team_reports(manager_id, db_path)
 
 
+def _record_singleflight_cycle(before: dict, messages: int, db_path: Path):
+    """Record how many provider calls this cycle made and how many it avoided."""
+    after = _singleflight.snapshot()
+    upstream = after["upstream"] - before["upstream"]
+    coalesced = after["coalesced"] - before["coalesced"]
+    if not upstream and not coalesced:
+        return
+    if coalesced:
+        _logger.info("Single-flight: %d provider calls avoided (%d made) for %d messages",
+                     coalesced, upstream, messages)
+    try:
+        bus.record_span("llm.singleflight",
+                        metadata={"upstream": upstream, "coalesced": coalesced,
+                                  "messages": messages},
+                        db_path=db_path)
+    except Exception:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Message engine — fair scheduling on asyncio with real cancellation
+# ---------------------------------------------------------------------------
+
 MSG_TIMEOUT = 180  # seconds — hard cap per message (web search + LLM can take 2+ min)
+LEASE_SECONDS = 60  # message lease; renewed every LEASE_SECONDS/3 while in flight
+CLAIM_BATCH = 200   # max messages claimed per poll cycle
+ENGINE_MAX_CONCURRENCY = int(os.environ.get("CREW_ENGINE_CONCURRENCY", "16"))
+CANCEL_GRACE = 5.0  # seconds a timed-out message gets to unwind after cancel
+
+# Weighted fair queueing: a sender's share of the engine scales with the
+# priority of its messages. Messages from the human count double so chat
+# stays responsive while agents talk among themselves.
+PRIORITY_WEIGHTS = {"critical": 8, "high": 4, "normal": 2, "low": 1}
+HUMAN_WEIGHT_MULTIPLIER = 2
+
+
+def _row_value(row, key: str, default=None):
+    """Column value from a sqlite3.Row or dict, or default if absent."""
+    return row[key] if key in row.keys() else default
+
+
+class _FairScheduler:
+    """Per-agent FIFO queues served by weighted fair queueing.
+
+    Messages are queued per recipient, in arrival order, and a recipient has
+    at most one turn in flight — two messages to the same agent never race
+    on its chat history. Fairness is per *sender*: each message gets a
+    virtual finish tag, start = max(virtual time, sender's previous tag),
+    finish = start + 1/weight. The idle recipient whose head message has
+    the smallest tag goes next. A manager fanning out 30 tasks therefore
+    gets one sender's share, and other conversations interleave with its
+    fan-out instead of waiting behind all of it.
+    """
+
+    def __init__(self):
+        self._queues: dict = {}        # recipient -> deque[(tag, seq, row, t0)]
+        self._sender_tags: dict = {}   # sender -> last finish tag
+        self._busy: set = set()
+        self._vtime = 0.0
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def push(self, row) -> None:
+        weight = PRIORITY_WEIGHTS.get(_row_value(row, "priority", "normal"), 2)
+        if _row_value(row, "sender_type") == "human":
+            weight *= HUMAN_WEIGHT_MULTIPLIER
+        sender = _row_value(row, "from_agent_id")
+        start = max(self._vtime, self._sender_tags.get(sender, 0.0))
+        tag = start + 1.0 / weight
+        self._sender_tags[sender] = tag
+        self._seq += 1
+        queue = self._queues.setdefault(row["to_agent_id"], deque())
+        queue.append((tag, self._seq, row, time.monotonic()))
+
+    def pop(self):
+        """Next (row, depth, queued_s) to dispatch, or None if all are busy."""
+        best = None
+        for agent_id, queue in self._queues.items():
+            if queue and agent_id not in self._busy:
+                if best is None or queue[0][:2] < self._queues[best][0][:2]:
+                    best = agent_id
+        if best is None:
+            return None
+        queue = self._queues[best]
+        depth = len(queue)
+        tag, _, row, t0 = queue.popleft()
+        self._busy.add(best)
+        self._vtime = max(self._vtime, tag)
+        return row, depth, time.monotonic() - t0
+
+    def done(self, agent_id) -> None:
+        self._busy.discard(agent_id)
+
+
+def _queue_wait_ms(row, queued_s: float) -> int:
+    """Time since the message was sent (created_at), else time in the engine."""
+    created = _row_value(row, "created_at")
+    if created:
+        try:
+            sent = datetime.strptime(created, "%Y-%m-%dT%H:%M:%SZ").replace(
+                tzinfo=timezone.utc)
+            return max(0, int((datetime.now(timezone.utc) - sent).total_seconds() * 1000))
+        except ValueError:
+            pass
+    return int(queued_s * 1000)
+
+
+def _run_message(row, db_path: Path, token: "http_pool.CancelToken",
+                 on_done=None):
+    """Executor entry point: process one message under a cancel scope."""
+    try:
+        with http_pool.cancel_scope(token):
+            _process_single_message(row, db_path)
+    finally:
+        if on_done is not None:
+            on_done(row)
+
 
+class _MessageEngine:
+    """Schedules message processing on one persistent asyncio event loop.
 
-def _process_with_timeout(row, db_path: Path):
-    """Run _process_single_message in a thread with a hard timeout.
+    A batch of messages is fed through a _FairScheduler. Whenever a slot
+    in the global concurrency budget is free, the dispatcher picks the
+    next message and runs it as an asyncio task. The blocking pipeline
+    (DB, LLM call, post-processing) runs on a fixed-size thread pool with
+    one thread per slot, created once rather than per poll cycle.
 
-    If the LLM hangs or takes too long, the worker loop continues to the
-    next message instead of blocking forever.
+    When a message overruns MSG_TIMEOUT, its CancelToken shuts down its
+    in-flight HTTP connections, so the thread unwinds instead of leaking.
+    A thread that still has not finished after CANCEL_GRACE keeps its
+    slot until it does. Stuck work therefore can't make the engine start
+    more threads than the budget allows.
     """
-    t = threading.Thread(
-        target=_process_single_message, args=(row, db_path),
-        daemon=True, name=f"msg-{row['id']}")
-    t.start()
-    t.join(timeout=MSG_TIMEOUT)
-    if t.is_alive():
-        agent_name = row.get("name", "?")
-        print(f"[agent_worker] TIMEOUT processing msg {row['id']} "
-              f"for {agent_name} — skipping (>{MSG_TIMEOUT}s)")
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self.stats = {"processed": 0, "errors": 0, "timeouts": 0,
+                      "abandoned": 0, "active": 0}
+        self.queue_stats: dict = {}   # agent_id -> depth/wait counters
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="agent-msg")
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_run, daemon=True,
+                                            name="agent-engine")
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            self._global = None
+            return loop
+
+    def run_batch(self, rows: list, db_path: Path, on_done=None) -> None:
+        """Process a poll cycle's messages; blocks until all are settled.
+
+        ``on_done(row)`` is called on the pool thread once each message's
+        turn finishes (successfully or not).
+        """
+        if not rows:
+            return
+        loop = self._ensure_started()
+        asyncio.run_coroutine_threadsafe(
+            self._batch(rows, db_path, on_done), loop).result()
+
+    async def _batch(self, rows: list, db_path: Path, on_done=None):
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        sched = _FairScheduler()
+        for row in rows:
+            sched.push(row)
+
+        running: dict = {}   # task -> recipient agent_id
+        while sched or running:
+            await self._global.acquire()
+            picked = sched.pop()
+            if picked is None:
+                # Every agent with queued work already has a turn in flight
+                self._global.release()
+                finished, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    sched.done(running.pop(task))
+                continue
+            row, depth, queued_s = picked
+            self._record_dispatch(row, depth, queued_s, db_path)
+            task = asyncio.ensure_future(self._process(row, db_path, on_done))
+            running[task] = row["to_agent_id"]
+            for task in [t for t in running if t.done()]:
+                sched.done(running.pop(task))
+
+    def _record_dispatch(self, row, depth: int, queued_s: float,
+                         db_path: Path) -> None:
+        agent_id = row["to_agent_id"]
+        wait_ms = _queue_wait_ms(row, queued_s)
+        q = self.queue_stats.setdefault(agent_id, {
+            "dispatched": 0, "max_depth": 0, "wait_ms_total": 0, "max_wait_ms": 0})
+        q["dispatched"] += 1
+        q["max_depth"] = max(q["max_depth"], depth)
+        q["wait_ms_total"] += wait_ms
+        q["max_wait_ms"] = max(q["max_wait_ms"], wait_ms)
+        if db_path is not None:
+            try:
+                bus.record_span("queue.wait", agent_id=agent_id, duration_ms=wait_ms,
+                                metadata={"depth": depth,
+                                          "priority": _row_value(row, "priority", "normal"),
+                                          "from_agent_id": _row_value(row, "from_agent_id")},
+                                db_path=db_path)
+            except Exception:
+                pass
+
+    async def _process(self, row, db_path: Path, on_done=None) -> None:
+        """Run one message; the caller already holds a global slot."""
+        self.stats["active"] += 1
+
+        def _release(fut=None):
+            if fut is not None and not fut.cancelled():
+                fut.exception()  # mark retrieved; already logged
+            self.stats["active"] -= 1
+            self._global.release()
+
+        token = http_pool.CancelToken()
+        fut = asyncio.wrap_future(
+            self._executor.submit(_run_message, row, db_path, token, on_done))
+        agent_name = row["name"]
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), MSG_TIMEOUT)
+            self.stats["processed"] += 1
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            print(f"[agent_worker] TIMEOUT processing msg {row['id']} "
+                  f"for {agent_name} — cancelling (>{MSG_TIMEOUT}s)")
+            token.cancel()
+            try:
+                await asyncio.wait_for(asyncio.shield(fut), CANCEL_GRACE)
+            except asyncio.TimeoutError:
+                # The agent's next turn may start; the stuck thread keeps
+                # its global slot until it finishes.
+                self.stats["abandoned"] += 1
+                print(f"[agent_worker] msg {row['id']} did not stop after cancel; "
+                      "holding its slot until it finishes")
+                fut.add_done_callback(_release)
+                return
+            except Exception:
+                pass  # the cancellation itself surfaced as an error
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[agent_worker] msg error for {agent_name}: {e}")
+        _release()
+
+    def shutdown(self) -> None:
+        """Stop the event loop and release idle pool threads."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+            executor, self._executor = self._executor, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+_engine = _MessageEngine(ENGINE_MAX_CONCURRENCY)
+
+
+def get_engine_stats() -> dict:
+    """Message engine counters plus per-agent queue depth/wait metrics."""
+    stats = dict(_engine.stats)
+    stats["queues"] = {aid: dict(q) for aid, q in _engine.queue_stats.items()}
+    return stats
 
 
 def _process_single_message(row, db_path: Path):
@@ -2483,11 +3797,18 @@ def _process_single_message(row, db_path: Path):
 
     # Call LLM — routes to Kimi/Ollama/etc based on agent's model field.
     # call_llm handles fallback chain and circuit breaker internally.
+    # Human chats stream: first tokens land in the chat while the LLM is
+    # still generating, then the final post-processed text replaces them.
+    _stream = None
+    if sender_type == "human" and bus.get_config(
+            "stream_replies", "true", db_path=db_path) == "true":
+        _stream = _ReplyStreamer(db_path, agent_id, human_id)
     _msg_start = time.monotonic()
     _llm_start = time.monotonic()
     try:
         reply = call_llm(system_prompt, user_text, chat_history,
-                         model=agent_model, db_path=db_path)
+                         model=agent_model, db_path=db_path,
+                         on_delta=_stream, agent_id=agent_id)
     except Exception as e:
         _logger.error("Unhandled LLM exception for %s (msg %d): %s",
                       agent_name, msg_id, e)
@@ -2505,7 +3826,8 @@ def _process_single_message(row, db_path: Path):
             "Your message is safe — I'll try again on the next cycle, "
             "or you can resend it in a moment."
         )
-        _insert_reply_direct(db_path, agent_id, human_id, friendly)
+        _insert_reply_direct(db_path, agent_id, human_id, friendly,
+                             message_id=_stream and _stream.message_id)
         # Record telemetry for failed message processing
         try:
             bus.record_span("message.process", agent_id=agent_id,
@@ -2589,6 +3911,7 @@ def _process_single_message(row, db_path: Path):
                 _insert_reply_direct(
                     db_path, agent_id, human_id, fallback,
                     human_msg=user_text, agent_type=agent_type,
+                    message_id=_stream and _stream.message_id,
                 )
                 return
             else:
@@ -2625,11 +3948,13 @@ def _process_single_message(row, db_path: Path):
                          f'DM reply (hop=1) from {agent_name}',
                          clean_reply),
                     )
+                bus.notify_queued(db_path)
         else:
             # Normal human→agent reply
             _insert_reply_direct(db_path, agent_id, human_id, clean_reply,
                                  human_msg=user_text, agent_type=agent_type,
-                                 attachment=att_json)
+                                 attachment=att_json,
+                                 message_id=_stream and _stream.message_id)
 
         # ── Skill health tracking (Guardian runtime monitoring) ──
         try:
@@ -2728,20 +4053,14 @@ def _execute_crew_actions(reply: str, from_agent_id: int, db_path: Path) -> str:
             channel = action.get("channel", "standup")
             agenda = action.get("agenda", "")
             participant_names = action.get("participants", [])
-            conn = bus.get_conn(db_path)
-            try:
-                p_ids = []
-                for pname in participant_names:
-                    row = conn.execute(
-                        "SELECT id FROM agents WHERE LOWER(name) LIKE LOWER(?) AND active=1",
-                        (f"%{pname}%",),
-                    ).fetchone()
-                    if row:
-                        p_ids.append(row["id"])
-                if from_agent_id not in p_ids:
-                    p_ids.append(from_agent_id)
-            finally:
-                conn.close()
+            p_ids = []
+            for pname in participant_names:
+                agent = bus.find_agent(pname, active_only=True, partial=True,
+                                       db_path=db_path)
+                if agent:
+                    p_ids.append(agent["id"])
+            if from_agent_id not in p_ids:
+                p_ids.append(from_agent_id)
 
             if p_ids and agenda:
                 result = bus.crew_meeting(channel, agenda, p_ids,
@@ -3064,7 +4383,7 @@ def _synthesize_team_reports(manager_id: int, db_path: Path):
 
     model = mgr["model"] if mgr["model"] else ""
     reply = call_llm(system_prompt, synthesis_prompt, chat_history,
-                     model=model, db_path=db_path)
+                     model=model, db_path=db_path, agent_id=manager_id)
 
     if reply and reply.strip():
         clean_reply = _execute_wizard_actions(reply, db_path, agent_id=manager_id, agent_type="manager")
@@ -3864,6 +5183,7 @@ def _execute_wizard_actions(reply: str, db_path: Path, agent_id: int = None, age
                                 user_message="\n".join(context_parts),
                                 model=_agent_model,
                                 db_path=db_path,
+                                agent_id=agent_id,
                             )
                             if summary and not summary.startswith("[error"):
                                 replacements[raw] = summary
@@ -4146,15 +5466,25 @@ def _mark_delivered(db_path: Path, message_id: int):
 
 def _insert_reply_direct(db_path: Path, from_id: int, to_id: int, body: str,
                          human_msg: str = "", agent_type: str = "",
-                         attachment: str = None):
-    """Insert a reply directly (bypass routing rules for chat responses)."""
+                         attachment: str = None, message_id: int = None):
+    """Insert a reply directly (bypass routing rules for chat responses).
+
+    If ``message_id`` names a partial reply already published by
+    _ReplyStreamer, that row is finalized in place instead.
+    """
     with bus.db_write(db_path) as conn:
-        conn.execute(
-            "INSERT INTO messages (from_agent_id, to_agent_id, message_type, "
-            "subject, body, priority, status, attachment) VALUES (?, ?, 'report', "
-            "'Chat reply', ?, 'normal', 'delivered', ?)",
-            (from_id, to_id, body, attachment),
-        )
+        if message_id:
+            conn.execute(
+                "UPDATE messages SET body=?, attachment=? WHERE id=?",
+                (body, attachment, message_id),
+            )
+        else:
+            conn.execute(
+                "INSERT INTO messages (from_agent_id, to_agent_id, message_type, "
+                "subject, body, priority, status, attachment, conversation_key) "
+                "VALUES (?, ?, 'report', 'Chat reply', ?, 'normal', 'delivered', ?, ?)",
+                (from_id, to_id, body, attachment, bus.conversation_key(from_id, to_id)),
+            )
 
     # Real-time integrity check — scan every agent reply as it's sent
     _check_reply_integrity(db_path, from_id, body)
@@ -4312,12 +5642,19 @@ def _run_due_heartbeats(db_path: Path):
 # ---------------------------------------------------------------------------
 
 _worker_thread: Optional[threading.Thread] = None
+_worker_db_path: Optional[Path] = None
 _stop_event = threading.Event()
 
+# Housekeeping intervals (seconds). The loop sleeps until the next one is due
+# or until a message is queued, whichever comes first.
+MEMORY_CLEANUP_INTERVAL = 50
+HEARTBEAT_INTERVAL = 60
+TELEMETRY_CLEANUP_INTERVAL = 3600
+
 
 def start_worker(db_path: Path = None):
     """Start the background agent worker thread."""
-    global _worker_thread
+    global _worker_thread, _worker_db_path
     if db_path is None:
         db_path = bus.DB_PATH
 
@@ -4325,10 +5662,11 @@ def start_worker(db_path: Path = None):
         return  # already running
 
     _stop_event.clear()
+    _worker_db_path = db_path
 
     def _loop():
         default_model = bus.get_config("default_model", "ollama", db_path=db_path)
-        print(f"Agent worker started (default: {default_model}, poll: {POLL_INTERVAL}s)")
+        print(f"Agent worker started (default: {default_model}, event-driven)")
 
         # Seed default heartbeat tasks on first boot
         try:
@@ -4336,38 +5674,85 @@ def start_worker(db_path: Path = None):
         except Exception:
             pass
 
-        _cycle_count = 0
+        now = time.monotonic()
+        next_memory_cleanup = now + MEMORY_CLEANUP_INTERVAL
+        next_heartbeat = now + HEARTBEAT_INTERVAL
+        next_telemetry_cleanup = now + TELEMETRY_CLEANUP_INTERVAL
         while not _stop_event.is_set():
             try:
                 _process_queued_messages(db_path)
             except Exception as e:
                 print(f"[agent_worker] error: {e}")
-            _cycle_count += 1
-            # Periodic memory expiry cleanup (every ~100 cycles ≈ 50s)
-            if _cycle_count % 100 == 0:
+            now = time.monotonic()
+            # Periodic memory expiry cleanup
+            if now >= next_memory_cleanup:
+                next_memory_cleanup = now + MEMORY_CLEANUP_INTERVAL
                 try:
                     expired = bus.cleanup_expired_memories(db_path=db_path)
                     if expired:
                         print(f"[memory] Cleaned up {expired} expired memories")
                 except Exception:
                     pass
-            # Heartbeat daemon (every ~120 cycles ≈ 60s)
-            if _cycle_count % 120 == 0:
+            # Heartbeat daemon
+            if now >= next_heartbeat:
+                next_heartbeat = now + HEARTBEAT_INTERVAL
                 try:
                     _run_due_heartbeats(db_path)
                 except Exception as e:
                     print(f"[heartbeat] error: {e}")
-            # Telemetry cleanup (every ~7200 cycles ≈ 1 hour)
-            if _cycle_count % 7200 == 0:
+                # HTTP keep-alive pool hit/miss counters (cumulative)
+                try:
+                    bus.record_span("http.pool", metadata=http_pool.get_stats(),
+                                    db_path=db_path)
+                except Exception:
+                    pass
+                # Skill usage counters accumulated since the last batch
+                try:
+                    import skill_sandbox
+                    skill_sandbox.flush_skill_usage(db_path)
+                except Exception:
+                    pass
+                # Per-provider concurrency limits and in-flight requests (gauges)
+                try:
+                    limits = get_limiter_stats()
+                    if limits:
+                        bus.record_span("llm.limiter", metadata=limits, db_path=db_path)
+                except Exception:
+                    pass
+                # LLM response cache hit/miss/bytes-saved counters (cumulative)
+                try:
+                    if bus.get_config("llm_cache", "off", db_path=db_path) == "on":
+                        bus.record_span("llm.cache", metadata=bus.get_llm_cache_stats(db_path),
+                                        db_path=db_path)
+                except Exception:
+                    pass
+                # Deferred accounting flush lag (duration = oldest pending entry's age)
+                try:
+                    acct = bus.get_accounting_stats()
+                    bus.record_span("accounting.flush", duration_ms=acct["pending_age_ms"],
+                                    metadata=acct, db_path=db_path)
+                except Exception:
+                    pass
+            # Telemetry cleanup
+            if now >= next_telemetry_cleanup:
+                next_telemetry_cleanup = now + TELEMETRY_CLEANUP_INTERVAL
                 try:
                     pruned = bus.cleanup_old_telemetry(days=7, db_path=db_path)
                     if pruned:
                         print(f"[telemetry] Cleaned up {pruned} old spans")
                     # Also clean expired pairing codes
                     bus.cleanup_expired_codes(db_path=db_path)
+                    bus.prune_llm_cache(db_path=db_path)
+                    bus.prune_agent_activity(db_path=db_path)
                 except Exception:
                     pass
-            _stop_event.wait(POLL_INTERVAL)
+            if _stop_event.is_set():
+                break
+            # Block until a message is queued or housekeeping is due.
+            # Replaces the old fixed 0.5s poll of the messages table.
+            due = min(next_memory_cleanup, next_heartbeat, next_telemetry_cleanup)
+            bus.wait_for_queued(db_path, timeout=max(0.0, due - time.monotonic()),
+                                check_interval=POLL_INTERVAL)
         print("Agent worker stopped.")
 
     _worker_thread = threading.Thread(target=_loop, daemon=True, name="agent-worker")
@@ -4377,5 +5762,10 @@ def start_worker(db_path: Path = None):
 def stop_worker():
     """Stop the background agent worker thread."""
     _stop_event.set()
+    if _worker_db_path is not None:
+        bus.notify_queued(_worker_db_path)  # wake the loop if it's idle
     if _worker_thread:
         _worker_thread.join(timeout=5)
+    if not (_worker_thread and _worker_thread.is_alive()):
+        _engine.shutdown()  # a batch still in flight keeps the engine running
+    bus.flush_telemetry()
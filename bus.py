@@ -17,6 +17,7 @@ The Security Guard (encryption, kill switches, tamper detection, audit hardening
 activates with a paid license key. Everything else works without it.
 """
 
+import atexit
 import base64
 import contextlib
 import hashlib
@@ -25,7 +26,10 @@ import json
 import os
 import sqlite3
 import threading
+import time
 import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
@@ -39,9 +43,10 @@ DB_PATH = Path(__file__).parent / "crew_bus.db"
 # ---------------------------------------------------------------------------
 # SQLite only supports one writer at a time. In WAL mode, concurrent readers
 # are fine, but concurrent writers will get "database is locked" even with a
-# timeout. This lock ensures all write operations are serialized across ALL
-# threads (HTTP handler threads + agent worker thread).
-_db_write_lock = threading.Lock()
+# timeout. All db_write() callers for a database share one _GroupCommitWriter,
+# whose lock serializes writes across ALL threads (HTTP handler threads +
+# agent worker thread) and whose persistent connection commits them in groups.
+_writers_lock = threading.Lock()
 
 # Activation verification key (signing key lives on crew-bus.dev server)
 # Load from env var so the published source doesn't leak the production key
@@ -165,38 +170,177 @@ class _CachedConnection:
         pass
 
 
-def _make_conn(path: Path) -> sqlite3.Connection:
-    """Create a fresh SQLite connection with standard PRAGMAs."""
-    conn = sqlite3.connect(str(path), timeout=10)
+# ---------------------------------------------------------------------------
+# Durability / performance profiles
+# ---------------------------------------------------------------------------
+# Named PRAGMA sets applied to every connection. The active profile is stored
+# in crew_config under 'db_profile' and cached per database path; the cache
+# is re-read whenever the 'config' row of data_versions moves.
+#   safe      — fsync on every commit (previous hard-coded behaviour)
+#   balanced  — WAL + synchronous=NORMAL: a crash can lose the last few
+#               commits but never corrupts the DB; bigger cache + mmap
+#   fast      — no fsync at all; for throwaway/dev databases
+
+DB_PROFILES = {
+    "safe": {
+        "synchronous": "FULL",
+        "busy_timeout": 10000,
+    },
+    "balanced": {
+        "synchronous": "NORMAL",
+        "busy_timeout": 10000,
+        "cache_size": -65536,        # 64 MB page cache
+        "mmap_size": 268435456,      # 256 MB memory-mapped reads
+        "temp_store": "MEMORY",
+    },
+    "fast": {
+        "synchronous": "OFF",
+        "busy_timeout": 10000,
+        "cache_size": -131072,       # 128 MB page cache
+        "mmap_size": 1073741824,     # 1 GB memory-mapped reads
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_DB_PROFILE = "safe"
+
+_db_profiles: dict = {}       # db path -> profile name
+_profile_versions: dict = {}  # db path -> 'config' data version it was read at
+
+
+def _read_profile(conn: sqlite3.Connection) -> str:
+    try:
+        row = conn.execute(
+            "SELECT value FROM crew_config WHERE key='db_profile'"
+        ).fetchone()
+        name = row[0] if row else DEFAULT_DB_PROFILE
+    except sqlite3.OperationalError:
+        name = DEFAULT_DB_PROFILE  # crew_config not created yet
+    return name if name in DB_PROFILES else DEFAULT_DB_PROFILE
+
+
+def _profile_for(conn: sqlite3.Connection, key: str) -> str:
+    name = _db_profiles.get(key)
+    if name is None:
+        name = _db_profiles[key] = _read_profile(conn)
+    return name
+
+
+def _switch_profile(key: str, name: str) -> None:
+    """Record a new profile for a database so the writer and every thread's
+    cached connection reopen with it.
+
+    The writer stays registered (one per database, so its lock keeps
+    serializing writes); its connection is closed now if idle, otherwise
+    when the open batch has committed.
+    """
+    with _writers_lock:
+        if _db_profiles.get(key) == name:
+            return
+        _db_profiles[key] = name
+        writer = _writers.get(key)
+        if writer is not None:
+            writer.mark_stale()
+            writer.close()
+
+
+def _config_version(conn: sqlite3.Connection) -> int:
+    """The 'config' counter in data_versions (0 before init_db creates it).
+
+    Doubles as the cached connection's health check: it raises on a
+    closed or broken connection.
+    """
+    try:
+        row = conn.execute(
+            "SELECT version FROM data_versions WHERE domain='config'"
+        ).fetchone()
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        return 0
+    return row[0] if row else 0
+
+
+def _refresh_profile(conn: sqlite3.Connection, key: str) -> None:
+    """Re-read the profile if crew_config changed since it was last read
+    (in this or another process). Raises if the connection is unusable."""
+    version = _config_version(conn)
+    if version != _profile_versions.get(key):
+        _switch_profile(key, _read_profile(conn))
+        _profile_versions[key] = version
+
+
+def _make_conn(path: Path, shared: bool = False) -> sqlite3.Connection:
+    """Create a fresh SQLite connection with standard PRAGMAs.
+
+    The database's durability profile (see DB_PROFILES) decides the
+    synchronous level and cache/mmap tuning. ``shared=True`` allows use
+    from any thread (callers must serialize access themselves) and
+    switches to manual transaction control.
+    """
+    conn = sqlite3.connect(str(path), timeout=10, check_same_thread=not shared)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA synchronous=FULL")
     conn.execute("PRAGMA foreign_keys=ON")
+    profile = DB_PROFILES[_profile_for(conn, str(path))]
+    for pragma, value in profile.items():
+        conn.execute(f"PRAGMA {pragma}={value}")
+    if shared:
+        conn.isolation_level = None
     return conn
 
 
+def get_db_profile(db_path: Optional[Path] = None) -> str:
+    """Return the name of the durability profile in effect for a database."""
+    conn = get_conn(db_path)
+    return _profile_for(conn, str(db_path or DB_PATH))
+
+
+def set_db_profile(name: str, db_path: Optional[Path] = None) -> None:
+    """Switch a database to a named durability profile ('safe', 'balanced',
+    'fast'). Persists in crew_config. Connections in this and other
+    processes reopen with it on their next get_conn(), which notices the
+    change through the 'config' row of data_versions."""
+    if name not in DB_PROFILES:
+        raise ValueError(f"Invalid db profile '{name}'. Must be one of {tuple(DB_PROFILES)}")
+    set_config("db_profile", name, db_path=db_path)
+    _switch_profile(str(db_path or DB_PATH), name)
+
+
 def get_conn(db_path: Optional[Path] = None) -> sqlite3.Connection:
     """Return a connection to the crew-bus database with row factory enabled.
 
     Connections are cached per-thread and per-db-path. The returned object's
     close() is a no-op so existing call sites that close after use don't
     invalidate the cache. Call close_thread_connections() to truly release.
+
+    Each call checks the 'config' data version; when crew_config changed
+    (here or in another process) the durability profile is re-read, and a
+    connection opened under a different profile is reopened.
     """
     path = db_path or DB_PATH
+    key = str(path)
     cache_key = f"_conn_{path}"
 
     wrapper = getattr(_thread_local, cache_key, None)
     if wrapper is not None:
         try:
-            # Quick health check on the real connection
-            wrapper._real.execute("SELECT 1")
-            return wrapper
+            _refresh_profile(wrapper._real, key)
         except (sqlite3.ProgrammingError, sqlite3.OperationalError):
             wrapper._actually_close()
+        else:
+            if getattr(_thread_local, f"_profile_{path}", None) == _db_profiles.get(key):
+                return wrapper
+            wrapper._actually_close()  # profile changed — reopen with new PRAGMAs
 
     real_conn = _make_conn(path)
+    opened_with = _db_profiles.get(key)
+    _refresh_profile(real_conn, key)
+    if _db_profiles.get(key) != opened_with:
+        real_conn.close()
+        real_conn = _make_conn(path)
     wrapper = _CachedConnection(real_conn)
     setattr(_thread_local, cache_key, wrapper)
+    setattr(_thread_local, f"_profile_{path}", _db_profiles.get(key))
     return wrapper
 
 
@@ -211,6 +355,295 @@ def close_thread_connections():
             if wrapper is not None:
                 wrapper._actually_close()
             delattr(_thread_local, attr)
+        elif attr.startswith("_profile_"):
+            delattr(_thread_local, attr)
+
+
+# ---------------------------------------------------------------------------
+# Group commit writer
+# ---------------------------------------------------------------------------
+# Opening a connection (and re-running its PRAGMAs) plus a full fsync for
+# every db_write() made bursts expensive: ten agents finishing together meant
+# ten back-to-back fsyncs. Each database now gets one persistent writer
+# connection. Writers still run one at a time, but each runs inside its own
+# SAVEPOINT of a shared transaction; whoever finishes while nobody else is
+# queued commits the whole group, and everyone in the group returns once that
+# COMMIT lands. A lone writer commits immediately, so there is no added
+# latency when the bus is quiet.
+
+class _BatchConnection(_CachedConnection):
+    """Connection handed to db_write() bodies. The writer owns the
+    transaction, so commit/rollback/close from callers are no-ops."""
+
+    __slots__ = ()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class _GroupCommitWriter:
+    """Persistent write connection for one database, with group commit.
+
+    Two entry points share the same batch:
+      - transaction(): context manager used by db_write(); the body runs in
+        the calling thread inside a SAVEPOINT
+      - submit(): queue a statement for the writer thread and get a Future
+        that resolves to its lastrowid once committed
+    """
+
+    MAX_BATCH = 64  # commit at least this often under sustained load
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()        # serializes use of the connection
+        self._meta = threading.Lock()        # guards _waiting / _queue / _thread
+        self._done = threading.Condition()   # signalled after every COMMIT
+        self._conn: Optional[sqlite3.Connection] = None
+        self._proxy: Optional[_BatchConnection] = None
+        self._file_id = None
+        self._stale = False       # reopen before the next batch (profile changed)
+        self._gen = 0             # last batch generation handed out
+        self._batch_gen = 0       # generation of the open batch (0 = none)
+        self._batch_size = 0
+        self._done_gen = 0        # last generation committed (or failed)
+        self._failed: dict = {}   # generation -> exception from COMMIT
+        self._waiting = 0         # threads queued for _lock
+        self._queue: list = []    # submitted (sql, params, many, future)
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"batches": 0, "writes": 0, "submitted": 0}
+
+    # -- connection management (call with _lock held) --
+
+    def _current_file_id(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_dev, st.st_ino)
+        except OSError:
+            return None
+
+    def _open(self) -> sqlite3.Connection:
+        file_id = self._current_file_id()
+        if self._conn is not None and file_id != self._file_id:
+            # DB file was deleted or replaced underneath us — reconnect
+            self._close_locked()
+        elif self._conn is not None and self._stale and not self._batch_gen:
+            self._close_locked()  # durability profile changed — new PRAGMAs
+        if self._conn is None:
+            self._conn = _make_conn(Path(self.path), shared=True)
+            self._proxy = _BatchConnection(self._conn)
+            try:
+                st = os.stat(self.path)
+                self._file_id = (st.st_dev, st.st_ino)
+            except OSError:
+                self._file_id = None
+        return self._conn
+
+    def _close_locked(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self._proxy = None
+        self._stale = False
+
+    def release_if_stale(self) -> None:
+        """Close the connection now if its file was deleted or replaced.
+
+        Closing a WAL connection removes the -wal/-shm files by name, so a
+        stale connection must go before a new database is created at the
+        same path, not lazily on its next write.
+        """
+        with self._lock:
+            if (self._conn is not None and not self._batch_gen
+                    and self._current_file_id() != self._file_id):
+                self._close_locked()
+
+    def mark_stale(self) -> None:
+        """Reopen the connection before the next batch starts.
+
+        For when close() can't run now because a batch is open.
+        """
+        self._stale = True
+
+    def close(self) -> bool:
+        """Close the connection if no batch is open. Returns True if closed."""
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self._batch_gen:
+                return False
+            self._close_locked()
+            return True
+        finally:
+            self._lock.release()
+
+    # -- batching --
+
+    def _acquire(self):
+        with self._meta:
+            self._waiting += 1
+        self._lock.acquire()
+        with self._meta:
+            self._waiting -= 1
+
+    def _begin_locked(self) -> int:
+        conn = self._open()
+        if not self._batch_gen:
+            conn.execute("BEGIN IMMEDIATE")
+            self._gen += 1
+            self._batch_gen = self._gen
+            self._batch_size = 0
+        return self._batch_gen
+
+    def _finish_locked(self):
+        """Commit now unless another writer is about to join the batch."""
+        with self._meta:
+            more_coming = self._waiting > 0 or bool(self._queue)
+        if more_coming and self._batch_size < self.MAX_BATCH:
+            return
+        self._commit_locked()
+
+    def _commit_locked(self, error: Optional[BaseException] = None):
+        gen = self._batch_gen
+        if not gen:
+            return
+        self._batch_gen = 0
+        if error is None:
+            try:
+                self._conn.execute("COMMIT")
+                self.stats["batches"] += 1
+            except sqlite3.Error as e:
+                error = e
+        if error is not None:
+            try:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+        with self._done:
+            if error is not None:
+                self._failed[gen] = error
+                for old in [g for g in self._failed if g < gen - 1000]:
+                    del self._failed[old]
+            self._done_gen = gen
+            self._done.notify_all()
+
+    def _wait_for(self, gen: int):
+        with self._done:
+            while self._done_gen < gen:
+                self._done.wait()
+            error = self._failed.get(gen)
+        if error is not None:
+            raise error
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self._acquire()
+        try:
+            gen = self._begin_locked()
+            conn = self._conn
+            conn.execute("SAVEPOINT crew_write")
+            try:
+                yield self._proxy
+            except BaseException as e:
+                try:
+                    conn.execute("ROLLBACK TO crew_write")
+                    conn.execute("RELEASE crew_write")
+                except sqlite3.Error:
+                    pass
+                if not conn.in_transaction:
+                    # SQLite aborted the whole batch — fail the other members
+                    self._commit_locked(error=e)
+                else:
+                    self._finish_locked()
+                raise
+            conn.execute("RELEASE crew_write")
+            self._batch_size += 1
+            self.stats["writes"] += 1
+            self._finish_locked()
+        finally:
+            self._lock.release()
+        self._wait_for(gen)
+
+    def submit(self, sql: str, params=(), many: bool = False) -> Future:
+        """Queue a statement for the writer thread; returns a Future."""
+        fut: Future = Future()
+        with self._meta:
+            self._queue.append((sql, params, many, fut))
+            self.stats["submitted"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._drain, daemon=True,
+                    name=f"bus-writer-{Path(self.path).name}")
+                self._thread.start()
+        return fut
+
+    def _drain(self):
+        while True:
+            with self._meta:
+                items, self._queue = self._queue, []
+                if not items:
+                    self._thread = None
+                    return
+            results = []
+            self._acquire()
+            try:
+                try:
+                    gen = self._begin_locked()
+                except sqlite3.Error as e:
+                    for _, _, _, fut in items:
+                        fut.set_exception(e)
+                    continue
+                for sql, params, many, fut in items:
+                    try:
+                        if many:
+                            cur = self._conn.executemany(sql, params)
+                        else:
+                            cur = self._conn.execute(sql, params)
+                        results.append((fut, cur.lastrowid, None))
+                    except Exception as e:
+                        results.append((fut, None, e))
+                self._batch_size += len(items)
+                self.stats["writes"] += len(items)
+                self._finish_locked()
+            finally:
+                self._lock.release()
+            try:
+                self._wait_for(gen)
+                commit_error = None
+            except Exception as e:
+                commit_error = e
+            for fut, rowid, error in results:
+                if error is None:
+                    error = commit_error
+                if error is not None:
+                    fut.set_exception(error)
+                else:
+                    fut.set_result(rowid)
+
+
+_writers: "OrderedDict[str, _GroupCommitWriter]" = OrderedDict()
+_MAX_WRITERS = 16  # idle writers beyond this are closed (tests open many DBs)
+
+
+def _get_writer(db_path: Optional[Path] = None) -> _GroupCommitWriter:
+    key = str(db_path or DB_PATH)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _GroupCommitWriter(key)
+            _writers[key] = writer
+            for old_key in list(_writers)[:-_MAX_WRITERS]:
+                if _writers[old_key].close():
+                    del _writers[old_key]
+        else:
+            _writers.move_to_end(key)
+        return writer
 
 
 @contextlib.contextmanager
@@ -222,22 +655,465 @@ def db_write(db_path: Optional[Path] = None):
             conn.execute("INSERT ...")
             # commit happens automatically on clean exit
 
-    Acquires _db_write_lock so only one thread writes at a time.
-    Uses a fresh (non-cached) connection to avoid holding a cached
-    connection in a half-committed state on error.
+    Only one thread writes at a time. The body runs in a SAVEPOINT on the
+    database's persistent writer connection, so an exception rolls back just
+    this block. Concurrent callers are committed together in one transaction
+    (one fsync); each returns only after its writes are committed.
     """
-    path = db_path or DB_PATH
-    _db_write_lock.acquire()
-    conn = _make_conn(path)
-    try:
+    with _get_writer(db_path).transaction() as conn:
         yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
+
+
+def submit_write(sql: str, params=(), db_path: Optional[Path] = None,
+                 many: bool = False) -> Future:
+    """Queue a single write statement without waiting for it.
+
+    The statement is executed by the database's writer thread and committed
+    with whatever else is in flight. The returned Future resolves to the
+    statement's lastrowid after commit (or raises the SQLite error). With
+    ``many=True``, ``params`` is a sequence of parameter tuples for
+    executemany.
+    """
+    return _get_writer(db_path).submit(sql, params, many=many)
+
+
+def get_writer_stats(db_path: Optional[Path] = None) -> dict:
+    """Return group-commit counters (batches, writes, submitted) for a DB."""
+    return dict(_get_writer(db_path).stats)
+
+
+# ---------------------------------------------------------------------------
+# Queue wakeups — lets the agent worker sleep until there is work
+# ---------------------------------------------------------------------------
+# Every write that queues a message for an agent calls notify_queued(), which
+# wakes any thread blocked in wait_for_queued() for that database. Commits
+# made by other processes (CLI, MCP server, a second worker) can't signal the
+# condition, so the waiter also checks PRAGMA data_version on a dedicated
+# watch connection. data_version only changes when a *different* connection
+# commits, and the watch connection never writes — so one cheap pragma per
+# check interval detects every external commit without touching any table.
+
+_queue_cond = threading.Condition()
+_queue_pending: set = set()       # db paths with newly queued messages
+_version_watch: dict = {}         # db path -> [watch connection, data_version]
+_version_watch_lock = threading.Lock()
+
+
+def notify_queued(db_path: Optional[Path] = None) -> None:
+    """Wake threads waiting in wait_for_queued() for this database."""
+    key = str(db_path or DB_PATH)
+    with _queue_cond:
+        _queue_pending.add(key)
+        _queue_cond.notify_all()
+
+
+def _external_commit_seen(key: str) -> bool:
+    """Return True if another connection committed since the last check."""
+    with _version_watch_lock:
+        watch = _version_watch.get(key)
+        try:
+            if watch is None:
+                conn = sqlite3.connect(key, timeout=10, check_same_thread=False)
+                version = conn.execute("PRAGMA data_version").fetchone()[0]
+                _version_watch[key] = [conn, version]
+                return False
+            version = watch[0].execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            _version_watch.pop(key, None)
+            return False
+        if version != watch[1]:
+            watch[1] = version
+            return True
+        return False
+
+
+def wait_for_queued(db_path: Optional[Path] = None,
+                    timeout: Optional[float] = None,
+                    check_interval: float = 0.5) -> bool:
+    """Block until a message may have been queued, or until timeout.
+
+    Returns True when woken by notify_queued() or by a commit from another
+    connection/process, False on timeout. In-process senders wake the waiter
+    immediately; external commits are noticed within check_interval seconds.
+    """
+    key = str(db_path or DB_PATH)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = check_interval
+        if deadline is not None:
+            wait = min(wait, max(0.0, deadline - time.monotonic()))
+        with _queue_cond:
+            if key not in _queue_pending:
+                _queue_cond.wait(wait)
+            if key in _queue_pending:
+                _queue_pending.discard(key)
+                return True
+        if _external_commit_seen(key):
+            return True
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+
+
+# ---------------------------------------------------------------------------
+# Full-text search
+# ---------------------------------------------------------------------------
+
+# External-content FTS5 indexes over agent_memory and knowledge_store, kept
+# in sync by triggers. The trigram tokenizer matches any substring of 3+
+# characters, so search results are the same as the old LIKE '%q%' scans
+# but come from the index and can be ranked with bm25().
+_FTS_TABLES = {
+    "agent_memory_fts": ("agent_memory", ("content",)),
+    "knowledge_fts": ("knowledge_store", ("subject", "content", "tags")),
+}
+FTS_MIN_QUERY = 3   # trigram needs 3 chars; shorter queries fall back to LIKE
+_fts_enabled: dict = {}   # db path -> bool
+
+
+def _init_fts(cur) -> None:
+    """Create FTS5 indexes and their sync triggers, back-filling new ones."""
+    for fts, (table, columns) in _FTS_TABLES.items():
+        exists = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts,)
+        ).fetchone()
+        if not exists:
+            try:
+                cur.execute(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                    f"{', '.join(columns)}, content='{table}', content_rowid='id', "
+                    "tokenize='trigram')"
+                )
+            except sqlite3.OperationalError:
+                return  # SQLite built without FTS5/trigram — searches use LIKE
+            cur.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        cols = ", ".join(columns)
+        new_vals = ", ".join(f"new.{c}" for c in columns)
+        old_vals = ", ".join(f"old.{c}" for c in columns)
+        cur.executescript(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals});
+            END;
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {cols})
+                VALUES ('delete', old.id, {old_vals});
+            END;
+            CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {cols})
+                VALUES ('delete', old.id, {old_vals});
+                INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals});
+            END;
+        """)
+
+
+def _fts_ready(conn, db_path: Optional[Path] = None) -> bool:
+    """True if the FTS indexes exist in this database (cached per path)."""
+    key = str(db_path or DB_PATH)
+    ready = _fts_enabled.get(key)
+    if ready is None:
+        ready = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name IN (?, ?)",
+            tuple(_FTS_TABLES),
+        ).fetchone()[0] == len(_FTS_TABLES)
+        _fts_enabled[key] = ready
+    return ready
+
+
+def _fts_phrase(query: str) -> str:
+    """Quote a raw query as a single FTS5 phrase (substring match)."""
+    return '"' + query.replace('"', '""') + '"'
+
+
+# ---------------------------------------------------------------------------
+# Data versions (cache invalidation)
+# ---------------------------------------------------------------------------
+
+# Counters in data_versions are bumped by triggers on the tables behind
+# in-process caches (agent system prompt sections, the agent directory), so
+# every writer — bus functions, raw SQL, other processes — invalidates them.
+# Per-agent domains are "skills:<id>" and "memories:<id>"; per-conversation
+# "chat:<conversation_key>" moves when a message body is rewritten or a
+# message is deleted (inserts are picked up by id). The 'epoch' row
+# is random per database file, so a recreated DB never matches versions
+# cached for the old one.
+_AGENT_VERSION_COLUMNS = ("name, title, agent_type, role, parent_agent_id, active, "
+                          "status, description, soul, thinking_level")
+_MEMORY_VERSION_COLUMNS = "agent_id, memory_type, content, importance, active, expires_at"
+
+
+# Unordered agent pair, e.g. "3:7" for messages either way between 3 and 7
+_CONVERSATION_KEY_SQL = ("min(new.from_agent_id, new.to_agent_id) || ':' || "
+                         "max(new.from_agent_id, new.to_agent_id)")
+
+
+def conversation_key(agent_a: int, agent_b: int) -> str:
+    """Key shared by all messages between two agents, in either direction."""
+    return f"{min(agent_a, agent_b)}:{max(agent_a, agent_b)}"
+
+
+def _bump_sql(domain: str) -> str:
+    return (f"INSERT INTO data_versions (domain, version) VALUES ({domain}, 1) "
+            "ON CONFLICT(domain) DO UPDATE SET version = version + 1;")
+
+
+def _init_data_versions(cur) -> None:
+    """Create data_versions and (re)create the triggers that keep it current.
+
+    The triggers are dropped and recreated on every init so a changed
+    column list reaches existing databases.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            domain  TEXT    PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO data_versions (domain, version) "
+                "VALUES ('epoch', abs(random()))")
+    whole_table = {
+        "agents": ("agents", f"UPDATE OF {_AGENT_VERSION_COLUMNS}"),
+        "team_links": ("agents", "UPDATE"),
+        "crew_config": ("config", "UPDATE"),
+        "human_profile": ("profile", "UPDATE"),
+        "knowledge_store": ("knowledge", "UPDATE"),
+    }
+    for table, (domain, update) in whole_table.items():
+        bump = _bump_sql(f"'{domain}'")
+        cur.executescript(f"""
+            DROP TRIGGER IF EXISTS dv_{table}_ai;
+            CREATE TRIGGER dv_{table}_ai AFTER INSERT ON {table}
+            BEGIN {bump} END;
+            DROP TRIGGER IF EXISTS dv_{table}_ad;
+            CREATE TRIGGER dv_{table}_ad AFTER DELETE ON {table}
+            BEGIN {bump} END;
+            DROP TRIGGER IF EXISTS dv_{table}_au;
+            CREATE TRIGGER dv_{table}_au AFTER {update} ON {table}
+            BEGIN {bump} END;
+        """)
+    per_agent = {
+        "agent_skills": ("skills", "UPDATE"),
+        "agent_memory": ("memories", f"UPDATE OF {_MEMORY_VERSION_COLUMNS}"),
+    }
+    for table, (prefix, update) in per_agent.items():
+        cur.executescript(f"""
+            DROP TRIGGER IF EXISTS dv_{table}_ai;
+            CREATE TRIGGER dv_{table}_ai AFTER INSERT ON {table}
+            BEGIN {_bump_sql(f"'{prefix}:' || new.agent_id")} END;
+            DROP TRIGGER IF EXISTS dv_{table}_ad;
+            CREATE TRIGGER dv_{table}_ad AFTER DELETE ON {table}
+            BEGIN {_bump_sql(f"'{prefix}:' || old.agent_id")} END;
+            DROP TRIGGER IF EXISTS dv_{table}_au;
+            CREATE TRIGGER dv_{table}_au AFTER {update} ON {table}
+            BEGIN
+                {_bump_sql(f"'{prefix}:' || old.agent_id")}
+                {_bump_sql(f"'{prefix}:' || new.agent_id")}
+            END;
+        """)
+    # Inserts that don't set conversation_key (raw SQL, older callers)
+    # get it filled in here.
+    cur.executescript(f"""
+        DROP TRIGGER IF EXISTS messages_conversation_key_ai;
+        CREATE TRIGGER messages_conversation_key_ai AFTER INSERT ON messages
+        WHEN new.conversation_key IS NULL
+        BEGIN
+            UPDATE messages SET conversation_key = {_CONVERSATION_KEY_SQL}
+            WHERE id = new.id;
+        END;
+        DROP TRIGGER IF EXISTS dv_messages_ad;
+        CREATE TRIGGER dv_messages_ad AFTER DELETE ON messages
+        BEGIN {_bump_sql("'chat:' || old.conversation_key")} END;
+        DROP TRIGGER IF EXISTS dv_messages_au;
+        CREATE TRIGGER dv_messages_au AFTER UPDATE OF body ON messages
+        WHEN old.body IS NOT new.body
+        BEGIN {_bump_sql("'chat:' || new.conversation_key")} END;
+    """)
+
+
+def get_data_versions(domains, db_path: Optional[Path] = None) -> dict:
+    """Return {domain: version} for the given domains plus 'epoch'.
+
+    Domains that have never changed report 0. Returns {} if the database
+    predates the data_versions table (callers should treat that as
+    "always stale").
+    """
+    keys = ["epoch"] + list(domains)
+    conn = get_conn(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT domain, version FROM data_versions "
+            f"WHERE domain IN ({','.join('?' * len(keys))})",
+            keys,
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+    versions = dict.fromkeys(keys, 0)
+    versions.update((r["domain"], r["version"]) for r in rows)
+    return versions
+
+
+# ---------------------------------------------------------------------------
+# Agent activity counters (Guardian scans)
+# ---------------------------------------------------------------------------
+
+# SecurityAgent scans count each agent's recent messages and audit events.
+# Instead of windowed queries over the full messages and audit_log tables
+# per agent, agent_activity keeps those counts per agent per hour, bumped by
+# triggers on both tables (so bus functions, raw SQL and other processes are
+# all counted). Kinds:
+#   messages:  "sent", "type:<message_type>", "to_human" (recipient is human)
+#   audit_log: "violation" (event_type contains blocked/violation),
+#              "denied" (denied/permission), "human_attempt" (a violation
+#              whose details mention a human agent's id)
+# get_agent_activity() sums the whole hours of a window from the counters
+# and counts its partial first hour from the raw tables, so the result is
+# the same as counting the raw rows.
+ACTIVITY_RETENTION_DAYS = 8
+
+_AUDIT_VIOLATION_SQL = "({r}.event_type LIKE '%blocked%' OR {r}.event_type LIKE '%violation%')"
+_ACTIVITY_SOURCES = {
+    # table: (agent column, timestamp column, ((kind, condition), ...))
+    "messages": ("from_agent_id", "created_at", (
+        ("'sent'", "1"),
+        ("'type:' || {r}.message_type", "1"),
+        ("'to_human'", "{r}.to_agent_id IN "
+                       "(SELECT id FROM agents WHERE agent_type = 'human')"),
+    )),
+    "audit_log": ("agent_id", "timestamp", (
+        ("'violation'", _AUDIT_VIOLATION_SQL),
+        ("'denied'", "({r}.event_type LIKE '%denied%' OR {r}.event_type LIKE '%permission%')"),
+        ("'human_attempt'", _AUDIT_VIOLATION_SQL + " AND EXISTS (SELECT 1 FROM agents h "
+                            "WHERE h.agent_type = 'human' AND instr({r}.details, h.id) > 0)"),
+    )),
+}
+
+
+def _activity_bucket_sql(row: str, ts_col: str) -> str:
+    # Hour bucket, e.g. "2025-06-01T14"; tolerates "YYYY-MM-DD HH:MM:SS" too
+    return f"replace(substr({row}.{ts_col}, 1, 13), ' ', 'T')"
+
+
+def _activity_kinds_sql(table: str, row: str) -> str:
+    """One-column SELECT of the activity kinds a single ``row`` counts towards."""
+    kinds = _ACTIVITY_SOURCES[table][2]
+    return " UNION ALL ".join(f"SELECT {kind} AS kind WHERE {cond}"
+                              for kind, cond in kinds).replace("{r}", row)
+
+
+def _activity_rows_sql(where: str, agent_ids=None) -> str:
+    """(bucket, agent_id, kind, n) counted from the raw tables.
+
+    ``where`` filters on the timestamp column, written as ``{ts}``.
+    """
+    parts = []
+    for table, (agent_col, ts_col, kinds) in _ACTIVITY_SOURCES.items():
+        conds = [f"t.{agent_col} IS NOT NULL", where.replace("{ts}", f"t.{ts_col}")]
+        if agent_ids is not None:
+            conds.append(f"t.{agent_col} IN ({','.join(str(int(a)) for a in agent_ids)})")
+        for kind, cond in kinds:
+            parts.append(
+                f"SELECT {_activity_bucket_sql('t', ts_col)} AS bucket, "
+                f"t.{agent_col} AS agent_id, {kind} AS kind, COUNT(*) AS n "
+                f"FROM {table} t WHERE {' AND '.join(conds + [cond])} GROUP BY 1, 2, 3"
+            )
+    return " UNION ALL ".join(parts).replace("{r}", "t")
+
+
+def _init_agent_activity(cur) -> None:
+    """Create agent_activity and its triggers, back-filling a new table.
+
+    Like the data_versions triggers, these are recreated on every init.
+    """
+    exists = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='agent_activity'"
+    ).fetchone()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS agent_activity (
+            bucket      TEXT    NOT NULL,
+            agent_id    INTEGER NOT NULL,
+            kind        TEXT    NOT NULL,
+            count       INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, agent_id, kind)
+        ) WITHOUT ROWID
+    """)
+    if not exists:
+        horizon = datetime.now(timezone.utc) - timedelta(days=ACTIVITY_RETENTION_DAYS)
+        cur.execute(
+            "INSERT INTO agent_activity (bucket, agent_id, kind, count) "
+            + _activity_rows_sql("{ts} >= :start"),
+            {"start": horizon.strftime("%Y-%m-%dT%H:00:00Z")},
+        )
+    for table, (agent_col, ts_col, _) in _ACTIVITY_SOURCES.items():
+        cur.executescript(f"""
+            DROP TRIGGER IF EXISTS activity_{table}_ai;
+            CREATE TRIGGER activity_{table}_ai AFTER INSERT ON {table}
+            WHEN new.{agent_col} IS NOT NULL
+            BEGIN
+                INSERT INTO agent_activity (bucket, agent_id, kind, count)
+                SELECT {_activity_bucket_sql('new', ts_col)}, new.{agent_col}, kind, 1
+                FROM ({_activity_kinds_sql(table, 'new')}) WHERE 1
+                ON CONFLICT(bucket, agent_id, kind) DO UPDATE SET count = count + 1;
+            END;
+            DROP TRIGGER IF EXISTS activity_{table}_ad;
+            CREATE TRIGGER activity_{table}_ad AFTER DELETE ON {table}
+            WHEN old.{agent_col} IS NOT NULL
+            BEGIN
+                UPDATE agent_activity SET count = count - 1
+                WHERE bucket = {_activity_bucket_sql('old', ts_col)}
+                  AND agent_id = old.{agent_col}
+                  AND kind IN ({_activity_kinds_sql(table, 'old')});
+            END;
+        """)
+
+
+def get_agent_activity(since: str, agent_ids=None,
+                       db_path: Optional[Path] = None) -> dict:
+    """Activity counts per agent from ``since`` (ISO timestamp) onwards.
+
+    Returns {agent_id: {kind: count}} (kinds as described above); agents
+    with nothing in the window are absent. ``agent_ids`` limits the result
+    to those agents. Windows reaching past ACTIVITY_RETENTION_DAYS are
+    counted from the raw tables.
+    """
+    db = db_path or DB_PATH
+    flush_accounting(db)  # deferred audit entries
+    now = datetime.now(timezone.utc)
+    first = datetime.strptime(since[:13].replace(" ", "T"), "%Y-%m-%dT%H").replace(
+        tzinfo=timezone.utc)
+    params = {"start": since}
+    if first < now - timedelta(days=ACTIVITY_RETENTION_DAYS):
+        query = f"SELECT agent_id, kind, n FROM ({_activity_rows_sql('{ts} >= :start', agent_ids)})"
+    else:
+        only = ("" if agent_ids is None else
+                f" AND agent_id IN ({','.join(str(int(a)) for a in agent_ids)})")
+        edge = _activity_rows_sql("{ts} >= :start AND {ts} < :edge_end", agent_ids)
+        query = (f"SELECT agent_id, kind, count AS n FROM agent_activity "
+                 f"WHERE bucket > :bucket{only} "
+                 f"UNION ALL SELECT agent_id, kind, n FROM ({edge})")
+        params["bucket"] = first.strftime("%Y-%m-%dT%H")
+        params["edge_end"] = (first + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    conn = get_conn(db)
+    try:
+        rows = conn.execute(
+            f"SELECT agent_id, kind, SUM(n) AS n FROM ({query}) GROUP BY 1, 2", params
+        ).fetchall()
     finally:
         conn.close()
-        _db_write_lock.release()
+    activity: dict = {}
+    for r in rows:
+        if r["n"] > 0:
+            activity.setdefault(r["agent_id"], {})[r["kind"]] = r["n"]
+    return activity
+
+
+def prune_agent_activity(db_path: Optional[Path] = None) -> int:
+    """Drop activity counters older than ACTIVITY_RETENTION_DAYS. Returns rows deleted."""
+    cutoff = (datetime.now(timezone.utc)
+              - timedelta(days=ACTIVITY_RETENTION_DAYS)).strftime("%Y-%m-%dT%H")
+    with db_write(db_path or DB_PATH) as conn:
+        cur = conn.execute(
+            "DELETE FROM agent_activity WHERE bucket < ? OR count <= 0", (cutoff,))
+        return cur.rowcount
 
 
 def init_db(db_path: Optional[Path] = None) -> None:
@@ -245,6 +1121,19 @@ def init_db(db_path: Optional[Path] = None) -> None:
 
     Safe to call multiple times - uses IF NOT EXISTS for all objects.
     """
+    # The file may have been recreated — drop a writer still bound to the
+    # old one before touching the new one, and re-read its durability profile
+    with _writers_lock:
+        writer = _writers.get(str(db_path or DB_PATH))
+    if writer is not None:
+        writer.release_if_stale()
+    _db_profiles.pop(str(db_path or DB_PATH), None)
+    _profile_versions.pop(str(db_path or DB_PATH), None)
+    _fts_enabled.pop(str(db_path or DB_PATH), None)
+    _invalidate_agent_directory(db_path)
+    _invalidate_conversation_windows(db_path)
+    # Deferred counts may refer to rows of a since-recreated file
+    _accounting.discard(str(db_path or DB_PATH))
     conn = get_conn(db_path)
     cur = conn.cursor()
 
@@ -295,7 +1184,11 @@ def init_db(db_path: Optional[Path] = None) -> None:
             created_at      TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ','now')),
             delivered_at    TEXT,
             read_at         TEXT,
-            attachment      TEXT    DEFAULT NULL
+            attachment      TEXT    DEFAULT NULL,
+            claimed_by      TEXT    DEFAULT NULL,
+            lease_expires_at TEXT   DEFAULT NULL,
+            claim_attempts  INTEGER NOT NULL DEFAULT 0,
+            conversation_key TEXT   DEFAULT NULL
         );
 
         CREATE TABLE IF NOT EXISTS routing_rules (
@@ -718,6 +1611,8 @@ def init_db(db_path: Optional[Path] = None) -> None:
         CREATE INDEX IF NOT EXISTS idx_messages_to      ON messages(to_agent_id, status);
         CREATE INDEX IF NOT EXISTS idx_messages_from    ON messages(from_agent_id, created_at);
         CREATE INDEX IF NOT EXISTS idx_audit_agent      ON audit_log(agent_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_audit_agent_id   ON audit_log(agent_id, id);
+        CREATE INDEX IF NOT EXISTS idx_messages_to_id   ON messages(to_agent_id, id);
         CREATE INDEX IF NOT EXISTS idx_timing_agent     ON timing_rules(agent_id, rule_type);
         CREATE INDEX IF NOT EXISTS idx_decision_human   ON decision_log(human_id, created_at);
         CREATE INDEX IF NOT EXISTS idx_decision_rh      ON decision_log(right_hand_id, created_at);
@@ -906,6 +1801,59 @@ def init_db(db_path: Optional[Path] = None) -> None:
     """)
     cur.execute("CREATE INDEX IF NOT EXISTS idx_telemetry_trace ON telemetry(trace_id)")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_telemetry_time ON telemetry(created_at)")
+    # Per-minute rollups with mergeable latency histograms (see _hist_bin).
+    # agent_id is 0 for spans not tied to an agent so the key stays unique.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS telemetry_rollup (
+            bucket      TEXT    NOT NULL,
+            span_name   TEXT    NOT NULL,
+            agent_id    INTEGER NOT NULL DEFAULT 0,
+            call_count  INTEGER NOT NULL DEFAULT 0,
+            error_count INTEGER NOT NULL DEFAULT 0,
+            timed_count INTEGER NOT NULL DEFAULT 0,
+            sum_ms      INTEGER NOT NULL DEFAULT 0,
+            min_ms      INTEGER,
+            max_ms      INTEGER,
+            hist        TEXT    NOT NULL DEFAULT '{}',
+            PRIMARY KEY (bucket, span_name, agent_id)
+        )
+    """)
+    # Migrate: back-fill rollups from raw spans recorded before they existed
+    if (cur.execute("SELECT 1 FROM telemetry_rollup LIMIT 1").fetchone() is None
+            and cur.execute("SELECT 1 FROM telemetry LIMIT 1").fetchone() is not None):
+        rows = cur.execute(
+            "SELECT span_name, agent_id, duration_ms, status, created_at FROM telemetry"
+        ).fetchall()
+        _apply_rollups(cur, [(r[0], r[1], r[2], r[3], r[4]) for r in rows])
+
+    # ========= LLM response cache (opt-in; see llm_cache_get) =========
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key         TEXT    PRIMARY KEY,
+            provider    TEXT    NOT NULL DEFAULT '',
+            model       TEXT    NOT NULL DEFAULT '',
+            response    TEXT    NOT NULL,
+            bytes       INTEGER NOT NULL,
+            created_at  REAL    NOT NULL,
+            expires_at  REAL    NOT NULL
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache(expires_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache(created_at)")
+
+    # ========= Skill scan verdicts (see scan_skill_cached) =========
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS skill_scan_cache (
+            content_hash TEXT NOT NULL,
+            ruleset      TEXT NOT NULL,
+            result       TEXT NOT NULL,
+            created_at   REAL NOT NULL,
+            PRIMARY KEY (content_hash, ruleset)
+        ) WITHOUT ROWID
+    """)
+
+    # ========= Full-text search (agent_memory, knowledge_store) =========
+    _init_fts(cur)
 
     # ========= Gateway Auth & Device Pairing =========
     cur.execute("""
@@ -965,6 +1913,39 @@ def init_db(db_path: Optional[Path] = None) -> None:
     if "attachment" not in msg_cols:
         cur.execute("ALTER TABLE messages ADD COLUMN attachment TEXT DEFAULT NULL")
 
+    # Migrate: lease columns for multi-process message claiming
+    if "claimed_by" not in msg_cols:
+        cur.execute("ALTER TABLE messages ADD COLUMN claimed_by TEXT DEFAULT NULL")
+        cur.execute("ALTER TABLE messages ADD COLUMN lease_expires_at TEXT DEFAULT NULL")
+        cur.execute("ALTER TABLE messages ADD COLUMN claim_attempts INTEGER NOT NULL DEFAULT 0")
+    cur.execute("""CREATE INDEX IF NOT EXISTS idx_messages_claim
+        ON messages(status, lease_expires_at)""")
+
+    # Migrate: conversation_key (unordered agent pair) for chat history reads
+    if "conversation_key" not in msg_cols:
+        cur.execute("ALTER TABLE messages ADD COLUMN conversation_key TEXT DEFAULT NULL")
+        cur.execute(
+            "UPDATE messages SET conversation_key = "
+            + _CONVERSATION_KEY_SQL.replace("new.", ""))
+    cur.execute("""CREATE INDEX IF NOT EXISTS idx_messages_conversation
+        ON messages(conversation_key, id)""")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS worker_stats (
+            worker_id   TEXT    PRIMARY KEY,
+            claimed     INTEGER NOT NULL DEFAULT 0,
+            completed   INTEGER NOT NULL DEFAULT 0,
+            expired     INTEGER NOT NULL DEFAULT 0,
+            first_seen  TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ','now')),
+            last_seen   TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ','now'))
+        )
+    """)
+
+    # ========= Data versions (after all agents migrations) =========
+    _init_data_versions(cur)
+
+    # ========= Guardian activity counters (see get_agent_activity) =========
+    _init_agent_activity(cur)
+
     # Seed default routing rules (skip if already populated)
     existing = cur.execute("SELECT COUNT(*) FROM routing_rules").fetchone()[0]
     if existing == 0:
@@ -1035,6 +2016,173 @@ def _audit(conn: sqlite3.Connection, event_type: str,
     )
 
 
+# ---------------------------------------------------------------------------
+# Deferred accounting — keeps read paths free of writes
+# ---------------------------------------------------------------------------
+# Bookkeeping that read paths used to write inline — the inbox_read audit
+# row, memory access_count/last_accessed bumps — is accumulated here and
+# written in one db_write per database by a background flusher. Memory hits
+# are aggregated per memory id, so the buffer grows with distinct memories,
+# not with reads. Audit events are capped at ACCOUNTING_BUFFER_SIZE; beyond
+# that they are dropped and counted. Readers of the audit log call
+# flush_accounting() first. Flush lag (age of the oldest pending entry when
+# it was written) is reported by get_accounting_stats().
+
+ACCOUNTING_FLUSH_INTERVAL = 2.0   # seconds between background flushes
+ACCOUNTING_BUFFER_SIZE = 10000    # max deferred audit events held in memory
+
+_AUDIT_INSERT = ("INSERT INTO audit_log (event_type, agent_id, details, timestamp) "
+                 "VALUES (?, ?, ?, ?)")
+
+
+class _DeferredAccounting:
+    """Per-database memory hit counters and audit events, flushed in bulk."""
+
+    def __init__(self):
+        self._pending: dict = {}   # db key -> {"hits": {id: [n, ts]}, "audits": [...], "since": t}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"memory_hits": 0, "audits": 0, "dropped": 0, "flushes": 0,
+                      "last_lag_ms": 0, "max_lag_ms": 0}
+
+    def _bucket(self, key: str) -> dict:
+        bucket = self._pending.get(key)
+        if bucket is None:
+            bucket = self._pending[key] = {"hits": {}, "audits": [],
+                                           "since": time.monotonic()}
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name="accounting-flusher")
+                self._thread.start()
+            if len(self._pending) == 1:
+                self._cond.notify()  # wake the idle flusher
+        return bucket
+
+    def add_hits(self, key: str, memory_ids, now: str) -> None:
+        with self._cond:
+            hits = self._bucket(key)["hits"]
+            for mid in memory_ids:
+                entry = hits.get(mid)
+                if entry is None:
+                    hits[mid] = [1, now]
+                else:
+                    entry[0] += 1
+                    entry[1] = now
+            self.stats["memory_hits"] += len(memory_ids)
+
+    def add_audit(self, key: str, row: tuple) -> None:
+        with self._cond:
+            if sum(len(b["audits"]) for b in self._pending.values()) >= ACCOUNTING_BUFFER_SIZE:
+                self.stats["dropped"] += 1
+                return
+            self._bucket(key)["audits"].append(row)
+            self.stats["audits"] += 1
+
+    def discard(self, key: str) -> None:
+        with self._cond:
+            self._pending.pop(key, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()  # idle: sleep until something is recorded
+                self._cond.wait(ACCOUNTING_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                pass  # accounting must never take the process down
+
+    def flush(self, key: Optional[str] = None) -> int:
+        """Write pending entries (all DBs, or just ``key``). Returns rows written."""
+        with self._flush_lock:
+            with self._cond:
+                if key is None:
+                    taken, self._pending = self._pending, {}
+                else:
+                    bucket = self._pending.pop(key, None)
+                    taken = {key: bucket} if bucket else {}
+            if not taken:
+                return 0
+            written = 0
+            oldest = min(b["since"] for b in taken.values())
+            for db_key, bucket in taken.items():
+                written += self._write(db_key, bucket)
+            lag_ms = int((time.monotonic() - oldest) * 1000)
+            with self._cond:
+                self.stats["flushes"] += 1
+                self.stats["last_lag_ms"] = lag_ms
+                self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag_ms)
+            return written
+
+    @staticmethod
+    def _write(db_key: str, bucket: dict) -> int:
+        if not os.path.exists(db_key):
+            return 0  # DB deleted since the reads — never recreate it empty
+        hits = [(n, ts, mid) for mid, (n, ts) in bucket["hits"].items()]
+        audits = bucket["audits"]
+        try:
+            with db_write(Path(db_key)) as conn:
+                if hits:
+                    conn.executemany(
+                        "UPDATE agent_memory SET access_count = access_count + ?, "
+                        "last_accessed = ? WHERE id = ?", hits)
+                if audits:
+                    conn.executemany(_AUDIT_INSERT, audits)
+            return len(hits) + len(audits)
+        except sqlite3.IntegrityError:
+            pass  # e.g. an audit row for a since-deleted agent — retry one by one
+        except sqlite3.Error:
+            return 0
+        written = 0
+        for sql, rows in (("UPDATE agent_memory SET access_count = access_count + ?, "
+                           "last_accessed = ? WHERE id = ?", hits),
+                          (_AUDIT_INSERT, audits)):
+            for row in rows:
+                try:
+                    with db_write(Path(db_key)) as conn:
+                        conn.execute(sql, row)
+                    written += 1
+                except sqlite3.Error:
+                    pass
+        return written
+
+
+_accounting = _DeferredAccounting()
+
+
+def _audit_deferred(event_type: str, agent_id: Optional[int], details: dict,
+                    db_path: Optional[Path] = None) -> None:
+    """Queue an audit entry for the accounting flusher (read paths only)."""
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    _accounting.add_audit(str(db_path or DB_PATH),
+                          (event_type, agent_id, json.dumps(details), now))
+
+
+def flush_accounting(db_path: Optional[Path] = None) -> int:
+    """Write deferred audit events and memory access counts now.
+
+    With no db_path, flushes every database. Returns rows written.
+    """
+    return _accounting.flush(str(db_path) if db_path else None)
+
+
+def get_accounting_stats() -> dict:
+    """Deferred-accounting counters: memory_hits, audits, dropped, flushes,
+    last_lag_ms / max_lag_ms (flush lag), pending entries and pending_age_ms
+    (current lag of the oldest unflushed entry)."""
+    with _accounting._cond:
+        pending = sum(len(b["hits"]) + len(b["audits"])
+                      for b in _accounting._pending.values())
+        since = [b["since"] for b in _accounting._pending.values()]
+        age = int((time.monotonic() - min(since)) * 1000) if since else 0
+        return {**_accounting.stats, "pending": pending, "pending_age_ms": age}
+
+
+atexit.register(flush_accounting)
+
+
 # ---------------------------------------------------------------------------
 # Hierarchy loading (v2 - nested YAML format)
 # ---------------------------------------------------------------------------
@@ -1050,6 +2198,14 @@ def load_hierarchy(config_path: str, db_path: Optional[Path] = None) -> dict:
     with open(config_path, "r", encoding="utf-8") as f:
         config = yaml.safe_load(f)
 
+    try:
+        return _load_hierarchy_config(config, config_path, db_path)
+    finally:
+        _invalidate_agent_directory(db_path)
+
+
+def _load_hierarchy_config(config: dict, config_path: str,
+                           db_path: Optional[Path] = None) -> dict:
     # Detect config format
     if "hierarchy" in config:
         return _load_v2_hierarchy(config, config_path, db_path)
@@ -1444,6 +2600,7 @@ def create_agent(name: str, agent_type: str = "worker",
     try:
         with db_write(db) as wconn:
             agent_id = _upsert_agent(wconn, agent_def)
+        _invalidate_agent_directory(db)
         return {"ok": True, "agent_id": agent_id, "name": name}
     except Exception as e:
         return {"ok": False, "error": str(e)}
@@ -1593,6 +2750,7 @@ def delete_team(manager_id: int, db_path: Optional[Path] = None) -> dict:
 
         conn.commit()
         conn.execute("PRAGMA foreign_keys = ON")
+        _invalidate_agent_directory(db)
         return {"ok": True, "deleted_count": len(all_ids)}
     except Exception as e:
         conn.execute("PRAGMA foreign_keys = ON")
@@ -1647,21 +2805,221 @@ def unlink_teams(team_a_id: int, team_b_id: int,
 # Telemetry (lightweight observability)
 # ---------------------------------------------------------------------------
 
+# Latency histograms are HDR-style: values below 32ms get exact bins, larger
+# values get 16 log-linear sub-bins per power of two (<= ~6% relative
+# error). Histograms are {bin: count} dicts, so merging two is just adding
+# counts — per-minute rollups combine into any time window in O(buckets).
+
+def _hist_bin(ms: int) -> int:
+    ms = max(0, int(ms))
+    if ms < 32:
+        return ms
+    exp = ms.bit_length() - 1
+    shift = exp - 4
+    return 32 + (exp - 5) * 16 + ((ms >> shift) - 16)
+
+
+def _hist_value(bin_idx: int) -> int:
+    """Representative (midpoint) value for a histogram bin."""
+    if bin_idx < 32:
+        return bin_idx
+    k = bin_idx - 32
+    shift = k // 16 + 1
+    lower = (16 + k % 16) << shift
+    return lower + (1 << shift) // 2
+
+
+def _hist_quantile(hist: dict, total: int, q: float) -> int:
+    """Value at quantile q, using the same rank rule as a sorted list."""
+    if not total:
+        return 0
+    rank = min(int(total * q), total - 1)
+    seen = 0
+    for bin_idx in sorted(hist):
+        seen += hist[bin_idx]
+        if seen > rank:
+            return _hist_value(bin_idx)
+    return _hist_value(max(hist))
+
+
+def _apply_rollups(conn, spans: list) -> None:
+    """Fold spans into telemetry_rollup.
+
+    ``spans`` holds (span_name, agent_id, duration_ms, status, created_at).
+    Must run inside the caller's write transaction.
+    """
+    deltas: dict = {}
+    for span_name, agent_id, duration_ms, status, created_at in spans:
+        key = ((created_at or "")[:16], span_name, agent_id or 0)
+        d = deltas.get(key)
+        if d is None:
+            d = deltas[key] = {"calls": 0, "errors": 0, "timed": 0, "sum": 0,
+                               "min": None, "max": None, "hist": {}}
+        d["calls"] += 1
+        if status == "error":
+            d["errors"] += 1
+        if duration_ms is not None:
+            ms = int(duration_ms)
+            d["timed"] += 1
+            d["sum"] += ms
+            d["min"] = ms if d["min"] is None else min(d["min"], ms)
+            d["max"] = ms if d["max"] is None else max(d["max"], ms)
+            b = _hist_bin(ms)
+            d["hist"][b] = d["hist"].get(b, 0) + 1
+    for (bucket, span_name, agent_id), d in deltas.items():
+        row = conn.execute(
+            "SELECT hist, min_ms, max_ms FROM telemetry_rollup "
+            "WHERE bucket=? AND span_name=? AND agent_id=?",
+            (bucket, span_name, agent_id),
+        ).fetchone()
+        hist = d["hist"]
+        lo, hi = d["min"], d["max"]
+        if row is not None:
+            for b, c in json.loads(row[0]).items():
+                hist[int(b)] = hist.get(int(b), 0) + c
+            lo = row[1] if lo is None else (lo if row[1] is None else min(lo, row[1]))
+            hi = row[2] if hi is None else (hi if row[2] is None else max(hi, row[2]))
+        conn.execute(
+            "INSERT INTO telemetry_rollup (bucket, span_name, agent_id, call_count, "
+            "error_count, timed_count, sum_ms, min_ms, max_ms, hist) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(bucket, span_name, agent_id) DO UPDATE SET "
+            "call_count = call_count + excluded.call_count, "
+            "error_count = error_count + excluded.error_count, "
+            "timed_count = timed_count + excluded.timed_count, "
+            "sum_ms = sum_ms + excluded.sum_ms, "
+            "min_ms = excluded.min_ms, max_ms = excluded.max_ms, hist = excluded.hist",
+            (bucket, span_name, agent_id, d["calls"], d["errors"], d["timed"],
+             d["sum"], lo, hi, json.dumps(hist)),
+        )
+
+
+# Spans are buffered in memory and written in batches by a background
+# flusher instead of one db_write (and fsync) per span. The buffer is
+# bounded — when it is full new spans are dropped and counted, so a stuck
+# disk can never turn telemetry into unbounded memory growth. Readers call
+# flush_telemetry() first so queries always see everything recorded so far.
+
+TELEMETRY_BUFFER_SIZE = 10000   # max spans held in memory
+TELEMETRY_FLUSH_INTERVAL = 1.0  # seconds between background flushes
+TELEMETRY_FLUSH_BATCH = 500     # flush early once this many are buffered
+
+_TELEMETRY_INSERT = (
+    "INSERT INTO telemetry (trace_id, span_name, agent_id, duration_ms, "
+    "status, metadata, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class _SpanSink:
+    """Bounded in-memory span buffer drained by a background thread."""
+
+    def __init__(self):
+        self._buf: list = []                 # (db key, row tuple)
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one flush at a time
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"recorded": 0, "flushed": 0, "dropped": 0, "flushes": 0}
+
+    def add(self, key: str, row: tuple) -> None:
+        with self._cond:
+            if len(self._buf) >= TELEMETRY_BUFFER_SIZE:
+                self.stats["dropped"] += 1
+                return
+            self._buf.append((key, row))
+            self.stats["recorded"] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name="telemetry-flusher")
+                self._thread.start()
+            if len(self._buf) in (1, TELEMETRY_FLUSH_BATCH):
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buf:
+                    self._cond.wait()  # idle: sleep until the first span
+                if len(self._buf) < TELEMETRY_FLUSH_BATCH:
+                    self._cond.wait(TELEMETRY_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                pass  # telemetry must never take the process down
+
+    def flush(self, key: Optional[str] = None) -> int:
+        """Write buffered spans (all DBs, or just ``key``). Returns count."""
+        with self._flush_lock:
+            with self._cond:
+                if key is None:
+                    taken, self._buf = self._buf, []
+                else:
+                    taken = [item for item in self._buf if item[0] == key]
+                    self._buf = [item for item in self._buf if item[0] != key]
+            if not taken:
+                return 0
+            by_db: dict = {}
+            for db_key, row in taken:
+                by_db.setdefault(db_key, []).append(row)
+            written = 0
+            for db_key, rows in by_db.items():
+                written += self._write(db_key, rows)
+            with self._cond:
+                self.stats["flushed"] += written
+                self.stats["dropped"] += len(taken) - written
+                self.stats["flushes"] += 1
+            return written
+
+    @staticmethod
+    def _write(db_key: str, rows: list) -> int:
+        # row = (trace_id, span_name, agent_id, duration_ms, status, meta, created)
+        try:
+            with db_write(Path(db_key)) as conn:
+                conn.executemany(_TELEMETRY_INSERT, rows)
+                _apply_rollups(conn, [(r[1], r[2], r[3], r[4], r[6]) for r in rows])
+            return len(rows)
+        except sqlite3.IntegrityError:
+            pass  # e.g. a span for a since-deleted agent — insert row by row
+        except sqlite3.Error:
+            return 0
+        written = 0
+        for row in rows:
+            try:
+                with db_write(Path(db_key)) as conn:
+                    conn.execute(_TELEMETRY_INSERT, row)
+                    _apply_rollups(conn, [(row[1], row[2], row[3], row[4], row[6])])
+                written += 1
+            except sqlite3.Error:
+                pass
+        return written
+
+
+_span_sink = _SpanSink()
+
+
 def record_span(span_name: str, agent_id: Optional[int] = None,
                 duration_ms: Optional[int] = None, status: str = "ok",
                 metadata: Optional[dict] = None, trace_id: Optional[str] = None,
-                db_path: Optional[Path] = None) -> int:
-    """Insert a telemetry span row."""
-    db = db_path or DB_PATH
+                db_path: Optional[Path] = None) -> None:
+    """Buffer a telemetry span; it is written by the background flusher."""
     tid = trace_id or uuid.uuid4().hex[:16]
     meta = json.dumps(metadata or {})
-    with db_write(db) as conn:
-        cur = conn.execute(
-            "INSERT INTO telemetry (trace_id, span_name, agent_id, duration_ms, status, metadata) "
-            "VALUES (?, ?, ?, ?, ?, ?)",
-            (tid, span_name, agent_id, duration_ms, status, meta),
-        )
-        return cur.lastrowid
+    created = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    _span_sink.add(str(db_path or DB_PATH),
+                   (tid, span_name, agent_id, duration_ms, status, meta, created))
+
+
+def flush_telemetry(db_path: Optional[Path] = None) -> int:
+    """Write buffered spans now. With no db_path, flushes every database."""
+    return _span_sink.flush(str(db_path) if db_path else None)
+
+
+def get_telemetry_sink_stats() -> dict:
+    """Counters for the span buffer: recorded, flushed, dropped, flushes, buffered."""
+    with _span_sink._cond:
+        return {**_span_sink.stats, "buffered": len(_span_sink._buf)}
+
+
+atexit.register(flush_telemetry)
 
 
 def get_telemetry(limit: int = 100, agent_id: Optional[int] = None,
@@ -1669,6 +3027,7 @@ def get_telemetry(limit: int = 100, agent_id: Optional[int] = None,
                   db_path: Optional[Path] = None) -> list:
     """Query telemetry spans with optional filters."""
     db = db_path or DB_PATH
+    flush_telemetry(db)
     conn = get_conn(db)
     try:
         clauses = []
@@ -1693,60 +3052,185 @@ def get_telemetry(limit: int = 100, agent_id: Optional[int] = None,
         conn.close()
 
 
-def get_telemetry_stats(since: Optional[str] = None,
+def get_telemetry_stats(since: Optional[str] = None, by_agent: bool = False,
                         db_path: Optional[Path] = None) -> dict:
-    """Aggregate telemetry stats: avg/p95 response times, error rates by span."""
+    """Aggregate telemetry stats: avg/p50/p95/p99 response times and error
+    rates by span (and by agent with ``by_agent=True``).
+
+    Answered from the per-minute rollups, so the cost depends on the number
+    of minute buckets in the window, not the number of spans. ``since`` is
+    applied at minute granularity.
+    """
     db = db_path or DB_PATH
+    flush_telemetry(db)
     conn = get_conn(db)
     try:
         where = ""
         params = []
         if since:
-            where = " WHERE created_at >= ?"
-            params = [since]
+            where = " WHERE bucket >= ?"
+            params = [since[:16]]
         rows = conn.execute(
-            f"SELECT span_name, COUNT(*) as call_count, "
-            f"AVG(duration_ms) as avg_ms, "
-            f"SUM(CASE WHEN status='error' THEN 1 ELSE 0 END) as error_count "
-            f"FROM telemetry{where} GROUP BY span_name ORDER BY call_count DESC",
+            "SELECT span_name, agent_id, call_count, error_count, timed_count, "
+            f"sum_ms, min_ms, max_ms, hist FROM telemetry_rollup{where}",
             params,
         ).fetchall()
-        stats = []
-        for r in rows:
-            count = r["call_count"]
-            err = r["error_count"]
-            # p95 approximation: get durations for this span
-            durations = conn.execute(
-                f"SELECT duration_ms FROM telemetry WHERE span_name=? AND duration_ms IS NOT NULL"
-                + (" AND created_at >= ?" if since else "")
-                + " ORDER BY duration_ms",
-                ([r["span_name"]] + params),
-            ).fetchall()
-            p95 = 0
-            if durations:
-                idx = int(len(durations) * 0.95)
-                idx = min(idx, len(durations) - 1)
-                p95 = durations[idx]["duration_ms"] or 0
-            stats.append({
-                "span_name": r["span_name"],
-                "call_count": count,
-                "avg_ms": round(r["avg_ms"] or 0, 1),
-                "p95_ms": p95,
-                "error_count": err,
-                "error_rate": round(err / count * 100, 1) if count else 0,
-            })
-        return {"stats": stats}
     finally:
         conn.close()
 
+    groups: dict = {}
+    for r in rows:
+        key = (r["span_name"], r["agent_id"]) if by_agent else (r["span_name"],)
+        g = groups.get(key)
+        if g is None:
+            g = groups[key] = {"calls": 0, "errors": 0, "timed": 0, "sum": 0,
+                               "min": None, "max": None, "hist": {}}
+        g["calls"] += r["call_count"]
+        g["errors"] += r["error_count"]
+        g["timed"] += r["timed_count"]
+        g["sum"] += r["sum_ms"]
+        if r["min_ms"] is not None:
+            g["min"] = r["min_ms"] if g["min"] is None else min(g["min"], r["min_ms"])
+        if r["max_ms"] is not None:
+            g["max"] = r["max_ms"] if g["max"] is None else max(g["max"], r["max_ms"])
+        for b, c in json.loads(r["hist"]).items():
+            g["hist"][int(b)] = g["hist"].get(int(b), 0) + c
+
+    stats = []
+    for key, g in groups.items():
+        count, err, timed = g["calls"], g["errors"], g["timed"]
+
+        def _pct(q, g=g, timed=timed):
+            v = _hist_quantile(g["hist"], timed, q)
+            if g["min"] is not None:
+                v = max(g["min"], min(g["max"], v))
+            return v
+
+        entry = {
+            "span_name": key[0],
+            "call_count": count,
+            "avg_ms": round(g["sum"] / timed, 1) if timed else 0,
+            "p50_ms": _pct(0.50),
+            "p95_ms": _pct(0.95),
+            "p99_ms": _pct(0.99),
+            "error_count": err,
+            "error_rate": round(err / count * 100, 1) if count else 0,
+        }
+        if by_agent:
+            entry["agent_id"] = key[1] or None
+        stats.append(entry)
+    stats.sort(key=lambda e: e["call_count"], reverse=True)
+    return {"stats": stats}
+
+
+def cleanup_old_telemetry(days: int = 7, rollup_days: int = 90,
+                          db_path: Optional[Path] = None) -> int:
+    """Prune raw spans older than N days. Returns count deleted.
+
+    Per-minute rollups are kept for ``rollup_days`` so latency percentiles
+    stay available long after the raw spans are gone.
+    """
+    db = db_path or DB_PATH
+    now = datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    rollup_cutoff = (now - timedelta(days=rollup_days)).strftime("%Y-%m-%dT%H:%M")
+    flush_telemetry(db)
+    with db_write(db) as conn:
+        cur = conn.execute("DELETE FROM telemetry WHERE created_at < ?", (cutoff,))
+        conn.execute("DELETE FROM telemetry_rollup WHERE bucket < ?", (rollup_cutoff,))
+        return cur.rowcount
+
+
+# ---------------------------------------------------------------------------
+# LLM response cache
+# ---------------------------------------------------------------------------
+# Content-addressed: the key is a hash of everything that determines the
+# reply (provider, model, messages, temperature), computed by the caller.
+# Entries expire after their TTL; prune_llm_cache() also trims the oldest
+# entries once the table holds more than LLM_CACHE_MAX_BYTES of responses.
+
+LLM_CACHE_TTL = 3600                    # seconds
+LLM_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_llm_cache_lock = threading.Lock()
+_llm_cache_stats = {"hits": 0, "misses": 0, "bytes_saved": 0, "stored": 0, "evicted": 0}
+
+
+def llm_cache_get(key: str, db_path: Optional[Path] = None) -> Optional[str]:
+    """Cached response for ``key`` if present and unexpired, else None."""
+    conn = get_conn(db_path)
+    try:
+        row = conn.execute(
+            "SELECT response, bytes FROM llm_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # database predates the cache table
+    finally:
+        conn.close()
+    with _llm_cache_lock:
+        if row is None:
+            _llm_cache_stats["misses"] += 1
+            return None
+        _llm_cache_stats["hits"] += 1
+        _llm_cache_stats["bytes_saved"] += row["bytes"]
+    return row["response"]
+
+
+def llm_cache_put(key: str, response: str, ttl: float = LLM_CACHE_TTL,
+                  provider: str = "", model: str = "",
+                  db_path: Optional[Path] = None) -> Future:
+    """Store a response without waiting for the write (see submit_write)."""
+    now = time.time()
+    with _llm_cache_lock:
+        _llm_cache_stats["stored"] += 1
+    return submit_write(
+        "INSERT OR REPLACE INTO llm_cache "
+        "(key, provider, model, response, bytes, created_at, expires_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (key, provider, model, response, len(response.encode("utf-8")),
+         now, now + ttl),
+        db_path=db_path,
+    )
+
 
-def cleanup_old_telemetry(days: int = 7, db_path: Optional[Path] = None) -> int:
-    """Prune telemetry older than N days. Returns count deleted."""
-    db = db_path or DB_PATH
-    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
-    with db_write(db) as conn:
-        cur = conn.execute("DELETE FROM telemetry WHERE created_at < ?", (cutoff,))
-        return cur.rowcount
+def prune_llm_cache(max_bytes: int = LLM_CACHE_MAX_BYTES,
+                    db_path: Optional[Path] = None) -> int:
+    """Delete expired entries, then the oldest until under ``max_bytes``.
+    Returns the number of entries removed."""
+    with db_write(db_path) as conn:
+        removed = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?",
+                               (time.time(),)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()[0]
+        if total > max_bytes:
+            doomed = []
+            for row in conn.execute("SELECT key, bytes FROM llm_cache ORDER BY created_at"):
+                if total <= max_bytes:
+                    break
+                doomed.append((row[0],))
+                total -= row[1]
+            conn.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+            removed += len(doomed)
+    with _llm_cache_lock:
+        _llm_cache_stats["evicted"] += removed
+    return removed
+
+
+def get_llm_cache_stats(db_path: Optional[Path] = None) -> dict:
+    """Process counters (hits, misses, bytes_saved, stored, evicted) plus the
+    table's current entries and bytes."""
+    with _llm_cache_lock:
+        stats = dict(_llm_cache_stats)
+    conn = get_conn(db_path)
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()
+        stats["entries"], stats["bytes"] = row[0], row[1]
+    except sqlite3.OperationalError:
+        stats["entries"] = stats["bytes"] = 0
+    finally:
+        conn.close()
+    return stats
 
 
 # ---------------------------------------------------------------------------
@@ -2168,12 +3652,111 @@ def _load_v1_hierarchy(config: dict, config_path: str,
     return {"org": config.get("org_name"), "agents_loaded": created}
 
 
+# ---------------------------------------------------------------------------
+# Agent directory — in-memory lookups for routing and name resolution
+# ---------------------------------------------------------------------------
+# A per-database snapshot of the agents table's routing fields, indexed by
+# id, exact name, lowercased name and lowercased title. It is stamped with
+# the 'epoch' and 'agents' rows of data_versions (bumped by triggers on
+# every agents write, including raw SQL and other processes), so staying
+# current costs one primary-key read instead of full agent lookups. The bus
+# functions that write agents also drop the snapshot directly.
+
+_DIRECTORY_COLUMNS = ("id", "name", "title", "agent_type", "role", "status",
+                      "active", "parent_agent_id")
+_agent_directories: dict = {}    # db path -> _AgentDirectory
+
+
+class _AgentDirectory:
+    """Immutable snapshot of every agent's routing fields."""
+
+    __slots__ = ("stamp", "by_id", "by_name", "by_lower_name", "by_title")
+
+    def __init__(self, stamp, rows):
+        self.stamp = stamp
+        self.by_id = {}
+        self.by_name = {}
+        self.by_lower_name = {}
+        self.by_title = {}
+        for r in rows:
+            agent = dict(zip(_DIRECTORY_COLUMNS, r))
+            self.by_id[agent["id"]] = agent
+            self.by_name[agent["name"]] = agent
+            self.by_lower_name.setdefault(agent["name"].lower(), agent)
+            if agent["title"]:
+                self.by_title.setdefault(agent["title"].lower(), agent)
+
+
+def _invalidate_agent_directory(db_path: Optional[Path] = None) -> None:
+    _agent_directories.pop(str(db_path or DB_PATH), None)
+
+
+def _agent_directory(db_path: Optional[Path] = None) -> _AgentDirectory:
+    """Return the current agent directory, reloading it if agents changed."""
+    key = str(db_path or DB_PATH)
+    conn = get_conn(db_path)
+    try:
+        try:
+            rows = conn.execute(
+                "SELECT domain, version FROM data_versions "
+                "WHERE domain IN ('epoch', 'agents')"
+            ).fetchall()
+            versions = dict((r[0], r[1]) for r in rows)
+            stamp = (versions.get("epoch"), versions.get("agents", 0))
+        except sqlite3.OperationalError:
+            stamp = None   # pre-init database: never cached
+        directory = _agent_directories.get(key)
+        if directory is not None and stamp is not None and directory.stamp == stamp:
+            return directory
+        rows = conn.execute(
+            f"SELECT {', '.join(_DIRECTORY_COLUMNS)} FROM agents ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+    directory = _AgentDirectory(stamp, rows)
+    if stamp is not None:
+        _agent_directories[key] = directory
+    return directory
+
+
+def lookup_agent(agent_id: int, db_path: Optional[Path] = None) -> Optional[dict]:
+    """Directory entry (id, name, title, agent_type, role, status, active,
+    parent_agent_id) for an agent id, or None."""
+    return _agent_directory(db_path).by_id.get(agent_id)
+
+
+def find_agent(name: str, active_only: bool = False, partial: bool = False,
+               exclude_id: Optional[int] = None,
+               db_path: Optional[Path] = None) -> Optional[dict]:
+    """Directory entry for an agent by name or title. Returns None if no match.
+
+    Tries exact name, case-insensitive name, then case-insensitive title.
+    With partial=True it then falls back to a case-insensitive substring of
+    the name, then of the title, skipping exclude_id (an agent never
+    partially matches itself).
+    """
+    directory = _agent_directory(db_path)
+    lowered = name.lower()
+    for agent in (directory.by_name.get(name),
+                  directory.by_lower_name.get(lowered),
+                  directory.by_title.get(lowered)):
+        if agent is not None and (agent["active"] or not active_only):
+            return agent
+    if partial:
+        for field in ("name", "title"):
+            for agent in directory.by_id.values():
+                if agent["id"] == exclude_id or (active_only and not agent["active"]):
+                    continue
+                if agent[field] and lowered in agent[field].lower():
+                    return agent
+    return None
+
+
 # ---------------------------------------------------------------------------
 # Routing validation (v2 - Crew Boss gatekeeper)
 # ---------------------------------------------------------------------------
 
-def _check_routing(conn: sqlite3.Connection,
-                   sender: sqlite3.Row, recipient: sqlite3.Row) -> dict:
+def _check_routing(sender: dict, recipient: dict) -> dict:
     """Validate whether sender is allowed to message recipient.
 
     Routing — open internal comms:
@@ -2239,20 +3822,17 @@ def send_message(from_id: int, to_id: int, message_type: str,
     if priority not in VALID_PRIORITIES:
         raise ValueError(f"Invalid priority '{priority}'. Must be one of {VALID_PRIORITIES}")
 
-    # --- Phase 1: Read-only lookups (no write lock needed) ---
-    conn = get_conn(db_path)
-    try:
-        sender = conn.execute("SELECT * FROM agents WHERE id = ?", (from_id,)).fetchone()
-        if not sender:
-            raise ValueError(f"Sender agent id={from_id} not found")
+    # --- Phase 1: Routing check against the in-memory agent directory ---
+    directory = _agent_directory(db_path)
+    sender = directory.by_id.get(from_id)
+    if not sender:
+        raise ValueError(f"Sender agent id={from_id} not found")
 
-        recipient = conn.execute("SELECT * FROM agents WHERE id = ?", (to_id,)).fetchone()
-        if not recipient:
-            raise ValueError(f"Recipient agent id={to_id} not found")
+    recipient = directory.by_id.get(to_id)
+    if not recipient:
+        raise ValueError(f"Recipient agent id={to_id} not found")
 
-        routing = _check_routing(conn, sender, recipient)
-    finally:
-        conn.close()
+    routing = _check_routing(sender, recipient)
 
     if not routing["allowed"]:
         raise PermissionError(
@@ -2275,9 +3855,11 @@ def send_message(from_id: int, to_id: int, message_type: str,
         })
 
         cur = wconn.execute(
-            "INSERT INTO messages (from_agent_id, to_agent_id, message_type, subject, body, priority, status, attachment) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (from_id, to_id, message_type, subject, body, priority, initial_status, attachment),
+            "INSERT INTO messages (from_agent_id, to_agent_id, message_type, subject, body, "
+            "priority, status, attachment, conversation_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (from_id, to_id, message_type, subject, body, priority, initial_status,
+             attachment, conversation_key(from_id, to_id)),
         )
         msg_id = cur.lastrowid
 
@@ -2289,6 +3871,9 @@ def send_message(from_id: int, to_id: int, message_type: str,
         })
         # db_write commits and closes automatically
 
+    if initial_status == "queued":
+        notify_queued(db_path)
+
     return {
         "message_id": msg_id,
         "from": sender["name"],
@@ -2298,39 +3883,97 @@ def send_message(from_id: int, to_id: int, message_type: str,
     }
 
 
-def read_inbox(agent_id: int, status_filter: Optional[str] = None,
-               db_path: Optional[Path] = None) -> list[dict]:
-    """Return all messages addressed to an agent.
+# Message columns returned when bodies are skipped (include_body=False);
+# body_length tells the caller whether a lazy get_message_body() is worth it.
+_MESSAGE_HEADER_COLUMNS = (
+    "m.id, m.from_agent_id, m.to_agent_id, m.message_type, m.subject, "
+    "m.priority, m.status, m.private_session_id, m.created_at, m.delivered_at, "
+    "m.read_at, m.attachment, length(m.body) AS body_length"
+)
+
 
-    Optionally filter by message status (queued, delivered, read, archived).
+def _keyset(query: str, params: list, column: str, after_id: Optional[int],
+            before_id: Optional[int], limit: Optional[int]) -> tuple:
+    """Append id-cursor conditions, ordering and LIMIT to a query.
+
+    Pages run newest first, except with after_id alone, which pages forward
+    (oldest first) so the last row's id is the next after_id.
     """
-    conn = get_conn(db_path)
+    if after_id is not None:
+        query += f" AND {column} > ?"
+        params.append(after_id)
+    if before_id is not None:
+        query += f" AND {column} < ?"
+        params.append(before_id)
+    forward = after_id is not None and before_id is None
+    query += f" ORDER BY {column} {'ASC' if forward else 'DESC'}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+
+def read_inbox(agent_id: int, status_filter=None,
+               db_path: Optional[Path] = None, limit: Optional[int] = None,
+               after_id: Optional[int] = None, before_id: Optional[int] = None,
+               include_body: bool = True) -> list[dict]:
+    """Return messages addressed to an agent, newest first.
+
+    Optionally filter by message status (queued, delivered, read, archived),
+    or by several statuses given as a list/tuple.
 
+    Keyset pagination: pass ``limit`` and the last id seen as ``before_id``
+    to page back through history, or as ``after_id`` to page forward (rows
+    then come oldest first). Each page is an index range scan, so cost does
+    not grow with inbox history. With ``include_body=False`` the body is
+    left out (``body_length`` is returned instead); fetch it with
+    get_message_body().
+    """
+    statuses = [status_filter] if isinstance(status_filter, str) else list(status_filter or [])
+    for status in statuses:
+        if status not in VALID_MESSAGE_STATUSES:
+            raise ValueError(f"Invalid status filter '{status}'")
+
+    columns = "m.*" if include_body else _MESSAGE_HEADER_COLUMNS
     query = (
-        "SELECT m.*, s.name AS from_name, s.role AS from_role, s.agent_type AS from_agent_type "
+        f"SELECT {columns}, s.name AS from_name, s.role AS from_role, "
+        "s.agent_type AS from_agent_type "
         "FROM messages m "
         "JOIN agents s ON m.from_agent_id = s.id "
         "WHERE m.to_agent_id = ?"
     )
     params: list = [agent_id]
 
-    if status_filter:
-        if status_filter not in VALID_MESSAGE_STATUSES:
-            conn.close()
-            raise ValueError(f"Invalid status filter '{status_filter}'")
-        query += " AND m.status = ?"
-        params.append(status_filter)
+    if statuses:
+        query += f" AND m.status IN ({','.join('?' * len(statuses))})"
+        params.extend(statuses)
 
-    query += " ORDER BY m.created_at DESC"
+    query, params = _keyset(query, params, "m.id", after_id, before_id, limit)
+    conn = get_conn(db_path)
     rows = conn.execute(query, params).fetchall()
-
-    _audit(conn, "inbox_read", agent_id, {"filter": status_filter, "count": len(rows)})
-    conn.commit()
     conn.close()
 
+    _audit_deferred("inbox_read", agent_id,
+                    {"filter": status_filter, "count": len(rows)}, db_path)
     return [dict(r) for r in rows]
 
 
+def get_message_body(message_id: int, to_agent_id: Optional[int] = None,
+                     db_path: Optional[Path] = None) -> Optional[str]:
+    """Return one message's body (lazy fetch after read_inbox(include_body=False)).
+
+    With ``to_agent_id``, returns None unless the message is addressed to
+    that agent.
+    """
+    conn = get_conn(db_path)
+    row = conn.execute("SELECT to_agent_id, body FROM messages WHERE id = ?",
+                       (message_id,)).fetchone()
+    conn.close()
+    if not row or (to_agent_id is not None and row["to_agent_id"] != to_agent_id):
+        return None
+    return row["body"]
+
+
 def mark_read(message_id: int, db_path: Optional[Path] = None) -> bool:
     """Mark a message as read. Returns True if updated, False if not found."""
     conn = get_conn(db_path)
@@ -2353,13 +3996,20 @@ def mark_read(message_id: int, db_path: Optional[Path] = None) -> bool:
 
 
 def mark_delivered(message_id: int, db_path: Optional[Path] = None) -> bool:
-    """Mark a message as delivered. Returns True if updated."""
+    """Mark a message as delivered. Returns True if updated.
+
+    A message a worker holds a live lease on (see claim_messages) is left
+    alone; that worker completes it. An expired lease is cleared.
+    """
     conn = get_conn(db_path)
     now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
     cur = conn.execute(
-        "UPDATE messages SET status='delivered', delivered_at=? WHERE id=? AND status='queued'",
-        (now, message_id),
+        "UPDATE messages SET status='delivered', delivered_at=?, "
+        "claimed_by=NULL, lease_expires_at=NULL "
+        "WHERE id=? AND status='queued' "
+        "AND (lease_expires_at IS NULL OR lease_expires_at <= ?)",
+        (now, message_id, now),
     )
     updated = cur.rowcount > 0
     conn.commit()
@@ -2367,6 +4017,299 @@ def mark_delivered(message_id: int, db_path: Optional[Path] = None) -> bool:
     return updated
 
 
+def update_message_body(message_id: int, body: str,
+                        db_path: Optional[Path] = None) -> bool:
+    """Rewrite a message body in place (used for streamed partial replies).
+
+    Not audited — a streamed reply is rewritten many times before its
+    final text lands. Returns True if updated.
+    """
+    with db_write(db_path) as conn:
+        cur = conn.execute("UPDATE messages SET body=? WHERE id=?",
+                           (body, message_id))
+        return cur.rowcount > 0
+
+
+# ---------------------------------------------------------------------------
+# Conversation windows — chat history without re-reading it every turn
+# ---------------------------------------------------------------------------
+
+# Each worker turn used to re-read up to 500 messages of the chat plus a
+# COUNT(*) over all of it. A window holds the latest CONVERSATION_WINDOW
+# non-empty messages of one conversation (agent pair) in memory. It is
+# loaded on first use, then kept current by one constant-time probe per
+# read (max message id + the conversation's data version): new messages are
+# appended from an index range read of just the rows past the window's
+# high-water id; a rewritten or deleted message reloads the window.
+# Messages can come from other processes, so the window is never trusted
+# without the probe.
+
+CONVERSATION_WINDOW = 500        # messages kept per conversation
+CONVERSATION_CACHE_MAX = 256     # conversations kept in memory (LRU)
+
+_CONVERSATION_COLUMNS = "id, from_agent_id, subject, body, created_at"
+_conversation_windows: "OrderedDict[tuple, _ConversationWindow]" = OrderedDict()
+_conversation_lock = threading.Lock()
+
+
+class _ConversationWindow:
+    """Ring buffer of one conversation's latest messages (oldest first)."""
+
+    __slots__ = ("stamp", "synced_id", "total", "rows")
+
+    def __init__(self, stamp, synced_id: int, total: int, rows):
+        self.stamp = stamp
+        self.synced_id = synced_id   # every message with id <= this is counted
+        self.total = total           # non-empty messages in the conversation
+        self.rows = deque(rows, maxlen=CONVERSATION_WINDOW)
+
+
+def _invalidate_conversation_windows(db_path: Optional[Path] = None) -> None:
+    key = str(db_path or DB_PATH)
+    with _conversation_lock:
+        for k in [k for k in _conversation_windows if k[0] == key]:
+            del _conversation_windows[k]
+
+
+def _load_conversation(conn, conv_key: str, high_id: int):
+    rows = conn.execute(
+        f"SELECT {_CONVERSATION_COLUMNS} FROM messages "
+        "WHERE conversation_key = ? AND id <= ? AND body != '' "
+        "ORDER BY id DESC LIMIT ?",
+        (conv_key, high_id, CONVERSATION_WINDOW),
+    ).fetchall()
+    total = len(rows)
+    if total == CONVERSATION_WINDOW:
+        total = conn.execute(
+            "SELECT COUNT(*) FROM messages "
+            "WHERE conversation_key = ? AND id <= ? AND body != ''",
+            (conv_key, high_id),
+        ).fetchone()[0]
+    return [dict(r) for r in reversed(rows)], total
+
+
+def get_conversation(agent_a: int, agent_b: int, limit: int = CONVERSATION_WINDOW,
+                     db_path: Optional[Path] = None) -> tuple:
+    """Return (messages, total) for the chat between two agents.
+
+    ``messages`` are the latest ``limit`` messages with a non-empty body,
+    oldest first, as dicts of id, from_agent_id, subject, body, created_at;
+    ``total`` counts every such message in the conversation. Served from
+    an in-memory window when ``limit`` <= CONVERSATION_WINDOW.
+    """
+    conv_key = conversation_key(agent_a, agent_b)
+    conn = get_conn(db_path)
+    try:
+        try:
+            probe = conn.execute(
+                "SELECT (SELECT max(id) FROM messages), "
+                "(SELECT version FROM data_versions WHERE domain = 'epoch'), "
+                "(SELECT version FROM data_versions WHERE domain = ?)",
+                ("chat:" + conv_key,),
+            ).fetchone()
+        except sqlite3.OperationalError:
+            probe = None  # pre-init database: read without caching
+        if probe is None or limit > CONVERSATION_WINDOW:
+            rows = conn.execute(
+                f"SELECT {_CONVERSATION_COLUMNS} FROM messages "
+                "WHERE conversation_key = ? AND body != '' "
+                "ORDER BY id DESC LIMIT ?", (conv_key, limit)).fetchall()
+            total = conn.execute(
+                "SELECT COUNT(*) FROM messages "
+                "WHERE conversation_key = ? AND body != ''", (conv_key,)).fetchone()[0]
+            return [dict(r) for r in reversed(rows)], total
+
+        high_id = probe[0] or 0
+        stamp = (probe[1], probe[2] or 0)
+        cache_key = (str(db_path or DB_PATH), conv_key)
+        with _conversation_lock:
+            window = _conversation_windows.get(cache_key)
+            if window is not None:
+                _conversation_windows.move_to_end(cache_key)
+                synced_id = window.synced_id
+        if window is None or window.stamp != stamp:
+            rows, total = _load_conversation(conn, conv_key, high_id)
+            window = _ConversationWindow(stamp, high_id, total, rows)
+            with _conversation_lock:
+                _conversation_windows[cache_key] = window
+                _conversation_windows.move_to_end(cache_key)
+                while len(_conversation_windows) > CONVERSATION_CACHE_MAX:
+                    _conversation_windows.popitem(last=False)
+        elif high_id > synced_id:
+            new_rows = conn.execute(
+                f"SELECT {_CONVERSATION_COLUMNS} FROM messages "
+                "WHERE conversation_key = ? AND id > ? AND id <= ? AND body != '' "
+                "ORDER BY id",
+                (conv_key, synced_id, high_id),
+            ).fetchall()
+            with _conversation_lock:
+                # Another thread may have caught this window up meanwhile
+                for r in new_rows:
+                    if r["id"] > window.synced_id:
+                        window.rows.append(dict(r))
+                        window.total += 1
+                window.synced_id = max(window.synced_id, high_id)
+    finally:
+        conn.close()
+
+    with _conversation_lock:
+        rows = list(window.rows)[-limit:] if limit > 0 else []
+        total = window.total
+    return [dict(r) for r in rows], total
+
+
+# ---------------------------------------------------------------------------
+# Message leases — several worker processes draining one messages table
+# ---------------------------------------------------------------------------
+
+# A queued message is claimed by stamping claimed_by + lease_expires_at; it
+# stays 'queued' until the worker completes it. If the worker dies mid-turn
+# the lease runs out and the message becomes claimable again, up to
+# MAX_CLAIM_ATTEMPTS times (then it is dead-lettered as delivered, audited).
+
+DEFAULT_LEASE_SECONDS = 60
+MAX_CLAIM_ATTEMPTS = 3
+
+
+def _lease_ts(seconds: float = 0) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).strftime(
+        "%Y-%m-%dT%H:%M:%SZ")
+
+
+def _bump_worker_stat(conn, worker_id: str, column: str, n: int) -> None:
+    conn.execute(
+        f"INSERT INTO worker_stats (worker_id, {column}) VALUES (?, ?) "
+        f"ON CONFLICT(worker_id) DO UPDATE SET {column} = {column} + excluded.{column}, "
+        "last_seen = strftime('%Y-%m-%dT%H:%M:%SZ','now')",
+        (worker_id, n),
+    )
+
+
+def claim_messages(worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                   limit: int = 100, db_path: Optional[Path] = None) -> list[int]:
+    """Atomically claim queued messages to active agents for ``worker_id``.
+
+    Claims unclaimed messages and ones whose lease has expired, oldest
+    first. Returns the claimed message ids. Runs in one write transaction,
+    so concurrent workers — threads or processes — never get the same row.
+    """
+    with db_write(db_path) as conn:
+        _requeue_expired(conn, _lease_ts())
+        # SELECT then UPDATE rather than UPDATE ... RETURNING (SQLite 3.35+);
+        # the write transaction holds the lock, so nothing claims in between.
+        ids = sorted(r[0] for r in conn.execute(
+            "SELECT m.id FROM messages m JOIN agents a ON m.to_agent_id = a.id "
+            "WHERE m.status='queued' AND a.active=1 AND m.lease_expires_at IS NULL "
+            "ORDER BY m.created_at, m.id LIMIT ?",
+            (limit,),
+        ).fetchall())
+        if ids:
+            conn.execute(
+                "UPDATE messages SET claimed_by=?, lease_expires_at=?, "
+                "claim_attempts = claim_attempts + 1 "
+                f"WHERE id IN ({','.join('?' * len(ids))})",
+                [worker_id, _lease_ts(lease_seconds)] + ids,
+            )
+            _bump_worker_stat(conn, worker_id, "claimed", len(ids))
+    return ids
+
+
+def renew_leases(message_ids: list, worker_id: str,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 db_path: Optional[Path] = None) -> int:
+    """Extend the lease on messages still held by ``worker_id``.
+
+    Returns how many were renewed; a lower count than asked means some
+    leases were lost (expired and re-claimed elsewhere).
+    """
+    if not message_ids:
+        return 0
+    placeholders = ",".join("?" * len(message_ids))
+    with db_write(db_path) as conn:
+        cur = conn.execute(
+            f"UPDATE messages SET lease_expires_at=? WHERE id IN ({placeholders}) "
+            "AND claimed_by=? AND status='queued'",
+            [_lease_ts(lease_seconds)] + list(message_ids) + [worker_id],
+        )
+        return cur.rowcount
+
+
+def complete_message(message_id: int, worker_id: str,
+                     db_path: Optional[Path] = None) -> bool:
+    """Mark a claimed message delivered. False if the lease was lost."""
+    with db_write(db_path) as conn:
+        cur = conn.execute(
+            "UPDATE messages SET status='delivered', delivered_at=?, "
+            "claimed_by=NULL, lease_expires_at=NULL "
+            "WHERE id=? AND claimed_by=? AND status='queued'",
+            (_lease_ts(), message_id, worker_id),
+        )
+        done = cur.rowcount > 0
+        if done:
+            _bump_worker_stat(conn, worker_id, "completed", 1)
+    return done
+
+
+def _requeue_expired(conn, now: str) -> int:
+    """Clear expired leases (dead-lettering repeat offenders). In-transaction."""
+    rows = conn.execute(
+        "SELECT id, claimed_by, claim_attempts FROM messages "
+        "WHERE status='queued' AND lease_expires_at <= ?",
+        (now,),
+    ).fetchall()
+    per_worker: dict = {}
+    for msg_id, worker_id, attempts in rows:
+        per_worker[worker_id] = per_worker.get(worker_id, 0) + 1
+        if attempts >= MAX_CLAIM_ATTEMPTS:
+            # The message keeps outliving its workers — stop retrying it
+            conn.execute(
+                "UPDATE messages SET status='delivered', delivered_at=?, "
+                "claimed_by=NULL, lease_expires_at=NULL WHERE id=?",
+                (now, msg_id),
+            )
+            _audit(conn, "message_lease_abandoned", None,
+                   {"message_id": msg_id, "attempts": attempts,
+                    "last_worker": worker_id})
+        else:
+            conn.execute(
+                "UPDATE messages SET claimed_by=NULL, lease_expires_at=NULL WHERE id=?",
+                (msg_id,),
+            )
+    for worker_id, n in per_worker.items():
+        _bump_worker_stat(conn, worker_id, "expired", n)
+    return len(rows)
+
+
+def requeue_expired_leases(db_path: Optional[Path] = None) -> int:
+    """Release claims whose lease ran out. Returns count re-queued.
+
+    claim_messages() does this itself before claiming; call it directly to
+    clear dead workers' claims without claiming anything.
+    """
+    with db_write(db_path) as conn:
+        return _requeue_expired(conn, _lease_ts())
+
+
+def get_worker_stats(db_path: Optional[Path] = None) -> list[dict]:
+    """Per-worker claim/complete/expired counters and throughput."""
+    conn = get_conn(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT * FROM worker_stats ORDER BY last_seen DESC"
+        ).fetchall()
+    finally:
+        conn.close()
+    result = []
+    for r in rows:
+        entry = dict(r)
+        first = datetime.strptime(r["first_seen"], "%Y-%m-%dT%H:%M:%SZ")
+        last = datetime.strptime(r["last_seen"], "%Y-%m-%dT%H:%M:%SZ")
+        elapsed = max((last - first).total_seconds(), 1.0)
+        entry["per_minute"] = round(r["completed"] / elapsed * 60, 1)
+        result.append(entry)
+    return result
+
+
 # ---------------------------------------------------------------------------
 # Agent management
 # ---------------------------------------------------------------------------
@@ -2407,13 +4350,13 @@ def get_agent_status(agent_id: int, db_path: Optional[Path] = None) -> dict:
 
 def get_agent_by_name(name: str, db_path: Optional[Path] = None) -> Optional[dict]:
     """Look up an agent by name or title. Returns dict or None."""
+    directory = _agent_directory(db_path)
+    # Exact name, then title (case-insensitive)
+    agent = directory.by_name.get(name) or directory.by_title.get(name.lower())
+    if agent is None:
+        return None
     conn = get_conn(db_path)
-    row = conn.execute("SELECT * FROM agents WHERE name = ?", (name,)).fetchone()
-    if not row:
-        # Fall back to title lookup (case-insensitive)
-        row = conn.execute(
-            "SELECT * FROM agents WHERE title = ? COLLATE NOCASE",
-            (name,)).fetchone()
+    row = conn.execute("SELECT * FROM agents WHERE id = ?", (agent["id"],)).fetchone()
     conn.close()
     return dict(row) if row else None
 
@@ -2459,6 +4402,7 @@ def quarantine_agent(agent_id: int, db_path: Optional[Path] = None) -> dict:
     _audit(conn, "agent_quarantined", agent_id, {"previous_status": agent["status"]})
     _alert_agent_status_change(conn, dict(agent), "quarantined")
     conn.commit()
+    _invalidate_agent_directory(db_path)
 
     updated = conn.execute("SELECT * FROM agents WHERE id=?", (agent_id,)).fetchone()
     conn.close()
@@ -2485,6 +4429,7 @@ def restore_agent(agent_id: int, db_path: Optional[Path] = None) -> dict:
     )
     _audit(conn, "agent_restored", agent_id, {"previous_status": agent["status"]})
     conn.commit()
+    _invalidate_agent_directory(db_path)
 
     updated = conn.execute("SELECT * FROM agents WHERE id=?", (agent_id,)).fetchone()
     conn.close()
@@ -2516,6 +4461,7 @@ def terminate_agent(agent_id: int, db_path: Optional[Path] = None) -> dict:
             "previous_status": agent["status"], "name": agent["name"],
         })
         _alert_agent_status_change(wconn, dict(agent), "terminated")
+    _invalidate_agent_directory(db_path)
 
     conn = get_conn(db_path)
     try:
@@ -2543,6 +4489,7 @@ def activate_agent(agent_id: int, db_path: Optional[Path] = None) -> dict:
             (agent_id,),
         )
         _audit(wconn, "agent_activated", agent_id, {"name": agent["name"]})
+    _invalidate_agent_directory(db_path)
 
     conn = get_conn(db_path)
     try:
@@ -2573,6 +4520,7 @@ def deactivate_agent(agent_id: int, db_path: Optional[Path] = None) -> dict:
         )
         _audit(wconn, "agent_deactivated", agent_id, {"name": agent["name"]})
         _alert_agent_status_change(wconn, dict(agent), "deactivated")
+    _invalidate_agent_directory(db_path)
 
     conn = get_conn(db_path)
     try:
@@ -3014,23 +4962,38 @@ def search_knowledge(query: str, category_filter: Optional[str] = None,
                      db_path: Optional[Path] = None) -> list[dict]:
     """Search the knowledge store by subject, content, and tags.
 
-    Uses LIKE matching on subject, content, and tags fields.
+    Substring match on subject, content, and tags. Served from the FTS5
+    index and ranked by BM25 (best first, ties by recency); queries shorter
+    than FTS_MIN_QUERY characters fall back to a LIKE scan.
     """
     conn = get_conn(db_path)
-    sql = (
-        "SELECT k.*, a.name AS agent_name "
-        "FROM knowledge_store k "
-        "JOIN agents a ON k.agent_id = a.id "
-        "WHERE (k.subject LIKE ? OR k.content LIKE ? OR k.tags LIKE ?)"
-    )
-    pattern = f"%{query}%"
-    params: list = [pattern, pattern, pattern]
+    params: list = []
+    if len(query.strip()) >= FTS_MIN_QUERY and _fts_ready(conn, db_path):
+        sql = (
+            "SELECT k.*, a.name AS agent_name "
+            "FROM knowledge_fts f "
+            "JOIN knowledge_store k ON k.id = f.rowid "
+            "JOIN agents a ON k.agent_id = a.id "
+            "WHERE knowledge_fts MATCH ?"
+        )
+        params.append(_fts_phrase(query))
+        order = " ORDER BY f.rank, k.updated_at DESC LIMIT ?"
+    else:
+        sql = (
+            "SELECT k.*, a.name AS agent_name "
+            "FROM knowledge_store k "
+            "JOIN agents a ON k.agent_id = a.id "
+            "WHERE (k.subject LIKE ? OR k.content LIKE ? OR k.tags LIKE ?)"
+        )
+        pattern = f"%{query}%"
+        params += [pattern, pattern, pattern]
+        order = " ORDER BY k.updated_at DESC LIMIT ?"
 
     if category_filter:
         sql += " AND k.category = ?"
         params.append(category_filter)
 
-    sql += " ORDER BY k.updated_at DESC LIMIT ?"
+    sql += order
     params.append(limit)
 
     rows = conn.execute(sql, params).fetchall()
@@ -3136,7 +5099,8 @@ def get_agent_memories(agent_id: int, memory_type: str = None,
     """Retrieve agent memories for prompt injection.
 
     Returns most important memories first.  Increments access_count on
-    each returned memory so frequently-used memories can be tracked.
+    each returned memory so frequently-used memories can be tracked (the
+    increment is deferred; see flush_accounting()).
     """
     conn = get_conn(db_path)
     sql = "SELECT * FROM agent_memory WHERE agent_id=?"
@@ -3157,34 +5121,54 @@ def get_agent_memories(agent_id: int, memory_type: str = None,
     params.append(limit)
 
     rows = conn.execute(sql, params).fetchall()
+    conn.close()
     results = [dict(r) for r in rows]
 
-    # Bump access counts
+    # Bump access counts (deferred — reads never take the write lock)
     if results:
-        ids = [r["id"] for r in results]
-        placeholders = ",".join("?" * len(ids))
-        conn.execute(
-            f"UPDATE agent_memory SET access_count = access_count + 1, "
-            f"last_accessed = ? WHERE id IN ({placeholders})",
-            [now] + ids,
-        )
-        conn.commit()
-
-    conn.close()
+        _accounting.add_hits(str(db_path or DB_PATH),
+                             [r["id"] for r in results], now)
     return results
 
 
+def touch_agent_memories(memory_ids: list,
+                         db_path: Optional[Path] = None) -> None:
+    """Record an access of memories already fetched by get_agent_memories().
+
+    Used when a cached prompt section re-injects the same memories, so
+    access_count keeps counting prompt uses without re-running the query.
+    """
+    if not memory_ids:
+        return
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    _accounting.add_hits(str(db_path or DB_PATH), memory_ids, now)
+
+
 def search_agent_memory(agent_id: int, query: str,
                         limit: int = 20,
                         db_path: Optional[Path] = None) -> list:
-    """Search an agent's memories by content LIKE matching."""
+    """Search an agent's active memories for a content substring.
+
+    Served from the FTS5 index and ranked by BM25, then importance and
+    recency. Queries shorter than FTS_MIN_QUERY characters fall back to
+    LIKE matching.
+    """
     conn = get_conn(db_path)
-    rows = conn.execute(
-        "SELECT * FROM agent_memory "
-        "WHERE agent_id=? AND active=1 AND content LIKE ? "
-        "ORDER BY importance DESC, created_at DESC LIMIT ?",
-        (agent_id, f"%{query}%", limit),
-    ).fetchall()
+    if len(query.strip()) >= FTS_MIN_QUERY and _fts_ready(conn, db_path):
+        rows = conn.execute(
+            "SELECT m.* FROM agent_memory_fts f "
+            "JOIN agent_memory m ON m.id = f.rowid "
+            "WHERE agent_memory_fts MATCH ? AND m.agent_id=? AND m.active=1 "
+            "ORDER BY f.rank, m.importance DESC, m.created_at DESC LIMIT ?",
+            (_fts_phrase(query), agent_id, limit),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM agent_memory "
+            "WHERE agent_id=? AND active=1 AND content LIKE ? "
+            "ORDER BY importance DESC, created_at DESC LIMIT ?",
+            (agent_id, f"%{query}%", limit),
+        ).fetchall()
     conn.close()
     return [dict(r) for r in rows]
 
@@ -3498,10 +5482,21 @@ def synthesize_memories(agent_id: int, older_than_days: int = 7,
 def get_audit_trail(agent_id: Optional[int] = None,
                     start_time: Optional[str] = None,
                     end_time: Optional[str] = None,
-                    db_path: Optional[Path] = None) -> list[dict]:
-    """Return audit log entries filtered by agent and/or time range."""
+                    db_path: Optional[Path] = None,
+                    limit: Optional[int] = None,
+                    after_id: Optional[int] = None,
+                    before_id: Optional[int] = None,
+                    include_details: bool = True) -> list[dict]:
+    """Return audit log entries filtered by agent and/or time range, newest first.
+
+    Supports the same keyset pagination as read_inbox() (``limit`` with
+    ``before_id``/``after_id``). With ``include_details=False`` the details
+    blob is neither read nor JSON-decoded.
+    """
+    flush_accounting(db_path or DB_PATH)
     conn = get_conn(db_path)
-    query = "SELECT * FROM audit_log WHERE 1=1"
+    columns = "*" if include_details else "id, event_type, agent_id, timestamp"
+    query = f"SELECT {columns} FROM audit_log WHERE 1=1"
     params: list = []
 
     if agent_id is not None:
@@ -3514,14 +5509,15 @@ def get_audit_trail(agent_id: Optional[int] = None,
         query += " AND timestamp <= ?"
         params.append(end_time)
 
-    query += " ORDER BY timestamp DESC"
+    query, params = _keyset(query, params, "id", after_id, before_id, limit)
     rows = conn.execute(query, params).fetchall()
     conn.close()
 
     results = []
     for r in rows:
         entry = dict(r)
-        entry["details"] = json.loads(entry["details"])
+        if include_details:
+            entry["details"] = json.loads(entry["details"])
         results.append(entry)
     return results
 
@@ -4568,6 +6564,8 @@ def post_to_channel(channel_id: int, from_agent_id: int, body: str,
                  f"[#{channel_id}] {sender_name}",
                  body),
             )
+    if members:
+        notify_queued(db_path)
     return {"ok": True, "message_id": msg_id, "notified": len(members)}
 
 
@@ -4633,36 +6631,13 @@ def get_channel_members(channel_id: int,
 def crew_dm(from_id: int, to_name: str, body: str,
             db_path: Optional[Path] = None) -> dict:
     """Send a direct message from one agent to another by name or title. Zero friction."""
-    conn = get_conn(db_path)
-    try:
-        # Exact name match first — prevents "Boss" matching "Crew-Boss"
-        row = conn.execute(
-            "SELECT id, name FROM agents WHERE LOWER(name) = LOWER(?) AND active=1",
-            (to_name,),
-        ).fetchone()
-        if not row:
-            # Exact title match
-            row = conn.execute(
-                "SELECT id, name FROM agents WHERE LOWER(title) = LOWER(?) AND active=1",
-                (to_name,),
-            ).fetchone()
-        if not row:
-            # Partial name match, but never match self
-            row = conn.execute(
-                "SELECT id, name FROM agents WHERE LOWER(name) LIKE LOWER(?) AND active=1 AND id!=?",
-                (f"%{to_name}%", from_id),
-            ).fetchone()
-        if not row:
-            # Partial title match
-            row = conn.execute(
-                "SELECT id, name FROM agents WHERE LOWER(title) LIKE LOWER(?) AND active=1 AND id!=?",
-                (f"%{to_name}%", from_id),
-            ).fetchone()
-        if not row:
-            return {"ok": False, "error": f"Agent '{to_name}' not found"}
-        to_id = row["id"]
-    finally:
-        conn.close()
+    # Exact name/title match first — prevents "Boss" matching "Crew-Boss";
+    # partial matches never match self
+    row = find_agent(to_name, active_only=True, partial=True,
+                     exclude_id=from_id, db_path=db_path)
+    if not row:
+        return {"ok": False, "error": f"Agent '{to_name}' not found"}
+    to_id = row["id"]
 
     try:
         result = send_message(from_id, to_id, "task",
@@ -5294,6 +7269,69 @@ def remove_skill_from_agent(agent_id: int, skill_name: str,
 # Skill Vetting (Guard safety pipeline)
 # ---------------------------------------------------------------------------
 
+_scan_cache_lock = threading.Lock()
+_scan_cache_stats = {"hits": 0, "misses": 0}
+
+
+def scan_skill_cached(skill_config: str, db_path: Optional[Path] = None) -> dict:
+    """security.scan_skill_content() through a persistent verdict cache.
+
+    Verdicts are keyed by compute_skill_hash (normalized JSON, so the
+    same catalog skill installed on many agents is scanned once) and
+    security.scanner_ruleset_version(). A change to the scanner rules
+    changes the version, so old verdicts stop matching and are pruned on
+    the next miss. Copies of a config that differ only in key order share
+    a verdict; its flags follow the order of the first copy scanned.
+    """
+    from security import scan_skill_content, compute_skill_hash, scanner_ruleset_version
+
+    content_hash = compute_skill_hash(skill_config)
+    ruleset = scanner_ruleset_version()
+    conn = get_conn(db_path)
+    try:
+        row = conn.execute(
+            "SELECT result FROM skill_scan_cache WHERE content_hash = ? AND ruleset = ?",
+            (content_hash, ruleset),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # database predates the cache table
+    finally:
+        conn.close()
+    with _scan_cache_lock:
+        _scan_cache_stats["hits" if row else "misses"] += 1
+    if row:
+        return json.loads(row["result"])
+
+    result = scan_skill_content(skill_config)
+    # Written synchronously: misses are rare, and a vet that is repeated
+    # right away (install_skill -> add_skill_to_agent) should hit.
+    try:
+        with db_write(db_path) as wconn:
+            wconn.execute("DELETE FROM skill_scan_cache WHERE ruleset != ?", (ruleset,))
+            wconn.execute(
+                "INSERT OR REPLACE INTO skill_scan_cache "
+                "(content_hash, ruleset, result, created_at) VALUES (?, ?, ?, ?)",
+                (content_hash, ruleset, json.dumps(result), time.time()),
+            )
+    except sqlite3.OperationalError:
+        pass
+    return result
+
+
+def get_skill_scan_cache_stats(db_path: Optional[Path] = None) -> dict:
+    """Process counters (hits, misses) plus the cached verdict count."""
+    with _scan_cache_lock:
+        stats = dict(_scan_cache_stats)
+    conn = get_conn(db_path)
+    try:
+        stats["entries"] = conn.execute("SELECT COUNT(*) FROM skill_scan_cache").fetchone()[0]
+    except sqlite3.OperationalError:
+        stats["entries"] = 0
+    finally:
+        conn.close()
+    return stats
+
+
 def vet_skill(skill_name: str, skill_config: str = "{}",
               source: str = "local", source_url: str = "",
               author: str = "human",
@@ -5307,7 +7345,7 @@ def vet_skill(skill_name: str, skill_config: str = "{}",
         dict with keys: skill_name, content_hash, registry_status,
         scan_result, can_add, requires_approval, reason.
     """
-    from security import scan_skill_content, compute_skill_hash
+    from security import compute_skill_hash
 
     content_hash = compute_skill_hash(skill_config)
 
@@ -5320,7 +7358,7 @@ def vet_skill(skill_name: str, skill_config: str = "{}",
     ).fetchone()
     conn.close()
 
-    scan_result = scan_skill_content(skill_config)
+    scan_result = scan_skill_cached(skill_config, db_path=db_path)
 
     if row:
         status = row["vet_status"]
@@ -5380,10 +7418,10 @@ def register_vetted_skill(skill_name: str, skill_config: str = "{}",
 
     Returns (True, registry_id) on success, (False, error) on failure.
     """
-    from security import scan_skill_content, compute_skill_hash
+    from security import compute_skill_hash
 
     content_hash = compute_skill_hash(skill_config)
-    scan_result = scan_skill_content(skill_config)
+    scan_result = scan_skill_cached(skill_config, db_path=db_path)
 
     # Parse description from config
     try:
@@ -5422,10 +7460,10 @@ def block_skill(skill_name: str, skill_config: str = "{}",
 
     Returns (True, message) on success, (False, error) on failure.
     """
-    from security import scan_skill_content, compute_skill_hash
+    from security import compute_skill_hash
 
     content_hash = compute_skill_hash(skill_config)
-    scan_result = scan_skill_content(skill_config)
+    scan_result = scan_skill_cached(skill_config, db_path=db_path)
 
     now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
     conn = get_conn(db_path)
@@ -5477,9 +7515,14 @@ def get_skill_registry(vet_status: Optional[str] = None,
 
 
 def check_skill_safety(skill_config: str, db_path: Optional[Path] = None) -> dict:
-    """Quick safety check without registering. Convenience wrapper."""
-    from security import scan_skill_content
-    return scan_skill_content(skill_config)
+    """Quick safety check without registering. Convenience wrapper.
+
+    With a db_path the verdict goes through scan_skill_cached.
+    """
+    if db_path is None:
+        from security import scan_skill_content
+        return scan_skill_content(skill_config)
+    return scan_skill_cached(skill_config, db_path=db_path)
 
 
 # Built-in skills that ship with Crew Bus — pre-vetted and safe
@@ -5,9 +5,9 @@ crew-bus CLI (v2) - command-line interface for the crew-bus message bus.
 Usage:
     crew-bus init <config.yaml>         Initialize DB and load hierarchy
     crew-bus send <from> <to> <type> <subject> [body]  Send a message
-    crew-bus inbox <agent>              Check agent inbox
+    crew-bus inbox <agent> [--before <id>]  Check agent inbox (50 per page)
     crew-bus status                     Show all agents
-    crew-bus audit <agent>              Show audit trail
+    crew-bus audit <agent> [--before <id>]  Show audit trail (50 per page)
     crew-bus quarantine <agent>         Quarantine an agent
     crew-bus restore <agent>            Restore an agent
     crew-bus terminate <agent>          Terminate an agent
@@ -29,11 +29,14 @@ Usage:
     crew-bus mailbox list <team>        Show team mailbox messages
     crew-bus mailbox read <msg_id>      Mark mailbox message as read
     crew-bus mailbox send <agent> <sev> <subj> <body>  Send to team mailbox
+    crew-bus worker                     Run an agent worker process (one per core is fine)
+    crew-bus workers                    Show per-worker message throughput
 """
 
 import argparse
 import json
 import sys
+import time
 from pathlib import Path
 
 import bus
@@ -116,7 +119,8 @@ def cmd_inbox(args):
     """Display the inbox for an agent."""
     agent = _resolve_agent(args.agent)
     status_filter = args.filter if hasattr(args, "filter") and args.filter else None
-    messages = bus.read_inbox(agent["id"], status_filter=status_filter)
+    messages = bus.read_inbox(agent["id"], status_filter=status_filter,
+                              limit=args.limit, before_id=args.before)
 
     print(f"\nInbox for {agent['name']} ({agent['agent_type']}) - {len(messages)} message(s)")
     print("-" * 60)
@@ -141,6 +145,8 @@ def cmd_inbox(args):
                 preview += "..."
             print(f"    Body: {preview}")
         print()
+    if len(messages) == args.limit:
+        print(f"  More: crew-bus inbox {args.agent} --before {messages[-1]['id']}")
 
 
 def cmd_status(args):
@@ -173,10 +179,43 @@ def cmd_status(args):
     print()
 
 
+def cmd_worker(args):
+    """Run an agent worker in the foreground until Ctrl-C.
+
+    Workers claim messages with leases, so several can share one bus.
+    """
+    import agent_worker
+
+    agent_worker.start_worker()
+    try:
+        while agent_worker._worker_thread and agent_worker._worker_thread.is_alive():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent_worker.stop_worker()
+
+
+def cmd_workers(args):
+    """Show per-worker claim/complete counters."""
+    workers = bus.get_worker_stats()
+    if not workers:
+        print("No workers have claimed messages yet.")
+        return
+
+    print(f"\n  {'Worker':<32} {'Claimed':>8} {'Done':>8} {'Expired':>8} {'/min':>7}  Last seen")
+    print("-" * 90)
+    for w in workers:
+        print(f"  {w['worker_id']:<32} {w['claimed']:>8} {w['completed']:>8} "
+              f"{w['expired']:>8} {w['per_minute']:>7}  {w['last_seen']}")
+    print()
+
+
 def cmd_audit(args):
     """Show audit trail for an agent."""
     agent = _resolve_agent(args.agent)
-    entries = bus.get_audit_trail(agent_id=agent["id"])
+    entries = bus.get_audit_trail(agent_id=agent["id"], limit=args.limit,
+                                  before_id=args.before)
 
     print(f"\nAudit trail for {agent['name']} - {len(entries)} entries")
     print("-" * 60)
@@ -189,6 +228,8 @@ def cmd_audit(args):
         print(f"  [{entry['timestamp']}] {entry['event_type']}")
         print(f"    {detail_str}")
         print()
+    if len(entries) == args.limit:
+        print(f"  More: crew-bus audit {args.agent} --before {entries[-1]['id']}")
 
 
 def cmd_quarantine(args):
@@ -873,15 +914,27 @@ def main():
     p = sub.add_parser("inbox", help="Check agent inbox")
     p.add_argument("agent", help="Agent name or ID")
     p.add_argument("-f", "--filter", choices=bus.VALID_MESSAGE_STATUSES, help="Filter by status")
+    p.add_argument("-n", "--limit", type=int, default=50, help="Messages per page (default 50)")
+    p.add_argument("--before", type=int, help="Show messages older than this message id")
     p.set_defaults(func=cmd_inbox)
 
     # status
     p = sub.add_parser("status", help="Show all agents")
     p.set_defaults(func=cmd_status)
 
+    # worker
+    p = sub.add_parser("worker", help="Run an agent worker process")
+    p.set_defaults(func=cmd_worker)
+
+    # workers
+    p = sub.add_parser("workers", help="Show per-worker message throughput")
+    p.set_defaults(func=cmd_workers)
+
     # audit
     p = sub.add_parser("audit", help="Show audit trail")
     p.add_argument("agent", help="Agent name or ID")
+    p.add_argument("-n", "--limit", type=int, default=50, help="Entries per page (default 50)")
+    p.add_argument("--before", type=int, help="Show entries older than this audit id")
     p.set_defaults(func=cmd_audit)
 
     # quarantine
@@ -0,0 +1,219 @@
+"""
+Token budgeting for LLM prompts.
+
+call_llm used to send the system prompt plus up to 500 history messages no
+matter how large they were, and _build_system_prompt cut its sections off
+at a fixed character count. This module estimates prompt size in tokens
+per provider and fits a prompt into a budget:
+
+    text, stats = context_budget.fit_sections(sections, max_tokens)
+    messages, stats = context_budget.fit_messages(system, history, user_msg,
+                                                  budget, provider="claude")
+
+  - estimate_tokens() is a local heuristic (UTF-8 bytes / provider ratio),
+    not a tokenizer; it errs slightly high so prompts stay inside limits
+  - message estimates are cached per message id, so a long chat history
+    is measured once, not on every turn
+  - sections are (priority, text) pairs; the lowest-priority ones are
+    trimmed or dropped first and the rest keep their order
+  - history keeps the newest messages that fit; older ones are replaced by
+    a short note (optionally built by a summarize callback)
+
+Stdlib only.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+# UTF-8 bytes per token. English runs ~4 bytes/token on the BPE tokenizers
+# these providers use; CJK and emoji cost more bytes per char but also more
+# tokens, so bytes track tokens better than chars do.
+BYTES_PER_TOKEN = {
+    "claude": 3.5,
+    "ollama": 3.8,
+}
+DEFAULT_BYTES_PER_TOKEN = 4.0
+MESSAGE_OVERHEAD = 4     # role/separator tokens per chat message
+
+# Context window per provider, in tokens. Ollama's is whatever num_ctx the
+# server runs with, not the model's maximum.
+CONTEXT_WINDOWS = {
+    "claude": 200_000,
+    "openai": 128_000,
+    "kimi": 128_000,
+    "groq": 128_000,
+    "gemini": 1_000_000,
+    "xai": 256_000,
+    "ollama": int(os.environ.get("OLLAMA_NUM_CTX", "8192")),
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+RESPONSE_RESERVE = 1280  # room for the reply (max_tokens=1024) plus slack
+DEFAULT_PROMPT_BUDGET = 24_000  # cost/latency cap even for huge windows
+
+MIN_SECTION_TOKENS = 48  # a section trimmed below this is dropped instead
+TOKEN_CACHE_MAX = 50_000
+
+_lock = threading.Lock()
+_token_cache: "OrderedDict[tuple, int]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _ratio(provider: str) -> float:
+    return BYTES_PER_TOKEN.get(provider, DEFAULT_BYTES_PER_TOKEN)
+
+
+def estimate_tokens(text: str, provider: str = "") -> int:
+    """Estimated token count of ``text`` for ``provider``."""
+    if not text:
+        return 0
+    return int(len(text.encode("utf-8")) / _ratio(provider)) + 1
+
+
+def message_tokens(msg: dict, provider: str = "") -> int:
+    """Estimated tokens for one chat message, cached by its "id" if it has one."""
+    content = msg.get("content") or ""
+    msg_id = msg.get("id")
+    if msg_id is None:
+        return estimate_tokens(content, provider) + MESSAGE_OVERHEAD
+    # The length is part of the key: streamed replies rewrite their body
+    key = (msg_id, len(content), _ratio(provider))
+    with _lock:
+        tokens = _token_cache.get(key)
+        if tokens is not None:
+            _stats["hits"] += 1
+            _token_cache.move_to_end(key)
+            return tokens
+        _stats["misses"] += 1
+    tokens = estimate_tokens(content, provider) + MESSAGE_OVERHEAD
+    with _lock:
+        _token_cache[key] = tokens
+        if len(_token_cache) > TOKEN_CACHE_MAX:
+            _token_cache.popitem(last=False)
+    return tokens
+
+
+def context_window(provider: str) -> int:
+    return CONTEXT_WINDOWS.get(provider, DEFAULT_CONTEXT_WINDOW)
+
+
+def prompt_budget(provider: str, cap: Optional[int] = None) -> int:
+    """Tokens available for the prompt: the provider's window minus room for
+    the reply, capped at ``cap`` (default DEFAULT_PROMPT_BUDGET)."""
+    cap = cap or DEFAULT_PROMPT_BUDGET
+    return max(256, min(cap, context_window(provider) - RESPONSE_RESERVE))
+
+
+def _trim_text(text: str, max_tokens: int, provider: str, marker: str) -> str:
+    """Cut ``text`` to about ``max_tokens``, preferring a line boundary."""
+    max_bytes = int((max_tokens - estimate_tokens(marker, provider)) * _ratio(provider))
+    if max_bytes <= 0:
+        return ""
+    cut = text.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
+    newline = cut.rfind("\n")
+    if newline > len(cut) // 2:
+        cut = cut[:newline]
+    return cut.rstrip() + marker
+
+
+def fit_sections(sections: list, max_tokens: int, provider: str = "",
+                 separator: str = "\n\n") -> tuple:
+    """Join (priority, text) sections, trimming to ``max_tokens``.
+
+    Priority 0 is kept whole unless it alone overflows; higher numbers go
+    first, and within a priority the later section goes first. Returns
+    (text, stats) with stats {tokens, trimmed, dropped}.
+    """
+    texts = [text for _, text in sections]
+    sizes = [estimate_tokens(t, provider) for t in texts]
+    sep = estimate_tokens(separator, provider)
+    total = sum(sizes) + sep * max(0, len(texts) - 1)
+    trimmed = dropped = 0
+
+    order = sorted((i for i in range(len(sections)) if sections[i][0] > 0),
+                   key=lambda i: (-sections[i][0], -i))
+    for i in order:
+        if total <= max_tokens:
+            break
+        keep = sizes[i] - (total - max_tokens)
+        if keep >= MIN_SECTION_TOKENS:
+            texts[i] = _trim_text(texts[i], keep, provider, "\n[trimmed]")
+            trimmed += 1
+        else:
+            texts[i] = ""
+            dropped += 1
+        new_size = estimate_tokens(texts[i], provider)
+        total -= sizes[i] - new_size + (0 if texts[i] else sep)
+        sizes[i] = new_size
+
+    text = separator.join(t for t in texts if t)
+    if total > max_tokens:  # pinned sections alone overflow
+        text = _trim_text(text, max_tokens, provider, "\n[trimmed]")
+        trimmed += 1
+    return text, {"tokens": estimate_tokens(text, provider),
+                  "trimmed": trimmed, "dropped": dropped}
+
+
+def fit_messages(system_prompt: str, history: Optional[list], user_message: str,
+                 budget: int, provider: str = "",
+                 summarize: Optional[Callable[[list], str]] = None) -> tuple:
+    """Build the provider message list within ``budget`` tokens.
+
+    Keeps the system prompt and the new user message, then as much recent
+    history as fits. Dropped history is replaced by one note, from
+    ``summarize(dropped_messages)`` if given. Message "id" keys are used
+    for the token cache and stripped from the output.
+
+    Returns (messages, stats) with stats {prompt_tokens, budget,
+    history_kept, history_dropped}.
+    """
+    history = history or []
+    fixed = (estimate_tokens(system_prompt, provider)
+             + estimate_tokens(user_message, provider) + 2 * MESSAGE_OVERHEAD)
+    sizes = [message_tokens(m, provider) for m in history]
+    available = budget - fixed
+
+    def newest_fitting(room):
+        used, start = 0, len(history)
+        while start > 0 and used + sizes[start - 1] <= room:
+            start -= 1
+            used += sizes[start]
+        return start, used
+
+    start, used = newest_fitting(available)
+    note = None
+    if start > 0:
+        note_budget = min(256, max(0, available // 8))
+        start, used = newest_fitting(available - note_budget)
+        dropped = history[:start]
+        text = summarize(dropped) if summarize else ""
+        text = text or f"[{len(dropped)} earlier messages omitted to fit the context window]"
+        if estimate_tokens(text, provider) + MESSAGE_OVERHEAD > note_budget:
+            text = _trim_text(text, note_budget - MESSAGE_OVERHEAD, provider, " …")
+        if text:
+            note = {"role": "user", "content": text}
+            used += estimate_tokens(text, provider) + MESSAGE_OVERHEAD
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if note:
+        messages.append(note)
+    messages.extend({"role": m["role"], "content": m["content"]}
+                    for m in history[start:])
+    messages.append({"role": "user", "content": user_message})
+    return messages, {"prompt_tokens": fixed + used, "budget": budget,
+                      "history_kept": len(history) - start,
+                      "history_dropped": start}
+
+
+def get_stats() -> dict:
+    """Token cache counters: hits, misses, size."""
+    with _lock:
+        stats = dict(_stats)
+        stats["size"] = len(_token_cache)
+    return stats
+
+
+def clear_cache() -> None:
+    with _lock:
+        _token_cache.clear()
@@ -23,6 +23,7 @@ from pathlib import Path
 from typing import Optional
 
 import bus
+import http_pool
 
 # ---------------------------------------------------------------------------
 # Credential helpers
@@ -92,7 +93,7 @@ def _send_webhook(webhook_url: str, content: str = None,
     req.add_header("User-Agent", "CrewBus/1.0")
 
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
+        with http_pool.urlopen(req, timeout=15) as resp:
             if resp.status == 204:
                 return {"ok": True}
             raw = resp.read().decode("utf-8")
@@ -0,0 +1,328 @@
+"""
+Shared keep-alive HTTP connection pool for Crew Bus.
+
+Every LLM provider call and bridge request used to go through a fresh
+urllib.request.urlopen() — a new TCP (and TLS) handshake per request, per
+provider in the fallback chain. This module keeps idle http.client
+connections per (scheme, host, port) and reuses them.
+
+Drop-in for the urllib calls it replaces:
+
+    with http_pool.urlopen(req, timeout=30) as resp:
+        data = resp.read()
+
+  - accepts a urllib.request.Request or a URL string
+  - raises urllib.error.HTTPError for 4xx/5xx (body readable via e.read())
+  - raises urllib.error.URLError for connection failures
+  - follows redirects like urllib's default handler
+
+Requests that need a proxy (per the environment) or use a non-HTTP scheme
+fall through to urllib.request.urlopen. Stdlib only.
+
+Cancellation: requests made inside ``with cancel_scope(token):`` register
+their live connection with the CancelToken; token.cancel() shuts those
+sockets down, so a thread blocked in a slow LLM call unblocks right away
+instead of running on after its caller gave up.
+"""
+
+import contextlib
+import http.client
+import io
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Optional, Union
+
+IDLE_TIMEOUT = 60.0      # seconds an idle connection is kept before eviction
+MAX_IDLE_PER_HOST = 8    # idle connections kept per (scheme, host, port)
+MAX_REDIRECTS = 5
+
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_DEFAULT_USER_AGENT = "Python-urllib/%d.%d" % sys.version_info[:2]
+
+_lock = threading.Lock()
+_idle: dict = {}         # (scheme, host, port) -> [(conn, last_used), ...]
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "retries": 0, "errors": 0}
+_local = threading.local()
+
+
+class CancelToken:
+    """Cancels every in-flight request made under its cancel_scope()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conns: set = set()
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            conns = list(self._conns)
+        for conn in conns:
+            sock = conn.sock
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def _register(self, conn) -> None:
+        with self._lock:
+            if self.cancelled:
+                raise urllib.error.URLError("request cancelled")
+            self._conns.add(conn)
+
+    def _unregister(self, conn) -> None:
+        with self._lock:
+            self._conns.discard(conn)
+
+
+@contextlib.contextmanager
+def cancel_scope(token: CancelToken):
+    """Route this thread's requests through ``token`` for cancellation."""
+    prev = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = prev
+
+
+def cancelled() -> bool:
+    """True if the current thread's cancel scope has been cancelled."""
+    token = getattr(_local, "token", None)
+    return token is not None and token.cancelled
+
+
+class PooledResponse:
+    """File-like response that returns its connection to the pool on close.
+
+    Mirrors the parts of urllib's response object the callers use: read(),
+    readline(), iteration over lines, status/getcode(), headers, url.
+    """
+
+    def __init__(self, resp: http.client.HTTPResponse, conn, key: tuple,
+                 url: str, token: Optional[CancelToken] = None):
+        self._resp = resp
+        self._conn = conn
+        self._key = key
+        self._token = token
+        self.url = url
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+        self.msg = resp.headers
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._resp.read(amt) if amt is not None else self._resp.read()
+
+    def readline(self, limit: int = -1) -> bytes:
+        return self._resp.readline(limit)
+
+    def __iter__(self):
+        while True:
+            line = self._resp.readline()
+            if not line:
+                return
+            yield line
+
+    def getcode(self) -> int:
+        return self.status
+
+    def geturl(self) -> str:
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if self._token is not None:
+            self._token._unregister(conn)
+        resp = self._resp
+        if resp.isclosed() and not resp.will_close:
+            _release(self._key, conn)  # fully read; safe to reuse
+        else:
+            resp.close()  # partially read or server asked to close
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _key_for(parts) -> tuple:
+    scheme = parts.scheme.lower()
+    port = parts.port or (443 if scheme == "https" else 80)
+    return (scheme, (parts.hostname or "").lower(), port)
+
+
+def _acquire(key: tuple, timeout: float):
+    """Return (conn, reused). Evicts idle connections past IDLE_TIMEOUT."""
+    now = time.monotonic()
+    with _lock:
+        idle = _idle.get(key, [])
+        while idle:
+            conn, last_used = idle.pop()
+            if now - last_used > IDLE_TIMEOUT:
+                _stats["evictions"] += 1
+                conn.close()
+                continue
+            _stats["hits"] += 1
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        _stats["misses"] += 1
+    scheme, host, port = key
+    cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+    return cls(host, port, timeout=timeout), False
+
+
+def _release(key: tuple, conn) -> None:
+    with _lock:
+        idle = _idle.setdefault(key, [])
+        if len(idle) >= MAX_IDLE_PER_HOST:
+            conn.close()
+            return
+        idle.append((conn, time.monotonic()))
+
+
+def _uses_proxy(parts) -> bool:
+    proxies = urllib.request.getproxies()
+    if parts.scheme not in proxies:
+        return False
+    return not urllib.request.proxy_bypass(parts.hostname or "")
+
+
+def _send(method: str, url: str, body: Optional[bytes], headers: dict,
+          timeout: float) -> PooledResponse:
+    parts = urllib.parse.urlsplit(url)
+    key = _key_for(parts)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    headers = dict(headers)
+    headers.setdefault("User-Agent", _DEFAULT_USER_AGENT)
+    if body is not None:
+        headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+
+    token = getattr(_local, "token", None)
+
+    # A pooled connection may have been closed by the server while idle;
+    # that surfaces on first use, so retry once on a fresh connection.
+    for attempt in (1, 2):
+        conn, reused = _acquire(key, timeout)
+        _local.reused = reused
+        if token is not None:
+            try:
+                token._register(conn)
+            except urllib.error.URLError:
+                conn.close()
+                raise
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+        except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                ConnectionResetError, BrokenPipeError) as e:
+            conn.close()
+            if token is not None:
+                token._unregister(conn)
+                if token.cancelled:
+                    raise urllib.error.URLError("request cancelled")
+            if reused and attempt == 1:
+                with _lock:
+                    _stats["retries"] += 1
+                continue
+            with _lock:
+                _stats["errors"] += 1
+            raise urllib.error.URLError(e)
+        except OSError as e:
+            conn.close()
+            if token is not None:
+                token._unregister(conn)
+            with _lock:
+                _stats["errors"] += 1
+            raise urllib.error.URLError(e)
+        except Exception:
+            conn.close()
+            if token is not None:
+                token._unregister(conn)
+            raise
+        return PooledResponse(resp, conn, key, url, token)
+    raise urllib.error.URLError("connection pool retry exhausted")  # pragma: no cover
+
+
+def urlopen(req: Union[str, urllib.request.Request],
+            data: Optional[bytes] = None, timeout: float = 60) -> PooledResponse:
+    """Pooled replacement for urllib.request.urlopen (see module docstring)."""
+    if isinstance(req, str):
+        req = urllib.request.Request(req, data=data)
+    elif data is not None:
+        req.data = data
+
+    url = req.full_url
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or _uses_proxy(parts):
+        return urllib.request.urlopen(req, timeout=timeout)
+
+    method = req.get_method()
+    body = req.data
+    headers = {k.title(): v for k, v in req.header_items()}
+
+    for _ in range(MAX_REDIRECTS + 1):
+        resp = _send(method, url, body, headers, timeout)
+        if resp.status in _REDIRECT_CODES and resp.headers.get("Location"):
+            location = urllib.parse.urljoin(url, resp.headers["Location"])
+            resp.read()
+            resp.close()
+            if urllib.parse.urlsplit(location).scheme not in ("http", "https"):
+                raise urllib.error.HTTPError(url, resp.status,
+                                             "redirect to non-HTTP URL",
+                                             resp.headers, None)
+            if resp.status == 303 or (resp.status in (301, 302) and method == "POST"):
+                method, body = "GET", None
+                headers = {k: v for k, v in headers.items()
+                           if k not in ("Content-Type", "Content-Length")}
+            url = location
+            continue
+        if resp.status >= 400:
+            err_body = resp.read()
+            resp.close()
+            raise urllib.error.HTTPError(url, resp.status, resp.reason,
+                                         resp.headers, io.BytesIO(err_body))
+        return resp
+    raise urllib.error.HTTPError(url, resp.status, "too many redirects",
+                                 resp.headers, None)
+
+
+def last_reused() -> bool:
+    """True if this thread's most recent request reused a pooled connection."""
+    return getattr(_local, "reused", False)
+
+
+def get_stats() -> dict:
+    """Pool counters: hits, misses, evictions, retries, errors, idle."""
+    with _lock:
+        stats = dict(_stats)
+        stats["idle"] = sum(len(v) for v in _idle.values())
+    return stats
+
+
+def close_all() -> None:
+    """Close every idle pooled connection."""
+    with _lock:
+        pools = list(_idle.values())
+        _idle.clear()
+    for idle in pools:
+        for conn, _ in idle:
+            conn.close()
@@ -24,6 +24,7 @@ from pathlib import Path
 from typing import Optional
 
 import bus
+import http_pool
 
 # ---------------------------------------------------------------------------
 # Credential helpers
@@ -102,7 +103,7 @@ def _get_token(db_path: Optional[Path] = None) -> str:
     req.add_header("Content-Type", "application/x-www-form-urlencoded")
 
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
+        with http_pool.urlopen(req, timeout=15) as resp:
             result = json.loads(resp.read().decode("utf-8"))
         if "access_token" in result:
             _access_token = result["access_token"]
@@ -130,7 +131,7 @@ def _api_request(method: str, endpoint: str, data: dict = None,
     req.add_header("User-Agent", "CrewBus/1.0 (by /u/" + creds["reddit_username"] + ")")
 
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
+        with http_pool.urlopen(req, timeout=30) as resp:
             raw = resp.read().decode("utf-8")
             return json.loads(raw) if raw.strip() else {"ok": True}
     except urllib.error.HTTPError as e:
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Benchmark the bus durability profiles (safe / balanced / fast).
+
+For each profile, builds a fresh temp database with a small crew and
+measures send_message throughput (serial and 10 concurrent senders) and
+read_inbox latency on the resulting history.
+
+Usage:
+  python3 scripts/bench_db_profiles.py [--messages 500] [--reads 200]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bus  # noqa: E402
+
+
+def _setup(db_path: Path, profile: str) -> list:
+    bus.init_db(db_path=db_path)
+    bus.set_db_profile(profile, db_path=db_path)
+    conn = bus.get_conn(db_path)
+    conn.execute(
+        "INSERT INTO agents (name, agent_type, status, active) "
+        "VALUES ('Human', 'human', 'active', 1)")
+    for i in range(11):
+        conn.execute(
+            "INSERT INTO agents (name, agent_type, status, active) "
+            "VALUES (?, 'worker', 'active', 1)", (f"Worker-{i}",))
+    conn.commit()
+    return [r["id"] for r in conn.execute(
+        "SELECT id FROM agents WHERE agent_type='worker' ORDER BY id")]
+
+
+def _bench_profile(profile: str, messages: int, reads: int) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix=f"crewbus-{profile}-"))
+    db_path = tmp / "bench.db"
+    try:
+        workers = _setup(db_path, profile)
+        receiver = workers[0]
+
+        start = time.perf_counter()
+        for i in range(messages):
+            bus.send_message(workers[1], receiver, "report", f"serial {i}",
+                             body="x" * 200, db_path=db_path)
+        serial = messages / (time.perf_counter() - start)
+
+        per_thread = max(1, messages // 10)
+
+        def _sender(idx):
+            for i in range(per_thread):
+                bus.send_message(workers[1 + idx], receiver, "report",
+                                 f"burst {idx}-{i}", body="x" * 200,
+                                 db_path=db_path)
+
+        threads = [threading.Thread(target=_sender, args=(i,)) for i in range(10)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        concurrent = per_thread * 10 / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(reads):
+            bus.read_inbox(receiver, db_path=db_path)
+        read_ms = (time.perf_counter() - start) / reads * 1000
+
+        return {"profile": profile, "serial": serial,
+                "concurrent": concurrent, "read_ms": read_ms}
+    finally:
+        bus.close_thread_connections()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'send serial':>14} {'send 10 thr':>14} {'read_inbox':>12}")
+    for profile in bus.DB_PROFILES:
+        r = _bench_profile(profile, args.messages, args.reads)
+        print(f"{r['profile']:<10} {r['serial']:>10.0f} m/s {r['concurrent']:>10.0f} m/s "
+              f"{r['read_ms']:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
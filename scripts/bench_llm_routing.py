@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Benchmark latency-aware routing and hedged LLM requests on stub providers.
+
+Replaces agent_worker._call_provider with local stubs (no network) that
+sleep for a drawn latency and give up early when their request is
+cancelled, then sends the same workload through call_llm in three modes:
+
+  static  — configured fallback order, no hedging (the old behaviour)
+  routed  — fallbacks ordered by observed latency / error rate
+  hedged  — routed, plus a hedge to the next provider past the p95
+
+Stub providers (milliseconds, scaled by --scale):
+  kimi    primary; 40 typical, 1500 on --tail of calls (keep it under 5%
+          so the p95 hedge delay sits above the typical case), fails 4%
+  openai  first in the configured fallback order; 120 steady
+  groq    second in the configured order; 25 steady
+
+Reports per-request latency percentiles and how many provider calls the
+workload made (hedging trades extra calls for a shorter tail).
+
+Usage:
+  python3 scripts/bench_llm_routing.py [--requests 200] [--clients 8]
+                                       [--tail 0.03] [--scale 1.0]
+"""
+
+import argparse
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agent_worker  # noqa: E402
+import bus  # noqa: E402
+import http_pool  # noqa: E402
+
+
+def _make_stub(tail: float, scale: float, rng: random.Random, calls: list):
+    lock = threading.Lock()
+
+    def draw(provider):
+        with lock:
+            calls.append(provider)
+            if provider == "kimi":
+                if rng.random() < 0.04:
+                    return 5, False
+                return (1500 if rng.random() < tail else rng.uniform(30, 50)), True
+            if provider == "openai":
+                return rng.uniform(110, 130), True
+            return rng.uniform(20, 30), True
+
+    def stub(provider, messages, model, db_path):
+        ms, ok = draw(provider)
+        deadline = time.monotonic() + ms * scale / 1000
+        while time.monotonic() < deadline:
+            if http_pool.cancelled():
+                return f"(Error: {provider} request cancelled)"
+            time.sleep(0.002)
+        return f"reply from {provider}" if ok else f"(API error from {provider})"
+
+    return stub
+
+
+def _run_mode(db_path: Path, mode: str, args) -> dict:
+    bus.set_config("llm_routing", "static" if mode == "static" else "latency",
+                   db_path=db_path)
+    bus.set_config("llm_hedge", "on" if mode == "hedged" else "off", db_path=db_path)
+    agent_worker._router.reset()
+    agent_worker._circuit = agent_worker._CircuitBreaker(failure_threshold=3,
+                                                         cooldown_seconds=60)
+    calls: list = []
+    latencies: list = []
+    stub = _make_stub(args.tail, args.scale, random.Random(7), calls)
+    counter = iter(range(args.requests))
+    counter_lock = threading.Lock()
+
+    def client():
+        while True:
+            with counter_lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            start = time.perf_counter()
+            agent_worker.call_llm("You are a benchmark.", f"request {mode} {n}",
+                                  model="kimi", db_path=db_path)
+            with counter_lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    with patch("agent_worker._call_provider", side_effect=stub), \
+            patch("agent_worker.HEDGE_MIN_DELAY", 0.05 * args.scale):
+        # Warm-up so routed/hedged start with estimates, as a running crew would
+        for n in range(agent_worker.ROUTER_MIN_SAMPLES * 2):
+            agent_worker.call_llm("You are a benchmark.", f"warmup {mode} {n}",
+                                  model="kimi", db_path=db_path)
+        calls.clear()
+        threads = [threading.Thread(target=client) for _ in range(args.clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    return {"mode": mode, "p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99),
+            "max": latencies[-1], "calls": len(calls)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--tail", type=float, default=0.03,
+                        help="fraction of primary calls that hit the slow tail")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply every stub latency by this")
+    args = parser.parse_args()
+    logging.getLogger("agent_worker").setLevel(logging.ERROR)
+
+    tmp = Path(tempfile.mkdtemp(prefix="crewbus-routing-"))
+    db_path = tmp / "bench.db"
+    try:
+        bus.init_db(db_path=db_path)
+        bus.set_config("fallback_order", "openai,groq", db_path=db_path)
+
+        print(f"{args.requests} requests, {args.clients} clients, "
+              f"primary tail {args.tail:.0%}")
+        print(f"{'mode':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'max ms':>8} {'calls':>7}")
+        for mode in ("static", "routed", "hedged"):
+            r = _run_mode(db_path, mode, args)
+            print(f"{r['mode']:<8} {r['p50']:>8.0f} {r['p95']:>8.0f} {r['p99']:>8.0f} "
+                  f"{r['max']:>8.0f} {r['calls']:>7}")
+    finally:
+        bus.close_thread_connections()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Benchmark system prompt assembly for a 50-agent crew.
+
+Builds a fresh temp database with a human, Crew Boss, Guardian, managers
+and workers (each with skills and memories), then times
+agent_worker._build_system_prompt for every agent in three modes:
+
+  cold   — prompt-fragment cache cleared before each build (the old cost)
+  warm   — nothing changed since the last build (all sections reused)
+  dirty  — one memory written for the agent before each build (only the
+           memory sections are rebuilt)
+
+Usage:
+  python3 scripts/bench_prompt_build.py [--agents 50] [--rounds 20]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agent_worker  # noqa: E402
+import bus  # noqa: E402
+
+
+def _setup(db_path: Path, agents: int) -> list:
+    bus.init_db(db_path=db_path)
+    conn = bus.get_conn(db_path)
+    conn.execute(
+        "INSERT INTO agents (name, agent_type, role, status, active) "
+        "VALUES ('Human', 'human', 'human', 'active', 1)")
+    conn.execute(
+        "INSERT INTO agents (name, agent_type, role, parent_agent_id, status, active) "
+        "VALUES ('Crew Boss', 'right_hand', 'right_hand', 1, 'active', 1)")
+    conn.execute(
+        "INSERT INTO agents (name, agent_type, role, parent_agent_id, status, active) "
+        "VALUES ('Guardian', 'guardian', 'security', 2, 'active', 1)")
+    managers = []
+    for i in range(max(1, (agents - 2) // 8)):
+        cur = conn.execute(
+            "INSERT INTO agents (name, agent_type, role, parent_agent_id, "
+            "description, status, active) VALUES (?, 'manager', 'manager', 2, ?, "
+            "'active', 1)", (f"Manager-{i}", f"Runs team {i}"))
+        managers.append(cur.lastrowid)
+    for i in range(agents - 2 - len(managers)):
+        conn.execute(
+            "INSERT INTO agents (name, agent_type, role, parent_agent_id, "
+            "description, status, active) VALUES (?, 'worker', 'worker', ?, ?, "
+            "'active', 1)",
+            (f"Worker-{i}", managers[i % len(managers)], f"Handles task type {i}"))
+    conn.commit()
+    rows = conn.execute(
+        "SELECT id, name, agent_type, description FROM agents "
+        "WHERE agent_type != 'human' ORDER BY id").fetchall()
+
+    # Skills inserted directly: add_skill_to_agent needs Guard activation
+    for r in rows:
+        for s in range(3):
+            conn.execute(
+                "INSERT INTO agent_skills (agent_id, skill_name, skill_config, added_at) "
+                "VALUES (?, ?, ?, strftime('%Y-%m-%dT%H:%M:%SZ','now'))",
+                (r["id"], f"skill-{s}",
+                 '{"description": "Does a thing", "instructions": "Be precise."}'))
+    conn.commit()
+    conn.close()
+
+    for r in rows:
+        for m in range(30):
+            bus.remember(r["id"], f"Memory {m} for {r['name']}: the human "
+                         "prefers concise answers with concrete next steps.",
+                         importance=1 + m % 10, db_path=db_path)
+        bus.remember(r["id"], "Forgot to cite sources once.",
+                     memory_type="error", db_path=db_path)
+        bus.remember(r["id"], "Bullet lists land well.",
+                     memory_type="learning", db_path=db_path)
+    for k in range(20):
+        bus.store_knowledge(rows[0]["id"], "lesson", f"Lesson {k}",
+                            {"note": "keep it short"}, db_path=db_path)
+    return [dict(r) for r in rows]
+
+
+def _time_builds(agents: list, db_path: Path, rounds: int, before=None) -> float:
+    """Mean milliseconds per _build_system_prompt call."""
+    calls = 0
+    elapsed = 0.0
+    for _ in range(rounds):
+        for a in agents:
+            if before:
+                before(a)
+            start = time.perf_counter()
+            agent_worker._build_system_prompt(
+                a["agent_type"], a["name"], a["description"],
+                agent_id=a["id"], db_path=db_path)
+            elapsed += time.perf_counter() - start
+            calls += 1
+    return elapsed / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="crewbus-prompt-"))
+    db_path = tmp / "bench.db"
+    try:
+        agents = _setup(db_path, args.agents)
+
+        cold = _time_builds(agents, db_path, args.rounds,
+                            before=lambda a: agent_worker.clear_prompt_cache())
+        agent_worker.clear_prompt_cache()
+        _time_builds(agents, db_path, 1)  # prime
+        warm = _time_builds(agents, db_path, args.rounds)
+        dirty = _time_builds(
+            agents, db_path, args.rounds,
+            before=lambda a: bus.remember(a["id"], "A new fact.", db_path=db_path))
+
+        print(f"{len(agents)} agents, {args.rounds} rounds")
+        print(f"{'mode':<8} {'ms/build':>10} {'speedup':>9}")
+        for mode, ms in (("cold", cold), ("warm", warm), ("dirty", dirty)):
+            print(f"{mode:<8} {ms:>10.3f} {cold / ms:>8.1f}x")
+    finally:
+        bus.close_thread_connections()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
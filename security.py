@@ -129,45 +129,128 @@ class SecurityAgent:
                 time_window_hours (int): Window that was scanned.
         """
         agent = bus.get_agent_status(agent_id, self.db_path)
+        now = datetime.now(timezone.utc)
+        start_iso = (now - timedelta(hours=time_window_hours)).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        )
+        activity = bus.get_agent_activity(
+            start_iso, agent_ids=[agent_id], db_path=self.db_path
+        )
+        return self._evaluate_agent(
+            agent, activity.get(agent_id, {}), time_window_hours, now
+        )
+
+    def scan_all_agents(self) -> list:
+        """Run the behavior scan on every active agent.
+
+        Skips the human principal (humans are not subject to mutiny
+        detection). Skips this security agent itself to avoid self-referential
+        false positives. Counts for the whole crew come from one read of the
+        precomputed activity counters (see bus.get_agent_activity) rather
+        than per-agent queries over messages and the audit log.
+
+        Returns:
+            List of scan result dicts, one per agent. Sorted by threat_level
+            descending (high threats first).
+        """
+        time_window_hours = 24
+        agents = [
+            agent for agent in bus.list_agents(self.db_path)
+            # Skip humans -- they are the principal, not subject to mutiny scan
+            if agent["agent_type"] != "human"
+            # Skip self to avoid circular detection
+            and agent["id"] != self.security_id
+            # Skip inactive agents
+            and agent.get("active", 1)
+        ]
+        results = []
+
+        threat_order = {"high": 0, "medium": 1, "low": 2, "none": 3}
+
+        now = datetime.now(timezone.utc)
+        start_iso = (now - timedelta(hours=time_window_hours)).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        )
+        try:
+            activity = bus.get_agent_activity(
+                start_iso, agent_ids=[a["id"] for a in agents],
+                db_path=self.db_path,
+            )
+            scan_error = None
+        except Exception as exc:
+            activity, scan_error = {}, exc
+
+        for agent in agents:
+            try:
+                if scan_error is not None:
+                    raise scan_error
+                result = self._evaluate_agent(
+                    agent, activity.get(agent["id"], {}), time_window_hours, now
+                )
+                results.append(result)
+            except Exception as exc:
+                # If an agent can't be scanned, log it but continue
+                results.append({
+                    "agent_id": agent["id"],
+                    "agent_name": agent.get("name", "unknown"),
+                    "agent_type": agent.get("agent_type", "unknown"),
+                    "role": agent.get("role", "unknown"),
+                    "threat_level": "low",
+                    "anomalies": [{
+                        "category": "scan_error",
+                        "description": f"Failed to scan agent: {exc}",
+                        "count": 1,
+                    }],
+                    "recommendation": "Manual review recommended -- scan failed.",
+                    "scanned_at": datetime.now(timezone.utc).strftime(
+                        "%Y-%m-%dT%H:%M:%SZ"
+                    ),
+                    "time_window_hours": time_window_hours,
+                })
+
+        results.sort(key=lambda r: threat_order.get(r["threat_level"], 4))
+        return results
+
+    def _evaluate_agent(self, agent: dict, activity: dict,
+                        time_window_hours: int, now: datetime) -> dict:
+        """Build a scan result from an agent's windowed activity counts.
+
+        Args:
+            agent:              Agent row (id, name, agent_type, role).
+            activity:           {kind: count} for the window, as returned
+                                per agent by bus.get_agent_activity.
+            time_window_hours:  Size of the window in hours.
+            now:                Scan time.
+
+        Returns:
+            Scan result dict (see scan_agent_behavior).
+        """
+        agent_id = agent["id"]
         agent_name = agent["name"]
         agent_type = agent["agent_type"]
         agent_role = agent["role"]
 
-        now = datetime.now(timezone.utc)
-        window_start = now - timedelta(hours=time_window_hours)
-        start_iso = window_start.strftime("%Y-%m-%dT%H:%M:%SZ")
-
         anomalies = []
 
         # --- 1. Message volume check ---
         anomalies.extend(
-            self._check_message_volume(
-                agent_id, agent_role, start_iso, time_window_hours
-            )
+            self._check_message_volume(activity, agent_role, time_window_hours)
         )
 
         # --- 2. Routing violations from audit log ---
-        anomalies.extend(
-            self._check_routing_violations(agent_id, start_iso)
-        )
+        anomalies.extend(self._check_routing_violations(activity))
 
         # --- 3. Unusual message types for role ---
         anomalies.extend(
-            self._check_unusual_message_types(
-                agent_id, agent_role, start_iso
-            )
+            self._check_unusual_message_types(activity, agent_role)
         )
 
         # --- 4. Failed permission attempts ---
-        anomalies.extend(
-            self._check_failed_permissions(agent_id, start_iso)
-        )
+        anomalies.extend(self._check_failed_permissions(activity))
 
         # --- 5. Direct-to-human attempts (non-right-hand agents) ---
         if agent_role not in ("right_hand", "human", "security"):
-            anomalies.extend(
-                self._check_direct_human_contact(agent_id, start_iso)
-            )
+            anomalies.extend(self._check_direct_human_contact(activity))
 
         # Compute threat level from anomaly count
         anomaly_count = len(anomalies)
@@ -196,59 +279,6 @@ class SecurityAgent:
             "time_window_hours": time_window_hours,
         }
 
-    def scan_all_agents(self) -> list:
-        """Run scan_agent_behavior on every active agent.
-
-        Skips the human principal (humans are not subject to mutiny
-        detection). Skips this security agent itself to avoid self-referential
-        false positives.
-
-        Returns:
-            List of scan result dicts, one per agent. Sorted by threat_level
-            descending (high threats first).
-        """
-        agents = bus.list_agents(self.db_path)
-        results = []
-
-        threat_order = {"high": 0, "medium": 1, "low": 2, "none": 3}
-
-        for agent in agents:
-            # Skip humans -- they are the principal, not subject to mutiny scan
-            if agent["agent_type"] == "human":
-                continue
-            # Skip self to avoid circular detection
-            if agent["id"] == self.security_id:
-                continue
-            # Skip inactive agents
-            if not agent.get("active", 1):
-                continue
-
-            try:
-                result = self.scan_agent_behavior(agent["id"])
-                results.append(result)
-            except Exception as exc:
-                # If an agent can't be scanned, log it but continue
-                results.append({
-                    "agent_id": agent["id"],
-                    "agent_name": agent.get("name", "unknown"),
-                    "agent_type": agent.get("agent_type", "unknown"),
-                    "role": agent.get("role", "unknown"),
-                    "threat_level": "low",
-                    "anomalies": [{
-                        "category": "scan_error",
-                        "description": f"Failed to scan agent: {exc}",
-                        "count": 1,
-                    }],
-                    "recommendation": "Manual review recommended -- scan failed.",
-                    "scanned_at": datetime.now(timezone.utc).strftime(
-                        "%Y-%m-%dT%H:%M:%SZ"
-                    ),
-                    "time_window_hours": 24,
-                })
-
-        results.sort(key=lambda r: threat_order.get(r["threat_level"], 4))
-        return results
-
     # ------------------------------------------------------------------
     # Event logging
     # ------------------------------------------------------------------
@@ -429,31 +459,20 @@ class SecurityAgent:
     # Internal helpers
     # ------------------------------------------------------------------
 
-    def _check_message_volume(self, agent_id: int, role: str,
-                              start_iso: str,
+    def _check_message_volume(self, activity: dict, role: str,
                               time_window_hours: int) -> list:
         """Check if agent's message volume exceeds threshold for their role.
 
         Args:
-            agent_id:           Agent to check.
+            activity:           Agent's {kind: count} for the window.
             role:               Agent's role for threshold lookup.
-            start_iso:          ISO timestamp for window start.
             time_window_hours:  Size of the window in hours.
 
         Returns:
             List of anomaly dicts (empty if no anomaly detected).
         """
         anomalies = []
-        conn = bus.get_conn(self.db_path)
-        try:
-            row = conn.execute(
-                "SELECT COUNT(*) AS msg_count FROM messages "
-                "WHERE from_agent_id = ? AND created_at >= ?",
-                (agent_id, start_iso),
-            ).fetchone()
-            msg_count = row["msg_count"] if row else 0
-        finally:
-            conn.close()
+        msg_count = activity.get("sent", 0)
 
         threshold = MESSAGE_VOLUME_THRESHOLDS.get(role, 20)
         if msg_count > threshold:
@@ -468,55 +487,43 @@ class SecurityAgent:
 
         return anomalies
 
-    def _check_routing_violations(self, agent_id: int,
-                                  start_iso: str) -> list:
-        """Check audit log for routing violations by this agent.
+    def _check_routing_violations(self, activity: dict) -> list:
+        """Check audit log counts for routing violations by this agent.
 
-        Looks for audit entries where event_type contains 'blocked' or
+        Counts audit entries where event_type contains 'blocked' or
         'violation', indicating the agent tried to do something outside
         their permissions.
 
         Args:
-            agent_id:   Agent to check.
-            start_iso:  ISO timestamp for window start.
+            activity:   Agent's {kind: count} for the window.
 
         Returns:
             List of anomaly dicts (empty if no violations found).
         """
         anomalies = []
-        audit_entries = bus.get_audit_trail(
-            agent_id=agent_id, start_time=start_iso, db_path=self.db_path
-        )
+        violation_count = activity.get("violation", 0)
 
-        violation_entries = [
-            e for e in audit_entries
-            if "blocked" in e.get("event_type", "").lower()
-            or "violation" in e.get("event_type", "").lower()
-        ]
-
-        if violation_entries:
+        if violation_count:
             anomalies.append({
                 "category": "routing_violation",
                 "description": (
-                    f"Found {len(violation_entries)} routing violation(s) "
+                    f"Found {violation_count} routing violation(s) "
                     f"or blocked attempt(s) in audit log"
                 ),
-                "count": len(violation_entries),
+                "count": violation_count,
             })
 
         return anomalies
 
-    def _check_unusual_message_types(self, agent_id: int, role: str,
-                                     start_iso: str) -> list:
+    def _check_unusual_message_types(self, activity: dict, role: str) -> list:
         """Check if agent is sending message types unusual for their role.
 
         For example, a worker sending 'briefing' or 'escalation' type
         messages is suspicious -- they should be sending 'report' types.
 
         Args:
-            agent_id:   Agent to check.
+            activity:   Agent's {kind: count} for the window.
             role:       Agent's role for unusual-type lookup.
-            start_iso:  ISO timestamp for window start.
 
         Returns:
             List of anomaly dicts (empty if no unusual types found).
@@ -526,18 +533,9 @@ class SecurityAgent:
         if not unusual_types:
             return anomalies
 
-        conn = bus.get_conn(self.db_path)
-        try:
-            placeholders = ",".join("?" for _ in unusual_types)
-            row = conn.execute(
-                f"SELECT COUNT(*) AS unusual_count FROM messages "
-                f"WHERE from_agent_id = ? AND created_at >= ? "
-                f"AND message_type IN ({placeholders})",
-                (agent_id, start_iso, *unusual_types),
-            ).fetchone()
-            unusual_count = row["unusual_count"] if row else 0
-        finally:
-            conn.close()
+        unusual_count = sum(
+            activity.get(f"type:{t}", 0) for t in unusual_types
+        )
 
         if unusual_count > 0:
             anomalies.append({
@@ -551,85 +549,51 @@ class SecurityAgent:
 
         return anomalies
 
-    def _check_failed_permissions(self, agent_id: int,
-                                  start_iso: str) -> list:
-        """Check audit log for failed permission attempts.
+    def _check_failed_permissions(self, activity: dict) -> list:
+        """Check audit log counts for failed permission attempts.
 
-        Looks for audit entries with event_type containing 'denied' or
+        Counts audit entries with event_type containing 'denied' or
         'permission', indicating the agent tried to access something
         they should not have.
 
         Args:
-            agent_id:   Agent to check.
-            start_iso:  ISO timestamp for window start.
+            activity:   Agent's {kind: count} for the window.
 
         Returns:
             List of anomaly dicts (empty if no failures found).
         """
         anomalies = []
-        audit_entries = bus.get_audit_trail(
-            agent_id=agent_id, start_time=start_iso, db_path=self.db_path
-        )
-
-        permission_failures = [
-            e for e in audit_entries
-            if "denied" in e.get("event_type", "").lower()
-            or "permission" in e.get("event_type", "").lower()
-        ]
+        failure_count = activity.get("denied", 0)
 
-        if permission_failures:
+        if failure_count:
             anomalies.append({
                 "category": "failed_permission",
                 "description": (
-                    f"Found {len(permission_failures)} failed permission "
+                    f"Found {failure_count} failed permission "
                     f"attempt(s) in audit log"
                 ),
-                "count": len(permission_failures),
+                "count": failure_count,
             })
 
         return anomalies
 
-    def _check_direct_human_contact(self, agent_id: int,
-                                    start_iso: str) -> list:
+    def _check_direct_human_contact(self, activity: dict) -> list:
         """Check if a non-privileged agent tried to contact the human directly.
 
         Only the Crew Boss and Security agents should message the human
         directly. All other agents must route through the Crew Boss. This
-        checks both the messages table (successful sends) and the audit log
-        (blocked attempts).
+        checks both messages sent to a human agent (successful sends) and
+        blocked audit entries that name a human (blocked attempts).
 
         Args:
-            agent_id:   Agent to check.
-            start_iso:  ISO timestamp for window start.
+            activity:   Agent's {kind: count} for the window.
 
         Returns:
             List of anomaly dicts (empty if no direct contact found).
         """
         anomalies = []
 
-        # Find the human agent(s) in the system
-        all_agents = bus.list_agents(self.db_path)
-        human_ids = [
-            a["id"] for a in all_agents if a["agent_type"] == "human"
-        ]
-
-        if not human_ids:
-            return anomalies
-
-        # Check messages table for direct sends to human
-        conn = bus.get_conn(self.db_path)
-        try:
-            placeholders = ",".join("?" for _ in human_ids)
-            row = conn.execute(
-                f"SELECT COUNT(*) AS direct_count FROM messages "
-                f"WHERE from_agent_id = ? AND created_at >= ? "
-                f"AND to_agent_id IN ({placeholders})",
-                (agent_id, start_iso, *human_ids),
-            ).fetchone()
-            direct_count = row["direct_count"] if row else 0
-        finally:
-            conn.close()
-
+        direct_count = activity.get("to_human", 0)
         if direct_count > 0:
             anomalies.append({
                 "category": "direct_human_contact",
@@ -640,28 +604,15 @@ class SecurityAgent:
                 "count": direct_count,
             })
 
-        # Also check audit log for blocked attempts to reach human
-        audit_entries = bus.get_audit_trail(
-            agent_id=agent_id, start_time=start_iso, db_path=self.db_path
-        )
-        human_attempt_entries = [
-            e for e in audit_entries
-            if ("blocked" in e.get("event_type", "").lower()
-                or "violation" in e.get("event_type", "").lower())
-            and any(
-                str(hid) in json.dumps(e.get("details", {}))
-                for hid in human_ids
-            )
-        ]
-
-        if human_attempt_entries:
+        attempt_count = activity.get("human_attempt", 0)
+        if attempt_count:
             anomalies.append({
                 "category": "blocked_human_contact_attempt",
                 "description": (
-                    f"Found {len(human_attempt_entries)} blocked attempt(s) "
+                    f"Found {attempt_count} blocked attempt(s) "
                     f"to contact human directly"
                 ),
-                "count": len(human_attempt_entries),
+                "count": attempt_count,
             })
 
         return anomalies
@@ -760,6 +711,118 @@ class SecurityAgent:
             pass
 
 
+# ---------------------------------------------------------------------------
+# Compiled Scanner Engine
+# ---------------------------------------------------------------------------
+# The scanners below used to call re.search once per pattern per text.
+# A _PatternScanner compiles a pattern family once and pairs each pattern
+# with the literal keywords a match must contain; a scan lowers the text
+# once, tests the keywords with plain substring checks (far cheaper than a
+# regex pass) and runs only the patterns whose keywords are present.
+# Results are identical to the per-pattern loop, in the same order.
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - Python 3.9 / 3.10
+    import sre_parse as _sre_parse
+
+# Non-ASCII characters re.IGNORECASE matches to an ASCII letter. They are
+# folded before the keyword check so "İgnore previous instructions" can't
+# slip past the prefilter while the regex itself would match it.
+_FOLD_TO_ASCII = str.maketrans({"İ": "i", "ı": "i",
+                                "ſ": "s", "K": "k"})
+
+
+def _required_literals(regex: str, flags: int = 0) -> tuple:
+    """Literal strings at least one of which every match of ``regex`` contains.
+
+    Only mandatory parts of the pattern count: top-level literal runs and
+    top-level groups (an alternation contributes one string per branch).
+    Of those, the candidate whose shortest string is longest wins. Returns
+    () when there is none, in which case the pattern is always run.
+    """
+    try:
+        parsed = _sre_parse.parse(regex, flags)
+    except re.error:
+        return ()
+    found = _sequence_literals(parsed)
+    return tuple(s.lower() for s in found) if flags & re.IGNORECASE else found
+
+
+def _sequence_literals(items) -> tuple:
+    best: tuple = ()
+    run = ""
+    for op, arg in items:
+        candidate: tuple = ()
+        if op == _sre_parse.LITERAL:
+            run += chr(arg)
+            candidate = (run,)
+        else:
+            run = ""
+            branches = None
+            if op == _sre_parse.BRANCH:
+                branches = arg[1]
+            elif op == _sre_parse.SUBPATTERN:
+                sub = arg[-1]
+                if len(sub) == 1 and sub[0][0] == _sre_parse.BRANCH:
+                    branches = sub[0][1][1]
+                else:
+                    candidate = _sequence_literals(sub)
+            if branches is not None:
+                per_branch = [_sequence_literals(b) for b in branches]
+                if all(per_branch):
+                    candidate = tuple(s for lits in per_branch for s in lits)
+        if candidate and (not best or min(map(len, candidate)) > min(map(len, best))):
+            best = candidate
+    return best
+
+
+class _PatternScanner:
+    """A pattern family compiled for repeated scanning.
+
+    ``patterns`` is a sequence of (regex, payload); scan() returns
+    [(payload, match)] for every pattern that matches, in family order.
+    """
+
+    def __init__(self, patterns, flags: int = 0):
+        self._fold = bool(flags & re.IGNORECASE)
+        self._entries = [(re.compile(regex, flags), _required_literals(regex, flags), payload)
+                         for regex, payload in patterns]
+        self._keywords = sorted({kw for _, kws, _ in self._entries for kw in kws})
+
+    def scan(self, text: str) -> list:
+        haystack = text
+        if self._fold:
+            if not text.isascii():
+                haystack = text.translate(_FOLD_TO_ASCII)
+            haystack = haystack.lower()
+        present = {kw for kw in self._keywords if kw in haystack}
+        hits = []
+        for compiled, keywords, payload in self._entries:
+            if keywords and present.isdisjoint(keywords):
+                continue
+            match = compiled.search(text)
+            if match:
+                hits.append((payload, match))
+        return hits
+
+
+_scanners: dict = {}
+
+
+def _get_scanner(patterns: tuple, flags: int = 0) -> _PatternScanner:
+    """Scanner for ``patterns``, compiled on first use.
+
+    Keyed by the pattern contents, so a family that is edited at runtime
+    gets a fresh scanner instead of a stale one.
+    """
+    key = (patterns, flags)
+    scanner = _scanners.get(key)
+    if scanner is None:
+        scanner = _scanners[key] = _PatternScanner(patterns, flags)
+    return scanner
+
+
 # ---------------------------------------------------------------------------
 # Integrity Violation Scanner
 # ---------------------------------------------------------------------------
@@ -793,8 +856,8 @@ def scan_reply_integrity(reply_text: str) -> dict:
     """
     violations = []
     text_lower = reply_text.lower()
-    for pattern, vtype in GASLIGHT_PATTERNS:
-        match = re.search(pattern, text_lower)
+    scanner = _get_scanner(tuple((p, (p, t)) for p, t in GASLIGHT_PATTERNS))
+    for (pattern, vtype), match in scanner.scan(text_lower):
         if match:
             # Extract a snippet around the match for context
             start = max(0, match.start() - 20)
@@ -847,8 +910,8 @@ def scan_reply_charter(reply_text: str) -> dict:
     """
     violations = []
     text_lower = reply_text.lower()
-    for pattern, vtype in CHARTER_PATTERNS:
-        match = re.search(pattern, text_lower)
+    scanner = _get_scanner(tuple((p, (p, t)) for p, t in CHARTER_PATTERNS))
+    for (pattern, vtype), match in scanner.scan(text_lower):
         if match:
             start = max(0, match.start() - 20)
             end = min(len(reply_text), match.end() + 20)
@@ -1016,17 +1079,17 @@ def scan_skill_content(skill_config: str) -> dict:
     flags = []
 
     # Run patterns against each text field
+    scanner = _get_scanner(tuple((regex, (severity, flag_name))
+                                 for severity, patterns in INJECTION_PATTERNS.items()
+                                 for regex, flag_name in patterns), re.IGNORECASE)
     for path, text in text_fields:
-        for severity, patterns in INJECTION_PATTERNS.items():
-            for regex, flag_name in patterns:
-                match = re.search(regex, text, re.IGNORECASE)
-                if match:
-                    flags.append({
-                        "severity": severity,
-                        "pattern_name": flag_name,
-                        "matched_text": match.group()[:80],
-                        "field": path,
-                    })
+        for (severity, flag_name), match in scanner.scan(text):
+            flags.append({
+                "severity": severity,
+                "pattern_name": flag_name,
+                "matched_text": match.group()[:80],
+                "field": path,
+            })
 
     # Compute risk score (capped at 10)
     raw_score = sum(SEVERITY_WEIGHTS[f["severity"]] for f in flags)
@@ -1089,6 +1152,23 @@ def compute_skill_hash(skill_config: str) -> str:
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
+# Bump when scan_skill_content's logic changes in a way the pattern tables
+# don't capture (field extraction, scoring, recommendation wording).
+SCANNER_ENGINE_VERSION = 1
+
+
+def scanner_ruleset_version() -> str:
+    """Fingerprint of everything a skill scan verdict depends on.
+
+    Hashes INJECTION_PATTERNS, SEVERITY_WEIGHTS, MAX_SAFE_RISK_SCORE and
+    SCANNER_ENGINE_VERSION, so verdicts cached by bus.scan_skill_cached
+    stop matching as soon as any of them changes.
+    """
+    payload = json.dumps([SCANNER_ENGINE_VERSION, INJECTION_PATTERNS,
+                          SEVERITY_WEIGHTS, MAX_SAFE_RISK_SCORE], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
 # ---------------------------------------------------------------------------
 # Security Audit Command
 # ---------------------------------------------------------------------------
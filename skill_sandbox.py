@@ -12,7 +12,10 @@ charter violations, performance degradation.
 Gated behind Guardian activation ($29 key).
 """
 
+import atexit
 import json
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
@@ -30,6 +33,10 @@ _BASELINE_SAMPLE_SIZE = 10    # first N uses to establish baseline
 _MIN_HEALTH_SCORE = 0
 _MAX_HEALTH_SCORE = 100
 
+# Usage counters are accumulated in memory and written in batches
+FLUSH_INTERVAL = 5.0          # seconds between writes while usage keeps coming
+FLUSH_THRESHOLD = 50          # usage events that force a write sooner
+
 
 # ---------------------------------------------------------------------------
 # Skill health lifecycle
@@ -44,6 +51,7 @@ def init_skill_health(agent_id: int, skill_name: str,
     """
     db = db_path or bus.DB_PATH
     now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    _usage.flush(db)  # earlier replies don't count toward the new skill
     try:
         with bus.db_write(db) as conn:
             conn.execute(
@@ -57,6 +65,144 @@ def init_skill_health(agent_id: int, skill_name: str,
     return {"ok": True, "skill_name": skill_name, "health_score": 100}
 
 
+class _UsageAccumulator:
+    """Pending skill usage events, folded into skill_health in one batch.
+
+    record() only queues the event for its agent. flush() re-reads each
+    agent's active skill rows inside the write transaction, applies the
+    queued events in order (running average, baseline, anomaly count,
+    health score) and writes the rows back, every FLUSH_INTERVAL seconds
+    or FLUSH_THRESHOLD events, and before anything reads skill_health for
+    decisions (health checks, reports, quarantine). Nothing from the table
+    is cached between flushes, so increments from other worker processes,
+    skills they install and quarantines or restores they make are all
+    seen by the next flush.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()   # keeps batches in order
+        self._dbs: dict = {}   # db key -> {"path", "events", "pending", "last_flush"}
+
+    def _state(self, db) -> dict:
+        key = str(db)
+        st = self._dbs.get(key)
+        if st is None:
+            st = self._dbs[key] = {"path": db, "events": {}, "pending": 0,
+                                   "last_flush": time.monotonic()}
+        return st
+
+    def record(self, agent_id: int, db, response_ms: int, had_error: bool,
+               had_charter_violation: bool, had_integrity_violation: bool) -> None:
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with self._lock:
+            st = self._state(db)
+            st["events"].setdefault(agent_id, []).append(
+                (response_ms, had_error, had_charter_violation,
+                 had_integrity_violation, now))
+            st["pending"] += 1
+            due = (st["pending"] >= FLUSH_THRESHOLD
+                   or time.monotonic() - st["last_flush"] >= FLUSH_INTERVAL)
+        if due:
+            self.flush(db)
+
+    def flush(self, db=None) -> int:
+        """Write pending usage (for one database, or all). Returns rows written."""
+        written = 0
+        with self._flush_lock:
+            with self._lock:
+                if db is None:
+                    states = list(self._dbs.values())
+                else:
+                    states = [self._dbs[str(db)]] if str(db) in self._dbs else []
+                batches = []
+                for st in states:
+                    if st["events"]:
+                        batches.append((st["path"], st["events"]))
+                        st["events"] = {}
+                    st["pending"] = 0
+                    st["last_flush"] = time.monotonic()
+            for path, events in batches:
+                try:
+                    with bus.db_write(path) as wconn:
+                        params = []
+                        for agent_id, agent_events in events.items():
+                            for row in _load_active_rows(agent_id, wconn):
+                                for response_ms, err, charter, integrity, at in agent_events:
+                                    _apply_usage(row, response_ms, err, charter, integrity)
+                                    row["last_check"] = at
+                                params.append(
+                                    (row["total_uses"], row["error_count"],
+                                     row["anomaly_count"], row["avg_response_ms"],
+                                     row["baseline_response_ms"],
+                                     row["charter_violations"],
+                                     row["integrity_violations"],
+                                     row["health_score"], row["last_check"],
+                                     row["id"]))
+                        wconn.executemany(
+                            "UPDATE skill_health SET "
+                            "total_uses = ?, error_count = ?, anomaly_count = ?, "
+                            "avg_response_ms = ?, baseline_response_ms = ?, "
+                            "charter_violations = ?, integrity_violations = ?, "
+                            "health_score = ?, last_check = ? "
+                            "WHERE id = ?",
+                            params,
+                        )
+                    written += len(params)
+                except Exception:
+                    pass  # Monitoring must never break the reply pipeline
+        return written
+
+
+def _load_active_rows(agent_id: int, conn) -> list:
+    rows = conn.execute(
+        "SELECT id, skill_name, total_uses, error_count, anomaly_count, "
+        "avg_response_ms, baseline_response_ms, charter_violations, "
+        "integrity_violations, health_score, last_check "
+        "FROM skill_health WHERE agent_id = ? AND status = 'active'",
+        (agent_id,),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def _apply_usage(row: dict, response_ms: int, had_error: bool,
+                 had_charter_violation: bool, had_integrity_violation: bool) -> None:
+    """Fold one usage event into a skill_health row (in place)."""
+    total = row["total_uses"] + 1
+    errors = row["error_count"] + (1 if had_error else 0)
+    charter_v = row["charter_violations"] + (1 if had_charter_violation else 0)
+    integrity_v = row["integrity_violations"] + (1 if had_integrity_violation else 0)
+    anomalies = row["anomaly_count"]
+
+    # Update running average response time
+    old_avg = row["avg_response_ms"]
+    if total == 1:
+        new_avg = response_ms
+    else:
+        new_avg = int(old_avg + (response_ms - old_avg) / total)
+
+    # Establish baseline from first N samples
+    baseline = row["baseline_response_ms"]
+    if total <= _BASELINE_SAMPLE_SIZE:
+        baseline = new_avg
+
+    # Check for response time anomaly (>3x baseline)
+    if baseline > 0 and new_avg > baseline * 3 and total > _BASELINE_SAMPLE_SIZE:
+        anomalies += 1
+
+    row.update(
+        total_uses=total, error_count=errors, anomaly_count=anomalies,
+        avg_response_ms=new_avg, baseline_response_ms=baseline,
+        charter_violations=charter_v, integrity_violations=integrity_v,
+        health_score=_compute_health_score(total, errors, charter_v, integrity_v,
+                                           new_avg, baseline),
+    )
+
+
+_usage = _UsageAccumulator()
+atexit.register(_usage.flush)
+
+
 def record_skill_usage(agent_id: int, response_ms: int = 0,
                        had_error: bool = False, error_type: str = "",
                        had_charter_violation: bool = False,
@@ -66,70 +212,22 @@ def record_skill_usage(agent_id: int, response_ms: int = 0,
 
     Called after each LLM response for agents that have skills.
     Updates total_uses, error/violation counts, response timing,
-    and recalculates health_score.
+    and recalculates health_score — in memory; the rows are written by
+    the next flush (see _UsageAccumulator and flush_skill_usage).
     """
     db = db_path or bus.DB_PATH
     try:
-        conn = bus.get_conn(db)
-        rows = conn.execute(
-            "SELECT id, skill_name, total_uses, error_count, anomaly_count, "
-            "avg_response_ms, baseline_response_ms, charter_violations, "
-            "integrity_violations, health_score "
-            "FROM skill_health WHERE agent_id = ? AND status = 'active'",
-            (agent_id,),
-        ).fetchall()
-        conn.close()
-
-        if not rows:
-            return
-
-        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-
-        for row in rows:
-            total = row["total_uses"] + 1
-            errors = row["error_count"] + (1 if had_error else 0)
-            charter_v = row["charter_violations"] + (1 if had_charter_violation else 0)
-            integrity_v = row["integrity_violations"] + (1 if had_integrity_violation else 0)
-            anomalies = row["anomaly_count"]
-
-            # Update running average response time
-            old_avg = row["avg_response_ms"]
-            if total == 1:
-                new_avg = response_ms
-            else:
-                new_avg = int(old_avg + (response_ms - old_avg) / total)
-
-            # Establish baseline from first N samples
-            baseline = row["baseline_response_ms"]
-            if total <= _BASELINE_SAMPLE_SIZE:
-                baseline = new_avg
-
-            # Check for response time anomaly (>3x baseline)
-            if baseline > 0 and new_avg > baseline * 3 and total > _BASELINE_SAMPLE_SIZE:
-                anomalies += 1
-
-            # Recalculate health score
-            score = _compute_health_score(
-                total, errors, charter_v, integrity_v,
-                new_avg, baseline,
-            )
-
-            with bus.db_write(db) as wconn:
-                wconn.execute(
-                    "UPDATE skill_health SET "
-                    "total_uses = ?, error_count = ?, anomaly_count = ?, "
-                    "avg_response_ms = ?, baseline_response_ms = ?, "
-                    "charter_violations = ?, integrity_violations = ?, "
-                    "health_score = ?, last_check = ? "
-                    "WHERE id = ?",
-                    (total, errors, anomalies, new_avg, baseline,
-                     charter_v, integrity_v, score, now, row["id"]),
-                )
-
+        _usage.record(agent_id, db, response_ms, had_error,
+                      had_charter_violation, had_integrity_violation)
     except Exception:
         pass  # Never break the reply pipeline
 
 
+def flush_skill_usage(db_path: Optional[Path] = None) -> int:
+    """Write accumulated usage counters now. Returns the number of rows written."""
+    return _usage.flush(db_path or bus.DB_PATH)
+
+
 def _compute_health_score(total_uses: int, errors: int,
                           charter_violations: int,
                           integrity_violations: int,
@@ -172,6 +270,7 @@ def run_health_check(db_path: Optional[Path] = None) -> dict:
         return {"ok": False, "error": "Guardian activation required"}
 
     db = db_path or bus.DB_PATH
+    _usage.flush(db)
     conn = bus.get_conn(db)
     rows = conn.execute(
         "SELECT sh.*, a.name as agent_name FROM skill_health sh "
@@ -243,6 +342,7 @@ def get_skill_health_report(agent_id: Optional[int] = None,
         return []
 
     db = db_path or bus.DB_PATH
+    _usage.flush(db)
     conn = bus.get_conn(db)
 
     if agent_id is not None:
@@ -283,6 +383,7 @@ def get_health_summary(db_path: Optional[Path] = None) -> dict:
         return {"ok": False, "error": "Guardian activation required"}
 
     db = db_path or bus.DB_PATH
+    _usage.flush(db)
     conn = bus.get_conn(db)
 
     total = conn.execute("SELECT COUNT(*) FROM skill_health").fetchone()[0]
@@ -340,6 +441,7 @@ def quarantine_skill(agent_id: int, skill_name: str, reason: str = "",
 
     db = db_path or bus.DB_PATH
     now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    _usage.flush(db)
 
     # Update health record
     with bus.db_write(db) as conn:
@@ -425,6 +527,7 @@ def restore_skill(agent_id: int, skill_name: str,
 
     # Reset health metrics
     now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    _usage.flush(db)
     with bus.db_write(db) as wconn:
         wconn.execute(
             "UPDATE skill_health SET "
@@ -3,6 +3,7 @@
 import json
 import sqlite3
 import tempfile
+import threading
 import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -48,7 +49,7 @@ def test_call_ollama_mock():
         "message": {"role": "assistant", "content": "Hey! How can I help?"}
     }).encode("utf-8")
 
-    with patch("urllib.request.urlopen") as mock_urlopen:
+    with patch("http_pool.urlopen") as mock_urlopen:
         mock_ctx = MagicMock()
         mock_ctx.read.return_value = mock_response
         mock_ctx.__enter__ = lambda s: s
@@ -154,3 +155,644 @@ def test_system_prompts_exist():
     for agent_type in ("right_hand", "guardian", "vault", "manager"):
         assert agent_type in agent_worker.SYSTEM_PROMPTS
         assert len(agent_worker.SYSTEM_PROMPTS[agent_type]) > 20
+
+
+def test_send_message_wakes_waiting_worker():
+    """A queued message wakes wait_for_queued() without waiting for a poll."""
+    db_path = _setup_db()
+    bus.wait_for_queued(db_path, timeout=0)  # prime the data_version watch
+
+    woke = []
+    waiter = threading.Thread(
+        target=lambda: woke.append(bus.wait_for_queued(db_path, timeout=5,
+                                                       check_interval=5)))
+    waiter.start()
+    time.sleep(0.1)
+    start = time.monotonic()
+    bus.send_message(1, 2, "task", "Chat", body="wake up", db_path=db_path)
+    waiter.join(timeout=5)
+    assert woke == [True]
+    assert time.monotonic() - start < 1.0
+
+
+def test_wait_for_queued_sees_external_commit():
+    """Commits from another connection are detected via data_version."""
+    db_path = _setup_db()
+    assert bus.wait_for_queued(db_path, timeout=0) is False
+
+    other = sqlite3.connect(str(db_path))
+    other.execute(
+        "INSERT INTO messages (from_agent_id, to_agent_id, message_type, subject, body) "
+        "VALUES (1, 2, 'task', 'Chat', 'from another process')")
+    other.commit()
+    other.close()
+
+    assert bus.wait_for_queued(db_path, timeout=2, check_interval=0.05) is True
+    assert bus.wait_for_queued(db_path, timeout=0.1, check_interval=0.05) is False
+
+
+def _mock_stream(lines):
+    """A context-manager response that iterates over raw byte lines."""
+    resp = MagicMock()
+    resp.__enter__ = lambda s: s
+    resp.__exit__ = MagicMock(return_value=False)
+    resp.__iter__ = lambda s: iter(lines)
+    return resp
+
+
+def test_call_llm_streams_ollama_ndjson():
+    """call_llm(on_delta=...) forwards Ollama NDJSON deltas and returns the full text."""
+    db_path = _setup_db()
+    lines = [
+        json.dumps({"message": {"content": "Hel"}, "done": False}).encode() + b"\n",
+        json.dumps({"message": {"content": "lo!"}, "done": False}).encode() + b"\n",
+        json.dumps({"message": {"content": ""}, "done": True}).encode() + b"\n",
+    ]
+    deltas = []
+    with patch("http_pool.urlopen", return_value=_mock_stream(lines)) as mock_urlopen:
+        result = agent_worker.call_llm("sys", "hi", model="ollama",
+                                       db_path=db_path, on_delta=deltas.append)
+    assert deltas == ["Hel", "lo!"]
+    assert result == "Hello!"
+    sent = json.loads(mock_urlopen.call_args[0][0].data)
+    assert sent["stream"] is True
+
+
+def test_stream_openai_and_claude_sse():
+    """SSE parsers pick deltas out of OpenAI-compatible and Anthropic streams."""
+    openai_lines = [
+        b'data: {"choices":[{"delta":{"role":"assistant"}}]}\n', b"\n",
+        b'data: {"choices":[{"delta":{"content":"Hi "}}]}\n', b"\n",
+        b'data: {"choices":[{"delta":{"content":"there"}}]}\n', b"\n",
+        b"data: [DONE]\n", b"\n",
+    ]
+    with patch("http_pool.urlopen", return_value=_mock_stream(openai_lines)):
+        assert list(agent_worker._stream_openai_compat(
+            [], "m", "https://example.invalid", "key")) == ["Hi ", "there"]
+
+    claude_lines = [
+        b"event: message_start\n", b'data: {"type":"message_start"}\n', b"\n",
+        b"event: content_block_delta\n",
+        b'data: {"type":"content_block_delta","delta":{"type":"text_delta","text":"Yo"}}\n',
+        b"\n",
+        b"event: message_stop\n", b'data: {"type":"message_stop"}\n', b"\n",
+    ]
+    with patch("http_pool.urlopen", return_value=_mock_stream(claude_lines)):
+        assert list(agent_worker._stream_claude(
+            [{"role": "system", "content": "s"}], "m", "key")) == ["Yo"]
+
+
+def test_streamed_reply_published_then_finalized():
+    """Partial text shows up in the chat mid-stream; the final reply replaces it."""
+    db_path = _setup_db()
+    bus.send_message(from_id=1, to_id=2, message_type="task",
+                     subject="Chat message", body="Tell me a story",
+                     priority="normal", db_path=db_path)
+    seen_mid_stream = []
+
+    def fake_llm(*args, on_delta=None, **kwargs):
+        on_delta("Once upon a time")
+        conn = bus.get_conn(db_path)
+        seen_mid_stream.extend(r["body"] for r in conn.execute(
+            "SELECT body FROM messages WHERE from_agent_id=2 AND to_agent_id=1"))
+        conn.close()
+        return "Once upon a time there was a bus."
+
+    with patch.object(agent_worker, "call_llm", side_effect=fake_llm):
+        agent_worker._process_queued_messages(db_path)
+
+    assert seen_mid_stream == ["Once upon a time"]
+    conn = bus.get_conn(db_path)
+    replies = conn.execute(
+        "SELECT body FROM messages WHERE from_agent_id=2 AND to_agent_id=1"
+    ).fetchall()
+    conn.close()
+    assert [r["body"] for r in replies] == ["Once upon a time there was a bus."]
+
+
+def test_reply_streamer_holds_back_action_blocks():
+    """Raw action JSON is never published as a partial reply."""
+    db_path = _setup_db()
+    streamer = agent_worker._ReplyStreamer(db_path, 2, 1)
+    streamer('Sure! {"crew_action": "dm", "to": "Vault"}')
+    conn = bus.get_conn(db_path)
+    body = conn.execute("SELECT body FROM messages WHERE id=?",
+                        (streamer.message_id,)).fetchone()["body"]
+    conn.close()
+    assert body == "Sure!"
+
+
+def test_engine_respects_concurrency_limits():
+    """The engine caps total concurrency at one turn per agent and processes every message."""
+    engine = agent_worker._MessageEngine(max_concurrency=4)
+    lock = threading.Lock()
+    running = {"total": 0, "max_total": 0}
+    per_agent = {}
+    max_per_agent = {}
+
+    def fake_process(row, db_path):
+        aid = row["to_agent_id"]
+        with lock:
+            running["total"] += 1
+            per_agent[aid] = per_agent.get(aid, 0) + 1
+            running["max_total"] = max(running["max_total"], running["total"])
+            max_per_agent[aid] = max(max_per_agent.get(aid, 0), per_agent[aid])
+        time.sleep(0.02)
+        with lock:
+            running["total"] -= 1
+            per_agent[aid] -= 1
+
+    rows = [{"id": i, "to_agent_id": i % 3, "name": f"agent{i % 3}"}
+            for i in range(30)]
+    try:
+        with patch.object(agent_worker, "_process_single_message", side_effect=fake_process):
+            engine.run_batch(rows, None)
+    finally:
+        engine.shutdown()
+    assert engine.stats["processed"] == 30
+    assert engine.stats["active"] == 0
+    assert running["max_total"] <= 3  # only 3 distinct agents
+    assert max(max_per_agent.values()) == 1
+    assert engine.queue_stats[0]["dispatched"] == 10
+    assert engine.queue_stats[0]["max_depth"] == 10
+
+
+def test_engine_timeout_cancels_inflight_http():
+    """A message past MSG_TIMEOUT has its HTTP request aborted, not abandoned."""
+    import http.server
+    import http_pool
+
+    release = threading.Event()
+
+    class SlowHandler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            release.wait(10)
+
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{srv.server_port}/slow"
+    finished = threading.Event()
+
+    def slow_process(row, db_path):
+        try:
+            http_pool.urlopen(url, timeout=30).read()
+        finally:
+            finished.set()
+
+    engine = agent_worker._MessageEngine(max_concurrency=2)
+    start = time.monotonic()
+    try:
+        with patch.object(agent_worker, "MSG_TIMEOUT", 0.3), \
+             patch.object(agent_worker, "_process_single_message", side_effect=slow_process):
+            engine.run_batch([{"id": 1, "to_agent_id": 2, "name": "Slow"}], None)
+    finally:
+        release.set()
+        engine.shutdown()
+        srv.shutdown()
+    assert time.monotonic() - start < 5
+    assert finished.is_set()
+    assert engine.stats["timeouts"] == 1
+    assert engine.stats["abandoned"] == 0
+    assert engine.stats["active"] == 0
+
+
+def test_fair_scheduler_per_agent_fifo():
+    """Messages to one agent run in order, one at a time."""
+    sched = agent_worker._FairScheduler()
+    for i in range(3):
+        sched.push({"id": i, "from_agent_id": 1, "to_agent_id": 2})
+    row, depth, _ = sched.pop()
+    assert (row["id"], depth) == (0, 3)
+    assert sched.pop() is None  # agent 2 still has a turn in flight
+    sched.done(2)
+    assert sched.pop()[0]["id"] == 1
+
+
+def test_fair_scheduler_fanout_does_not_starve_others():
+    """A manager's 30-task fan-out shares the engine with other senders."""
+    sched = agent_worker._FairScheduler()
+    for w in range(30):
+        sched.push({"id": f"fan{w}", "from_agent_id": 10, "to_agent_id": 100 + w,
+                    "priority": "normal", "sender_type": "manager"})
+    for k in range(3):
+        sched.push({"id": f"peer{k}", "from_agent_id": 20, "to_agent_id": 200 + k,
+                    "priority": "normal", "sender_type": "worker"})
+    sched.push({"id": "chat", "from_agent_id": 1, "to_agent_id": 300,
+                "priority": "normal", "sender_type": "human"})
+    sched.push({"id": "urgent", "from_agent_id": 30, "to_agent_id": 400,
+                "priority": "critical", "sender_type": "worker"})
+
+    order = [sched.pop()[0]["id"] for _ in range(len(sched))]
+    assert order[:2] == ["urgent", "chat"]
+    assert {"peer0", "peer1", "peer2"} <= set(order[:8])
+    # The fan-out itself stays in send order
+    assert [i for i in order if i.startswith("fan")] == [f"fan{w}" for w in range(30)]
+
+
+def test_system_prompt_sections_cached_until_data_changes():
+    """Unchanged prompt sections are reused; writes (even raw SQL) rebuild them."""
+    db = _setup_db()
+    agent_worker.clear_prompt_cache()
+    bus.remember(2, "Human likes short answers", db_path=db)
+
+    first = agent_worker._build_system_prompt("right_hand", "Crew Boss", agent_id=2, db_path=db)
+    assert "Human likes short answers" in first
+    with patch("bus.get_agent_skills") as skills, patch("bus.get_agent_memories") as mems:
+        again = agent_worker._build_system_prompt("right_hand", "Crew Boss", agent_id=2, db_path=db)
+    assert again == first
+    assert not skills.called and not mems.called
+
+    # A cache hit still records that the memory was injected
+    bus.flush_accounting(db)
+    conn = bus.get_conn(db)
+    assert conn.execute("SELECT access_count FROM agent_memory").fetchone()[0] == 2
+    conn.execute("UPDATE agents SET soul='A calm lighthouse keeper.' WHERE id=2")
+    conn.execute("INSERT INTO agents (name, agent_type, role, status, active) "
+                 "VALUES ('Scout', 'worker', 'worker', 'active', 1)")
+    conn.commit()
+    conn.close()
+    bus.remember(2, "Human is learning Rust", db_path=db)
+
+    rebuilt = agent_worker._build_system_prompt("right_hand", "Crew Boss", agent_id=2, db_path=db)
+    assert "A calm lighthouse keeper." in rebuilt
+    assert "Scout" in rebuilt
+    assert "Human is learning Rust" in rebuilt
+
+
+def test_recent_chat_served_from_conversation_window():
+    """Chat history comes from the in-memory window; new, edited and raw-SQL
+    messages still show up, and a steady-state read only probes."""
+    db = _setup_db()
+    bus.send_message(1, 2, "task", "Chat", body="Hello!", db_path=db)
+    agent_worker._insert_reply_direct(db, 2, 1, "Hi there!")
+    first = agent_worker._get_recent_chat(db, 1, 2)
+    assert [h["content"] for h in first] == ["Hello!", "Hi there!"]
+
+    # Raw insert (no conversation_key given) and a body rewrite
+    conn = bus.get_conn(db)
+    conn.execute("INSERT INTO messages (from_agent_id, to_agent_id, message_type, "
+                 "subject, body) VALUES (1, 2, 'task', 'Chat', 'Still there?')")
+    conn.commit()
+    key = conn.execute("SELECT conversation_key FROM messages ORDER BY id DESC "
+                       "LIMIT 1").fetchone()[0]
+    conn.close()
+    assert key == bus.conversation_key(2, 1) == "1:2"
+    msgs, total = bus.get_conversation(1, 2, db_path=db)
+    assert total == 3 and msgs[-1]["body"] == "Still there?"
+    bus.update_message_body(msgs[1]["id"], "Hi, edited!", db_path=db)
+    msgs, _ = bus.get_conversation(1, 2, limit=2, db_path=db)
+    assert [m["body"] for m in msgs] == ["Hi, edited!", "Still there?"]
+
+    statements = []
+    real = bus.get_conn(db)._real
+    real.set_trace_callback(statements.append)
+    try:
+        agent_worker._get_recent_chat(db, 1, 2)
+    finally:
+        real.set_trace_callback(None)
+    # (the crew-DM query for right_hand agents is separate)
+    chat_reads = [q for q in statements if "FROM messages" in q and "JOIN" not in q]
+    assert len(chat_reads) == 1 and "max(id)" in chat_reads[0]
+
+
+def test_call_llm_fits_history_to_budget_and_reports_tokens():
+    """Long history is trimmed to the prompt budget; the span gets token counts."""
+    db = _setup_db()
+    bus.set_config("prompt_token_budget", "1500", db_path=db)
+    history = [{"role": "user" if i % 2 == 0 else "assistant",
+                "content": f"We decided to ship feature {i} because users asked. "
+                           + "detail " * 40, "id": i}
+               for i in range(200)]
+    sent = {}
+
+    def fake_provider(provider, messages, model, db_path):
+        sent["messages"] = messages
+        return "ok"
+
+    with patch("agent_worker._call_provider", side_effect=fake_provider), \
+         patch("bus.record_span") as span:
+        assert agent_worker.call_llm("SYSTEM", "hi", history, model="claude",
+                                     db_path=db) == "ok"
+    msgs = sent["messages"]
+    assert msgs[0]["role"] == "system" and msgs[-1]["content"] == "hi"
+    assert len(msgs) < 200 and "condensed" in msgs[1]["content"]
+    assert all(set(m) == {"role", "content"} for m in msgs)
+    meta = span.call_args.kwargs["metadata"]
+    assert 0 < meta["prompt_tokens"] <= 1500 == meta["budget"]
+    assert meta["history_dropped"] == 200 - meta["history_kept"] > 0
+
+
+def test_llm_response_cache_opt_in_and_exclusions():
+    """Identical prompts hit the cache only when enabled; excluded agents never do."""
+    db = _setup_db()
+    calls = []
+
+    def fake_provider(provider, messages, model, db_path):
+        calls.append(provider)
+        return f"answer {len(calls)}"
+
+    def ask(agent_id=2):
+        return agent_worker.call_llm("SYSTEM", "daily briefing", model="claude",
+                                     db_path=db, agent_id=agent_id)
+
+    with patch("agent_worker._call_provider", side_effect=fake_provider):
+        assert ask() == "answer 1" and ask() == "answer 2"   # off by default
+
+        bus.set_config("llm_cache", "on", db_path=db)
+        first = ask()
+        bus.submit_write("SELECT 1", db_path=db).result(timeout=5)  # put committed
+        before = bus.get_llm_cache_stats(db)
+        assert ask() == first and len(calls) == 3
+        after = bus.get_llm_cache_stats(db)
+        assert after["hits"] == before["hits"] + 1
+        assert after["bytes_saved"] == before["bytes_saved"] + len(first)
+        assert after["entries"] == 1
+
+        bus.set_config("llm_cache_exclude", "2", db_path=db)
+        assert ask() != first and len(calls) == 4
+        assert ask(agent_id=3) == first                     # Vault still cached
+
+        bus.set_config("llm_cache_ttl", "0", db_path=db)    # 0 disables
+        ask(agent_id=3)
+        assert len(calls) == 5
+
+    conn = bus.get_conn(db)
+    conn.execute("UPDATE llm_cache SET expires_at = 0")
+    conn.commit()
+    conn.close()
+    assert bus.prune_llm_cache(db_path=db) == 1
+    assert bus.get_llm_cache_stats(db)["entries"] == 0
+
+
+def test_concurrent_identical_llm_calls_share_one_request():
+    """Single-flight: five identical concurrent prompts make one provider call."""
+    db = _setup_db()
+    release = threading.Event()
+    calls = []
+
+    def slow_provider(provider, messages, model, db_path):
+        calls.append(provider)
+        release.wait(5)
+        return "team answer"
+
+    before = agent_worker.get_singleflight_stats()
+    results = []
+    with patch("agent_worker._call_provider", side_effect=slow_provider):
+        threads = [threading.Thread(target=lambda: results.append(
+            agent_worker.call_llm("SYSTEM", "same task", model="claude", db_path=db)))
+            for _ in range(5)]
+        for t in threads:
+            t.start()
+        deadline = time.time() + 5
+        while (agent_worker.get_singleflight_stats()["coalesced"]
+               - before["coalesced"] < 4 and time.time() < deadline):
+            time.sleep(0.01)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        assert results == ["team answer"] * 5
+        assert calls == ["claude"]
+        after = agent_worker.get_singleflight_stats()
+        assert after["upstream"] - before["upstream"] == 1
+        assert after["coalesced"] - before["coalesced"] == 4
+
+        # Nothing lingers: the next call goes upstream again
+        agent_worker.call_llm("SYSTEM", "same task", model="claude", db_path=db)
+        assert len(calls) == 2
+
+
+def test_singleflight_cancellation_is_not_a_provider_failure():
+    """A timed-out waiter fails alone; a cancelled leader's result isn't shared."""
+    db = _setup_db()
+    release = threading.Event()
+    calls = []
+
+    def provider(provider, messages, model, db_path):
+        calls.append(provider)
+        while not release.is_set():
+            if agent_worker.http_pool.cancelled():
+                return "(Error: cancelled)"
+            time.sleep(0.01)
+        return "team answer"
+
+    def ask(token, results):
+        with agent_worker.http_pool.cancel_scope(token):
+            results.append(agent_worker.call_llm("SYSTEM", "same task",
+                                                 model="claude", db_path=db))
+
+    def wait_coalesced(before, n):
+        deadline = time.time() + 5
+        while (agent_worker.get_singleflight_stats()["coalesced"]
+               - before["coalesced"] < n and time.time() < deadline):
+            time.sleep(0.01)
+
+    agent_worker._router.reset()
+    try:
+        with patch("agent_worker._call_provider", side_effect=provider), \
+                patch.object(agent_worker._circuit, "record_failure") as failure:
+            # Waiter times out while the leader is still in flight
+            before = agent_worker.get_singleflight_stats()
+            leader_token, waiter_token = (agent_worker.http_pool.CancelToken(),
+                                          agent_worker.http_pool.CancelToken())
+            leader_out, waiter_out = [], []
+            leader = threading.Thread(target=ask, args=(leader_token, leader_out))
+            leader.start()
+            while not calls:
+                time.sleep(0.01)
+            waiter = threading.Thread(target=ask, args=(waiter_token, waiter_out))
+            waiter.start()
+            wait_coalesced(before, 1)
+            waiter_token.cancel()
+            waiter.join(5)
+            assert "cancelled" in waiter_out[0]
+            release.set()
+            leader.join(5)
+            assert leader_out == ["team answer"]
+            assert calls == ["claude"]
+
+            # Leader is cancelled: its waiter re-runs the request itself
+            release.clear()
+            calls.clear()
+            before = agent_worker.get_singleflight_stats()
+            leader_token, waiter_token = (agent_worker.http_pool.CancelToken(),
+                                          agent_worker.http_pool.CancelToken())
+            leader_out, waiter_out = [], []
+            leader = threading.Thread(target=ask, args=(leader_token, leader_out))
+            leader.start()
+            while not calls:
+                time.sleep(0.01)
+            waiter = threading.Thread(target=ask, args=(waiter_token, waiter_out))
+            waiter.start()
+            wait_coalesced(before, 1)
+            leader_token.cancel()
+            leader.join(5)
+            while len(calls) < 2:
+                time.sleep(0.01)
+            release.set()
+            waiter.join(5)
+            assert "cancelled" in leader_out[0]
+            assert waiter_out == ["team answer"]
+            assert calls == ["claude", "claude"]
+            failure.assert_not_called()
+        assert agent_worker.get_router_stats()["claude"]["error_rate"] == 0
+    finally:
+        agent_worker._router.reset()
+
+
+def test_latency_router_orders_fallbacks_and_demotes_slow_primary():
+    """Fallbacks go cheapest-first; only a pathologically slow primary moves."""
+    router = agent_worker._LatencyRouter()
+    assert router.order("claude", ["kimi", "groq", "ollama"]) == \
+        ["claude", "kimi", "groq", "ollama"]            # no data: configured order
+
+    for _ in range(12):
+        router.record("kimi", 4000)
+        router.record("groq", 300)
+        router.record("claude", 2000)
+    router.record("kimi", 0, ok=False)                  # failures raise expected cost
+    assert router.order("claude", ["kimi", "groq", "ollama"]) == \
+        ["claude", "ollama", "groq", "kimi"]            # unseen ollama gets explored
+    assert router.percentile("groq", 0.95) == 300
+    assert router.hedge_delay("groq") == agent_worker.HEDGE_MIN_DELAY
+
+    for _ in range(30):
+        router.record("claude", 60000)
+    assert router.order("claude", ["kimi", "groq"])[:2] == ["groq", "claude"]
+
+
+def test_hedged_call_cancels_slow_primary():
+    """Past the primary's p95 the next fallback is raced; the loser is cancelled."""
+    db = _setup_db()
+    bus.set_config("fallback_order", "groq", db_path=db)
+    bus.set_config("llm_hedge", "on", db_path=db)
+    primary_cancelled = threading.Event()
+
+    def fake_provider(provider, messages, model, db_path):
+        if provider == "groq":
+            return "fast answer"
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            if agent_worker.http_pool.cancelled():
+                primary_cancelled.set()
+                return "(Error: cancelled)"
+            time.sleep(0.01)
+        return "slow answer"
+
+    agent_worker._router.reset()
+    try:
+        for _ in range(agent_worker.ROUTER_MIN_SAMPLES):
+            agent_worker._router.record("kimi", 50)
+        with patch("agent_worker._call_provider", side_effect=fake_provider), \
+                patch("agent_worker.HEDGE_MIN_DELAY", 0.05):
+            start = time.time()
+            result = agent_worker.call_llm("SYSTEM", "hello", model="kimi", db_path=db)
+            assert result == "fast answer"
+            assert time.time() - start < 2
+            assert primary_cancelled.wait(2)
+        stats = agent_worker.get_router_stats()
+        assert stats["groq"]["count"] == 1 and stats["groq"]["error_rate"] == 0
+        assert stats["kimi"]["count"] == agent_worker.ROUTER_MIN_SAMPLES + 1
+        assert stats["kimi"]["error_rate"] == 0          # cancelled, not failed
+    finally:
+        agent_worker._router.reset()
+
+
+def test_retry_after_and_rate_limit_headers():
+    """Retry delays come from Retry-After (seconds or date) or x-ratelimit-reset."""
+    from email.message import Message
+    from email.utils import format_datetime
+    from datetime import datetime, timedelta, timezone
+
+    def headers(**kv):
+        msg = Message()
+        for k, v in kv.items():
+            msg[k.replace("_", "-")] = v
+        return msg
+
+    parse = agent_worker._retry_after_seconds
+    assert parse(headers(Retry_After="7")) == 7
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 <= parse(headers(Retry_After=format_datetime(when, usegmt=True))) <= 30
+    assert parse(headers(retry_after_ms="250")) == 0.25
+    assert parse(headers(x_ratelimit_remaining_requests="5",
+                         x_ratelimit_reset_requests="2s",
+                         x_ratelimit_remaining_tokens="0",
+                         x_ratelimit_reset_tokens="1m30s")) == 90
+    assert parse(headers()) is None
+
+
+def test_provider_limiter_queues_excess_and_grows_limit():
+    """Past the limit callers queue rather than fail; saturated successes raise it."""
+    limiter = agent_worker._ProviderLimiter()
+    release = threading.Event()
+    peak = []
+    lock = threading.Lock()
+    running = [0]
+    results = []
+
+    def call():
+        with lock:
+            running[0] += 1
+            peak.append(running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+        return "ok"
+
+    with patch.object(agent_worker, "_limiter", limiter):
+        threads = [threading.Thread(target=lambda: results.append(
+            agent_worker._limited("groq", call))) for _ in range(6)]
+        for t in threads:
+            t.start()
+        deadline = time.time() + 5
+        while limiter.snapshot().get("groq", {}).get("queued") != 2 and time.time() < deadline:
+            time.sleep(0.01)
+        stats = agent_worker.get_limiter_stats()["groq"]
+        assert stats["in_flight"] == agent_worker.LIMITER_INITIAL and stats["queued"] == 2
+        release.set()
+        for t in threads:
+            t.join(5)
+
+    assert results == ["ok"] * 6
+    assert max(peak) == agent_worker.LIMITER_INITIAL
+    assert limiter.snapshot()["groq"]["limit"] > agent_worker.LIMITER_INITIAL
+
+
+def test_429_halves_limit_and_pauses_provider():
+    """A 429 with Retry-After halves the limit; a long pause fails fast for fallback."""
+    import io
+    import urllib.error
+    from email.message import Message
+
+    db = _setup_db()
+    bus.set_config("groq_api_key", "test-key", db_path=db)
+    hdrs = Message()
+    hdrs["Retry-After"] = "120"
+    calls = []
+
+    def throttled(req, timeout=60):
+        calls.append(req.full_url)
+        raise urllib.error.HTTPError(req.full_url, 429, "Too Many Requests",
+                                     hdrs, io.BytesIO(b"slow down"))
+
+    limiter = agent_worker._ProviderLimiter()
+    msgs = [{"role": "user", "content": "hi"}]
+    with patch.object(agent_worker, "_limiter", limiter), \
+            patch("agent_worker.http_pool.urlopen", side_effect=throttled):
+        first = agent_worker._call_provider("groq", msgs, db_path=db)
+        assert first.startswith("(API error 429")
+        stats = limiter.snapshot()["groq"]
+        assert stats["throttled"] == 1 and stats["in_flight"] == 0
+        assert stats["limit"] == agent_worker.LIMITER_INITIAL * agent_worker.LIMITER_DECREASE
+        assert stats["paused_for"] > 100
+
+        start = time.time()
+        second = agent_worker._call_provider("groq", msgs, db_path=db)
+        assert second.startswith("(API error 429: groq is rate-limited")
+        assert agent_worker._is_llm_error(second)
+        assert len(calls) == 1 and time.time() - start < 1
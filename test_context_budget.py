@@ -0,0 +1,83 @@
+"""
+test_context_budget.py - Token budgeting for LLM prompts.
+
+Tests:
+  1. Estimates scale with text size; message estimates are cached by id
+  2. fit_sections trims low-priority sections first and keeps order
+  3. fit_messages keeps the newest history, adds a note, strips ids
+  4. prompt_budget respects the provider window and the cap
+
+Run:
+  pytest test_context_budget.py -v
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import context_budget
+
+
+def test_estimates_and_id_cache():
+    context_budget.clear_cache()
+    short = context_budget.estimate_tokens("hello world")
+    long = context_budget.estimate_tokens("hello world " * 100)
+    assert 0 < short < long
+    assert context_budget.estimate_tokens("") == 0
+
+    msg = {"role": "user", "content": "x" * 400, "id": 7}
+    first = context_budget.message_tokens(msg)
+    before = context_budget.get_stats()
+    assert context_budget.message_tokens(msg) == first
+    after = context_budget.get_stats()
+    assert after["hits"] == before["hits"] + 1
+    # A rewritten body (same id, new length) is re-measured
+    msg["content"] = "x" * 800
+    assert context_budget.message_tokens(msg) > first
+
+
+def test_fit_sections_by_priority():
+    sections = [
+        (0, "IDENTITY: " + "a" * 200),
+        (3, "MEMORIES:\n" + "\n".join(f"- memory {i}" for i in range(200))),
+        (1, "RULES: be kind"),
+        (4, "KNOWLEDGE: " + "k" * 2000),
+    ]
+    text, stats = context_budget.fit_sections(sections, 400)
+    assert stats["tokens"] <= 400
+    assert "IDENTITY" in text and "RULES: be kind" in text
+    assert "KNOWLEDGE" not in text          # lowest priority went first
+    assert "[trimmed]" in text              # memories trimmed, not dropped
+    assert text.index("IDENTITY") < text.index("MEMORIES") < text.index("RULES")
+
+    untouched, stats = context_budget.fit_sections(sections[:3:2], 1000)
+    assert untouched == sections[0][1] + "\n\n" + sections[2][1]
+    assert stats["trimmed"] == stats["dropped"] == 0
+
+
+def test_fit_messages_keeps_newest_and_strips_ids():
+    history = [{"role": "user" if i % 2 == 0 else "assistant",
+                "content": f"message {i} " + "w" * 200, "id": i}
+               for i in range(100)]
+    messages, stats = context_budget.fit_messages(
+        "SYSTEM", history, "latest question", 2000,
+        summarize=lambda dropped: f"summary of {len(dropped)}")
+    assert stats["prompt_tokens"] <= 2000
+    assert stats["history_dropped"] > 0
+    assert stats["history_kept"] + stats["history_dropped"] == 100
+    assert messages[0] == {"role": "system", "content": "SYSTEM"}
+    assert messages[1]["content"] == f"summary of {stats['history_dropped']}"
+    assert messages[-2]["content"].startswith("message 99 ")
+    assert messages[-1] == {"role": "user", "content": "latest question"}
+    assert all("id" not in m for m in messages)
+
+    everything, stats = context_budget.fit_messages("S", history[:3], "q", 10_000)
+    assert len(everything) == 5 and stats["history_dropped"] == 0
+
+
+def test_prompt_budget_window_and_cap():
+    assert context_budget.prompt_budget("claude") == context_budget.DEFAULT_PROMPT_BUDGET
+    assert context_budget.prompt_budget("claude", cap=4000) == 4000
+    small = context_budget.context_window("ollama") - context_budget.RESPONSE_RESERVE
+    assert context_budget.prompt_budget("ollama", cap=10 ** 9) == small
@@ -93,7 +93,7 @@ def test_send_webhook_success_204():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp):
+    with patch("http_pool.urlopen", return_value=mock_resp):
         result = discord_bridge._send_webhook(
             "https://discord.com/api/webhooks/123/abc",
             content="Test message",
@@ -110,7 +110,7 @@ def test_send_webhook_success_with_json():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp):
+    with patch("http_pool.urlopen", return_value=mock_resp):
         result = discord_bridge._send_webhook(
             "https://discord.com/api/webhooks/123/abc",
             content="Test",
@@ -126,7 +126,7 @@ def test_send_webhook_http_error():
     err = urllib.error.HTTPError(
         "http://fake", 400, "Bad Request", {}, err_body)
 
-    with patch("urllib.request.urlopen", side_effect=err):
+    with patch("http_pool.urlopen", side_effect=err):
         result = discord_bridge._send_webhook(
             "https://discord.com/api/webhooks/123/abc",
             content="Test",
@@ -137,7 +137,7 @@ def test_send_webhook_http_error():
 
 def test_send_webhook_network_error():
     """_send_webhook handles network/connection errors."""
-    with patch("urllib.request.urlopen",
+    with patch("http_pool.urlopen",
                side_effect=ConnectionError("Connection refused")):
         result = discord_bridge._send_webhook(
             "https://discord.com/api/webhooks/123/abc",
@@ -157,7 +157,7 @@ def test_send_webhook_content_truncation():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_url:
+    with patch("http_pool.urlopen", return_value=mock_resp) as mock_url:
         discord_bridge._send_webhook(
             "https://discord.com/api/webhooks/123/abc",
             content=long_content,
@@ -179,7 +179,7 @@ def test_send_webhook_embed_limit():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_url:
+    with patch("http_pool.urlopen", return_value=mock_resp) as mock_url:
         discord_bridge._send_webhook(
             "https://discord.com/api/webhooks/123/abc",
             embeds=embeds,
@@ -205,7 +205,7 @@ def test_post_message_success():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp):
+    with patch("http_pool.urlopen", return_value=mock_resp):
         result = discord_bridge.post_message("Test message", "general", db)
         assert result["ok"] is True
 
@@ -236,7 +236,7 @@ def test_post_embed_success():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_url:
+    with patch("http_pool.urlopen", return_value=mock_resp) as mock_url:
         result = discord_bridge.post_embed(
             title="Test Embed",
             description="Test description",
@@ -267,7 +267,7 @@ def test_post_embed_truncates_description():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_url:
+    with patch("http_pool.urlopen", return_value=mock_resp) as mock_url:
         discord_bridge.post_embed(
             title="Long",
             description="x" * 5000,
@@ -290,7 +290,7 @@ def test_post_embed_with_url():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_url:
+    with patch("http_pool.urlopen", return_value=mock_resp) as mock_url:
         discord_bridge.post_embed(
             title="Click Me",
             description="Link embed",
@@ -318,7 +318,7 @@ def test_post_announcement():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_url:
+    with patch("http_pool.urlopen", return_value=mock_resp) as mock_url:
         result = discord_bridge.post_announcement(
             title="Launch!",
             body="Crew Bus is live!",
@@ -367,7 +367,7 @@ def test_post_approved_draft_text():
     mock_resp.__enter__ = lambda s: s
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp):
+    with patch("http_pool.urlopen", return_value=mock_resp):
         result = discord_bridge.post_approved_draft(draft["draft_id"], db)
         assert result["ok"] is True
 
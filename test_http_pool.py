@@ -0,0 +1,166 @@
+"""
+test_http_pool.py - Keep-alive HTTP connection pool tests.
+
+Tests:
+  1. Sequential requests to one host reuse a single connection
+  2. 4xx/5xx raise urllib.error.HTTPError with a readable body
+  3. Redirects are followed; POST→GET on 303
+  4. Idle connections past IDLE_TIMEOUT are evicted
+  5. A connection dropped by the server while idle is retried once
+  6. Partially read responses are not returned to the pool
+
+Run:
+  pytest test_http_pool.py -v
+"""
+
+import http.server
+import sys
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import http_pool
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code, body=b"", headers=None):
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/redirect":
+            self._reply(302, headers={"Location": "/ok"})
+        elif self.path == "/missing":
+            self._reply(404, b"not here")
+        elif self.path == "/drop":
+            self._reply(200, b"bye")
+            self.close_connection = True
+            self.connection.close()
+        else:
+            self._reply(200, f"GET {self.path}".encode())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/see-other":
+            self._reply(303, headers={"Location": "/ok"})
+        else:
+            self._reply(200, b"POST " + body)
+
+
+def _server():
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_port}"
+
+
+def _stats_delta(before):
+    after = http_pool.get_stats()
+    return {k: after[k] - before[k] for k in ("hits", "misses", "evictions", "retries")}
+
+
+def test_reuses_connection():
+    srv, base = _server()
+    try:
+        before = http_pool.get_stats()
+        for i in range(5):
+            with http_pool.urlopen(f"{base}/n{i}", timeout=5) as resp:
+                assert resp.status == 200
+                assert resp.read() == f"GET /n{i}".encode()
+        req = urllib.request.Request(f"{base}/echo", data=b"hi", method="POST")
+        with http_pool.urlopen(req, timeout=5) as resp:
+            assert resp.read() == b"POST hi"
+        assert _stats_delta(before) == {"hits": 5, "misses": 1,
+                                        "evictions": 0, "retries": 0}
+        assert http_pool.last_reused()
+    finally:
+        srv.shutdown()
+        http_pool.close_all()
+
+
+def test_http_error_raised_with_body():
+    srv, base = _server()
+    try:
+        try:
+            http_pool.urlopen(f"{base}/missing", timeout=5)
+            assert False, "expected HTTPError"
+        except urllib.error.HTTPError as e:
+            assert e.code == 404
+            assert e.read() == b"not here"
+    finally:
+        srv.shutdown()
+        http_pool.close_all()
+
+
+def test_follows_redirects():
+    srv, base = _server()
+    try:
+        with http_pool.urlopen(f"{base}/redirect", timeout=5) as resp:
+            assert resp.read() == b"GET /ok"
+            assert resp.geturl() == f"{base}/ok"
+        req = urllib.request.Request(f"{base}/see-other", data=b"x", method="POST")
+        with http_pool.urlopen(req, timeout=5) as resp:
+            assert resp.read() == b"GET /ok"
+    finally:
+        srv.shutdown()
+        http_pool.close_all()
+
+
+def test_idle_connections_evicted():
+    srv, base = _server()
+    old_timeout = http_pool.IDLE_TIMEOUT
+    try:
+        with http_pool.urlopen(f"{base}/a", timeout=5) as resp:
+            resp.read()
+        http_pool.IDLE_TIMEOUT = -1
+        before = http_pool.get_stats()
+        with http_pool.urlopen(f"{base}/b", timeout=5) as resp:
+            resp.read()
+        assert _stats_delta(before)["evictions"] == 1
+        assert _stats_delta(before)["misses"] == 1
+    finally:
+        http_pool.IDLE_TIMEOUT = old_timeout
+        srv.shutdown()
+        http_pool.close_all()
+
+
+def test_stale_connection_retried():
+    srv, base = _server()
+    try:
+        with http_pool.urlopen(f"{base}/drop", timeout=5) as resp:
+            assert resp.read() == b"bye"
+        # The pooled socket was closed server-side; the next request must
+        # transparently reconnect.
+        before = http_pool.get_stats()
+        with http_pool.urlopen(f"{base}/after", timeout=5) as resp:
+            assert resp.read() == b"GET /after"
+        delta = _stats_delta(before)
+        assert delta["retries"] == 1
+        assert delta["misses"] == 1
+    finally:
+        srv.shutdown()
+        http_pool.close_all()
+
+
+def test_partial_read_not_pooled():
+    srv, base = _server()
+    try:
+        http_pool.close_all()
+        with http_pool.urlopen(f"{base}/partial-read", timeout=5) as resp:
+            assert resp.read(3) == b"GET"
+        assert http_pool.get_stats()["idle"] == 0
+    finally:
+        srv.shutdown()
+        http_pool.close_all()
@@ -182,6 +182,50 @@ def test_is_not_duplicate_memory():
         2, "I work at a coffee shop downtown", db_path)
 
 
+def test_search_memory_uses_fts_index():
+    """Memory search is served by the FTS index and tracks updates/forgets."""
+    db_path = _setup_db()
+    mid = bus.remember(2, "Prefers oat milk in coffee", db_path=db_path)
+    bus.remember(2, "Coffee shop opens at seven", db_path=db_path)
+
+    conn = bus.get_conn(db_path)
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT rowid FROM agent_memory_fts "
+        "WHERE agent_memory_fts MATCH '\"oat milk\"'"))
+    assert "VIRTUAL TABLE INDEX" in plan
+
+    # Substring semantics (case-insensitive, mid-word) like the old LIKE scan
+    hits = bus.search_agent_memory(2, "OAT MIL", db_path=db_path)
+    assert [h["id"] for h in hits] == [mid]
+    assert len(bus.search_agent_memory(2, "coffee", db_path=db_path)) == 2
+    # Short queries fall back to LIKE
+    assert len(bus.search_agent_memory(2, "at", db_path=db_path)) == 2
+
+    conn.execute("UPDATE agent_memory SET content='Prefers soy milk' WHERE id=?", (mid,))
+    conn.commit()
+    assert bus.search_agent_memory(2, "oat milk", db_path=db_path) == []
+    bus.forget(2, memory_id=mid, db_path=db_path)
+    assert bus.search_agent_memory(2, "soy milk", db_path=db_path) == []
+
+
+def test_fts_backfills_existing_rows():
+    """init_db back-fills the FTS index for rows written before it existed."""
+    db_path = _setup_db()
+    bus.remember(2, "Anniversary is in June", db_path=db_path)
+    bus.store_knowledge(2, "lesson", "Quarterly taxes", {"note": "due in June"},
+                        tags="finance", db_path=db_path)
+    conn = bus.get_conn(db_path)
+    conn.execute("DROP TABLE agent_memory_fts")
+    conn.execute("DROP TABLE knowledge_fts")
+    conn.commit()
+
+    bus.init_db(db_path=db_path)
+    assert len(bus.search_agent_memory(2, "anniversary", db_path=db_path)) == 1
+    results = bus.search_knowledge("in June", db_path=db_path)
+    assert [r["subject"] for r in results] == ["Quarterly taxes"]
+    assert bus.search_knowledge("finan", db_path=db_path)[0]["tags"] == "finance"
+
+
 # ===== Change 3: Feedback-Loop Learning =====
 
 def test_positive_feedback_boosts_importance():
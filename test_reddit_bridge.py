@@ -128,7 +128,7 @@ def test_get_token_refresh():
     mock_ctx.__enter__ = lambda s: s
     mock_ctx.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_ctx):
+    with patch("http_pool.urlopen", return_value=mock_ctx):
         token = reddit_bridge._get_token(db)
         assert token == "new_token_123"
         assert reddit_bridge._access_token == "new_token_123"
@@ -153,7 +153,7 @@ def test_get_token_auth_failure():
     err = urllib.error.HTTPError(
         "http://fake", 401, "Unauthorized", {}, err_body)
 
-    with patch("urllib.request.urlopen", side_effect=err):
+    with patch("http_pool.urlopen", side_effect=err):
         try:
             reddit_bridge._get_token(db)
             assert False, "Should have raised ValueError"
@@ -180,7 +180,7 @@ def test_api_request_get():
     mock_ctx.__exit__ = MagicMock(return_value=False)
 
     with patch.object(reddit_bridge, "_get_token", return_value="fake_token"), \
-         patch("urllib.request.urlopen", return_value=mock_ctx) as mock_url:
+         patch("http_pool.urlopen", return_value=mock_ctx) as mock_url:
         result = reddit_bridge._api_request("GET", "/r/test/hot", db_path=db)
         assert "data" in result
 
@@ -201,7 +201,7 @@ def test_api_request_http_error():
         "http://fake", 403, "Forbidden", {}, err_body)
 
     with patch.object(reddit_bridge, "_get_token", return_value="token"), \
-         patch("urllib.request.urlopen", side_effect=err):
+         patch("http_pool.urlopen", side_effect=err):
         result = reddit_bridge._api_request("GET", "/api/me", db_path=db)
         assert result["ok"] is False
         assert "403" in result["error"]
@@ -213,7 +213,7 @@ def test_api_request_network_error():
     _setup_creds(db)
 
     with patch.object(reddit_bridge, "_get_token", return_value="token"), \
-         patch("urllib.request.urlopen",
+         patch("http_pool.urlopen",
                side_effect=ConnectionError("refused")):
         result = reddit_bridge._api_request("GET", "/api/me", db_path=db)
         assert result["ok"] is False
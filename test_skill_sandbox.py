@@ -16,6 +16,7 @@ Tests:
   12. get_skill_health_report() returns per-agent data
   13. get_health_summary() returns aggregate counts
   14. run_health_check() classifies skills correctly
+  15. two usage accumulators on one DB add up (multi-process workers)
 
 Run:
   pytest test_skill_sandbox.py -v
@@ -109,7 +110,7 @@ conn.close()
 check("add_skill_to_agent() auto-creates skill_health record",
       row is not None and row["health_score"] == 100)
 
-# 3. record_skill_usage increments total_uses
+# 3. record_skill_usage increments total_uses (batched until flushed)
 skill_sandbox.record_skill_usage(AGENT_ID, response_ms=500, db_path=TEST_DB)
 conn = bus.get_conn(TEST_DB)
 row = conn.execute(
@@ -118,11 +119,23 @@ row = conn.execute(
     (AGENT_ID,)
 ).fetchone()
 conn.close()
+check("record_skill_usage() defers the write until a flush",
+      row is not None and row["total_uses"] == 0)
+check("flush_skill_usage() writes the pending rows",
+      skill_sandbox.flush_skill_usage(TEST_DB) >= 1)
+conn = bus.get_conn(TEST_DB)
+row = conn.execute(
+    "SELECT total_uses, error_count FROM skill_health "
+    "WHERE agent_id=? AND skill_name='test-skill'",
+    (AGENT_ID,)
+).fetchone()
+conn.close()
 check("record_skill_usage() increments total_uses",
       row is not None and row["total_uses"] == 1)
 
 # 4. record_skill_usage with error increments error_count
 skill_sandbox.record_skill_usage(AGENT_ID, response_ms=600, had_error=True, db_path=TEST_DB)
+skill_sandbox.flush_skill_usage(TEST_DB)
 conn = bus.get_conn(TEST_DB)
 row = conn.execute(
     "SELECT total_uses, error_count FROM skill_health "
@@ -136,6 +149,7 @@ check("record_skill_usage() increments error_count on error",
 # 5. record_skill_usage with charter violation
 skill_sandbox.record_skill_usage(
     AGENT_ID, response_ms=500, had_charter_violation=True, db_path=TEST_DB)
+skill_sandbox.flush_skill_usage(TEST_DB)
 conn = bus.get_conn(TEST_DB)
 row = conn.execute(
     "SELECT charter_violations, health_score FROM skill_health "
@@ -172,10 +186,13 @@ score = skill_sandbox._compute_health_score(20, 0, 0, 0, 3100, 1000)
 check("_compute_health_score() penalizes response spikes",
       score < 100, f"score={score}")
 
-# 11. get_skill_health_report returns data
+# 11. get_skill_health_report returns data (pending usage flushed first)
+skill_sandbox.record_skill_usage(AGENT_ID, response_ms=500, db_path=TEST_DB)
 report = skill_sandbox.get_skill_health_report(agent_id=AGENT_ID, db_path=TEST_DB)
 check("get_skill_health_report() returns data",
       len(report) >= 1)
+check("get_skill_health_report() includes unflushed usage",
+      any(r["skill_name"] == "test-skill" and r["total_uses"] == 4 for r in report))
 check("get_skill_health_report() includes error_rate",
       "error_rate" in report[0])
 
@@ -249,6 +266,67 @@ skill_names = [s["skill_name"] for s in skills]
 check("restore_skill() re-adds skill to agent",
       "test-skill" in skill_names)
 
+# 19. Two accumulators (two worker processes) sharing one database
+conn = bus.get_conn(TEST_DB)
+conn.execute(
+    "INSERT INTO agents (name, agent_type, status, description) "
+    "VALUES ('TwinWorker', 'worker', 'active', 'Shared by two workers')"
+)
+conn.commit()
+TWIN_ID = conn.execute("SELECT id FROM agents WHERE name='TwinWorker'").fetchone()[0]
+conn.close()
+skill_sandbox.init_skill_health(TWIN_ID, "sk1", db_path=TEST_DB)
+acc_a = skill_sandbox._UsageAccumulator()
+acc_b = skill_sandbox._UsageAccumulator()
+for _ in range(5):
+    acc_a.record(TWIN_ID, TEST_DB, 400, False, False, False)
+for _ in range(3):
+    acc_b.record(TWIN_ID, TEST_DB, 400, True, False, False)
+acc_a.flush(TEST_DB)
+acc_b.flush(TEST_DB)
+
+
+def _twin_row(skill_name):
+    conn = bus.get_conn(TEST_DB)
+    row = conn.execute(
+        "SELECT total_uses, error_count, status FROM skill_health "
+        "WHERE agent_id=? AND skill_name=?",
+        (TWIN_ID, skill_name),
+    ).fetchone()
+    conn.close()
+    return row
+
+
+row = _twin_row("sk1")
+check("two accumulators add up instead of overwriting",
+      row["total_uses"] == 8 and row["error_count"] == 3, dict(row))
+
+# A skill installed by the other process is counted by the next flush
+with bus.db_write(TEST_DB) as wconn:
+    wconn.execute(
+        "INSERT INTO skill_health (agent_id, skill_name, status, installed_at, "
+        "health_score) VALUES (?, 'sk2', 'active', '2026-01-01T00:00:00Z', 100)",
+        (TWIN_ID,),
+    )
+for _ in range(4):
+    acc_a.record(TWIN_ID, TEST_DB, 400, False, False, False)
+acc_a.flush(TEST_DB)
+check("skill installed elsewhere is counted",
+      _twin_row("sk2")["total_uses"] == 4, dict(_twin_row("sk2")))
+
+# A reset made elsewhere is not undone by earlier counts
+with bus.db_write(TEST_DB) as wconn:
+    wconn.execute(
+        "UPDATE skill_health SET total_uses=0, error_count=0 "
+        "WHERE agent_id=? AND skill_name='sk1'",
+        (TWIN_ID,),
+    )
+acc_b.record(TWIN_ID, TEST_DB, 400, False, False, False)
+acc_b.flush(TEST_DB)
+row = _twin_row("sk1")
+check("reset made elsewhere survives the next flush",
+      row["total_uses"] == 1 and row["error_count"] == 0, dict(row))
+
 # ---------------------------------------------------------------------------
 # Summary
 # ---------------------------------------------------------------------------
@@ -405,6 +405,425 @@ def test_private_session_rapid_messages():
     teardown()
 
 
+# ── Test 11: Group commit under concurrent writers ───────────────────
+
+def test_group_commit_concurrent_writers():
+    """Concurrent db_write callers share commits; a failing writer only
+    rolls back its own block."""
+    agents = setup()
+    receiver = agents["worker_1"]
+    errors = []
+
+    def writer(idx):
+        try:
+            for j in range(20):
+                bus.send_message(
+                    agents[f"worker_{idx}"]["id"], receiver["id"],
+                    message_type="report", subject=f"gc {idx}-{j}",
+                    db_path=TEST_DB,
+                )
+        except Exception as e:
+            errors.append(e)
+
+    def failing_writer():
+        for _ in range(20):
+            try:
+                with bus.db_write(TEST_DB) as conn:
+                    conn.execute(
+                        "INSERT INTO crew_config (key, value) VALUES ('gc_probe', 'x')")
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+
+    before = bus.get_writer_stats(TEST_DB)
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(2, 8)]
+    threads.append(threading.Thread(target=failing_writer))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    after = bus.get_writer_stats(TEST_DB)
+
+    assert not errors, errors
+    assert len(bus.read_inbox(receiver["id"], db_path=TEST_DB)) == 120
+    assert bus.get_config("gc_probe", "", db_path=TEST_DB) == ""
+    # 120 sends were committed in no more batches than writes
+    assert after["batches"] - before["batches"] <= after["writes"] - before["writes"]
+    print(f"  PASS: {after['writes'] - before['writes']} writes in "
+          f"{after['batches'] - before['batches']} commits")
+    teardown()
+
+
+def test_submit_write_future_lastrowid():
+    """submit_write() resolves to the committed row's lastrowid."""
+    setup()
+    futures = [
+        bus.submit_write(
+            "INSERT INTO crew_config (key, value) VALUES (?, ?)",
+            (f"k{i}", str(i)), db_path=TEST_DB)
+        for i in range(25)
+    ]
+    rowids = [f.result(timeout=5) for f in futures]
+    assert len(set(rowids)) == 25
+    assert bus.get_config("k24", db_path=TEST_DB) == "24"
+
+    dup = bus.submit_write(
+        "INSERT INTO crew_config (key, value) VALUES ('k0', 'dup')", db_path=TEST_DB)
+    try:
+        dup.result(timeout=5)
+        assert False, "expected IntegrityError"
+    except sqlite3.IntegrityError:
+        pass
+    teardown()
+
+
+def test_db_profile_applies_pragmas():
+    """set_db_profile() persists and new connections use its PRAGMAs."""
+    setup()
+    assert bus.get_db_profile(TEST_DB) == "safe"
+    bus.set_db_profile("balanced", db_path=TEST_DB)
+    assert bus.get_config("db_profile", db_path=TEST_DB) == "balanced"
+
+    conn = bus.get_conn(TEST_DB)
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    with bus.db_write(TEST_DB) as wconn:
+        assert wconn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+    try:
+        bus.set_db_profile("reckless", db_path=TEST_DB)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    bus.set_db_profile("safe", db_path=TEST_DB)
+    assert bus.get_conn(TEST_DB).execute("PRAGMA synchronous").fetchone()[0] == 2
+    teardown()
+
+
+def test_db_profile_switch_with_batch_open():
+    """A switch during an open batch keeps one writer and reopens it after."""
+    setup()
+    key = str(TEST_DB)
+    old = bus._get_writer(TEST_DB)
+    with bus.db_write(TEST_DB) as wconn:
+        wconn.execute("INSERT OR REPLACE INTO crew_config (key, value) "
+                      "VALUES ('switch_probe', '1')")
+        bus._switch_profile(key, "fast")
+        assert bus._get_writer(TEST_DB) is old      # no second writer
+        assert wconn.execute("PRAGMA synchronous").fetchone()[0] == 2  # batch untouched
+    assert bus._get_writer(TEST_DB) is old
+    with bus.db_write(TEST_DB) as wconn:
+        assert wconn.execute("PRAGMA synchronous").fetchone()[0] == 0
+    assert bus.get_config("switch_probe", db_path=TEST_DB) == "1"
+    bus._switch_profile(key, "safe")
+    teardown()
+
+
+def test_db_profile_change_from_another_process():
+    """A profile written by another process reaches cached and writer conns."""
+    setup()
+    conn = bus.get_conn(TEST_DB)
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2  # FULL
+    with bus.db_write(TEST_DB) as wconn:
+        assert wconn.execute("PRAGMA synchronous").fetchone()[0] == 2
+
+    other = sqlite3.connect(str(TEST_DB))  # e.g. the dashboard process
+    other.execute("INSERT OR REPLACE INTO crew_config (key, value) "
+                  "VALUES ('db_profile', 'fast')")
+    other.commit()
+    other.close()
+
+    conn = bus.get_conn(TEST_DB)
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0  # OFF
+    assert bus.get_db_profile(TEST_DB) == "fast"
+    with bus.db_write(TEST_DB) as wconn:
+        assert wconn.execute("PRAGMA synchronous").fetchone()[0] == 0
+    bus.set_db_profile("safe", db_path=TEST_DB)
+    teardown()
+
+
+def test_telemetry_spans_buffered_and_flushed():
+    """record_span() buffers; reads flush; a full buffer drops and counts."""
+    agents = setup()
+    worker_id = agents["worker_0"]["id"]
+    for i in range(50):
+        bus.record_span("llm.call", agent_id=worker_id, duration_ms=i,
+                        metadata={"i": i}, db_path=TEST_DB)
+    # A span for a nonexistent agent fails its FK but not the whole batch
+    bus.record_span("llm.call", agent_id=99999, duration_ms=1, db_path=TEST_DB)
+
+    spans = bus.get_telemetry(limit=100, span_name="llm.call", db_path=TEST_DB)
+    assert len(spans) == 50
+    assert bus.get_telemetry_sink_stats()["buffered"] == 0
+
+    old_size = bus.TELEMETRY_BUFFER_SIZE
+    dropped_before = bus.get_telemetry_sink_stats()["dropped"]
+    bus.TELEMETRY_BUFFER_SIZE = 0
+    try:
+        bus.record_span("dropped.span", db_path=TEST_DB)
+    finally:
+        bus.TELEMETRY_BUFFER_SIZE = old_size
+    assert bus.get_telemetry_sink_stats()["dropped"] == dropped_before + 1
+    assert bus.get_telemetry(span_name="dropped.span", db_path=TEST_DB) == []
+    teardown()
+
+
+def test_telemetry_rollup_percentiles():
+    """Stats come from per-minute rollups and survive raw-span pruning."""
+    agents = setup()
+    worker_id = agents["worker_0"]["id"]
+    for ms in range(1, 1001):
+        bus.record_span("llm.call", agent_id=worker_id, duration_ms=ms,
+                        status="error" if ms % 10 == 0 else "ok", db_path=TEST_DB)
+    bus.record_span("heartbeat.run", duration_ms=5, db_path=TEST_DB)
+
+    stats = {s["span_name"]: s for s in
+             bus.get_telemetry_stats(db_path=TEST_DB)["stats"]}
+    llm = stats["llm.call"]
+    assert llm["call_count"] == 1000
+    assert llm["error_count"] == 100
+    assert llm["avg_ms"] == 500.5
+    # Histogram bins are within ~6% of the exact value
+    for key, exact in (("p50_ms", 501), ("p95_ms", 951), ("p99_ms", 991)):
+        assert abs(llm[key] - exact) <= exact * 0.07, (key, llm[key])
+
+    by_agent = bus.get_telemetry_stats(by_agent=True, db_path=TEST_DB)["stats"]
+    assert {(s["span_name"], s["agent_id"]) for s in by_agent} == {
+        ("llm.call", worker_id), ("heartbeat.run", None)}
+
+    # Age the raw spans past retention: rollups keep the percentiles
+    conn = bus.get_conn(TEST_DB)
+    conn.execute("UPDATE telemetry SET created_at='2000-01-01T00:00:00Z'")
+    conn.commit()
+    assert bus.cleanup_old_telemetry(days=7, db_path=TEST_DB) == 1001
+    assert bus.get_telemetry_stats(db_path=TEST_DB)["stats"][0]["call_count"] == 1000
+    teardown()
+
+
+def test_lease_claims_no_double_processing():
+    """Concurrent workers claim disjoint messages; expired leases re-queue."""
+    agents = setup()
+    human = agents["human"]["id"]
+    conn = bus.get_conn(TEST_DB)
+    conn.executemany(
+        "INSERT INTO messages (from_agent_id, to_agent_id, message_type, subject) "
+        "VALUES (?, ?, 'task', ?)",
+        [(human, agents[f"worker_{i % 10}"]["id"], f"job {i}") for i in range(300)],
+    )
+    conn.commit()
+
+    claimed = {}
+    lock = threading.Lock()
+
+    def worker(wid):
+        while True:
+            ids = bus.claim_messages(wid, lease_seconds=30, limit=25, db_path=TEST_DB)
+            if not ids:
+                return
+            with lock:
+                for mid in ids:
+                    assert mid not in claimed, f"message {mid} claimed twice"
+                    claimed[mid] = wid
+            for mid in ids:
+                assert bus.complete_message(mid, wid, db_path=TEST_DB)
+
+    threads = [threading.Thread(target=worker, args=(f"proc-{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(claimed) == 300
+    stats = {w["worker_id"]: w for w in bus.get_worker_stats(db_path=TEST_DB)}
+    assert sum(w["completed"] for w in stats.values()) == 300
+    assert conn.execute(
+        "SELECT COUNT(*) FROM messages WHERE status='queued'").fetchone()[0] == 0
+
+    # A worker that dies mid-turn: its lease expires and another worker takes over
+    conn.execute(
+        "INSERT INTO messages (from_agent_id, to_agent_id, message_type, subject) "
+        "VALUES (?, ?, 'task', 'crashy')", (human, agents["worker_0"]["id"]))
+    conn.commit()
+    [mid] = bus.claim_messages("dead", lease_seconds=0, db_path=TEST_DB)
+    assert bus.claim_messages("live", lease_seconds=30, db_path=TEST_DB) == [mid]
+    assert not bus.mark_delivered(mid, db_path=TEST_DB)  # leased: the worker completes it
+    assert not bus.complete_message(mid, "dead", db_path=TEST_DB)
+    assert bus.complete_message(mid, "live", db_path=TEST_DB)
+    assert {w["worker_id"]: w for w in bus.get_worker_stats(
+        db_path=TEST_DB)}["dead"]["expired"] == 1
+
+    # A message that outlives MAX_CLAIM_ATTEMPTS workers is dead-lettered
+    conn.execute(
+        "INSERT INTO messages (from_agent_id, to_agent_id, message_type, subject) "
+        "VALUES (?, ?, 'task', 'poison')", (human, agents["worker_0"]["id"]))
+    conn.commit()
+    for i in range(bus.MAX_CLAIM_ATTEMPTS):
+        assert len(bus.claim_messages(f"victim-{i}", lease_seconds=0, db_path=TEST_DB)) == 1
+    assert bus.claim_messages("next", db_path=TEST_DB) == []
+    assert conn.execute(
+        "SELECT status FROM messages WHERE subject='poison'").fetchone()[0] == "delivered"
+    conn.close()
+    teardown()
+
+
+def test_claim_messages_without_returning():
+    """Claims use plain SELECT + UPDATE, so SQLite < 3.35 (no RETURNING) works."""
+    agents = setup()
+    human = agents["human"]["id"]
+    conn = bus.get_conn(TEST_DB)
+    conn.executemany(
+        "INSERT INTO messages (from_agent_id, to_agent_id, message_type, subject) "
+        "VALUES (?, ?, 'task', ?)",
+        [(human, agents["worker_1"]["id"], f"job {i}") for i in range(5)],
+    )
+    conn.commit()
+
+    statements = []
+    with bus.db_write(TEST_DB) as wconn:
+        wconn.set_trace_callback(statements.append)
+    try:
+        ids = bus.claim_messages("old-sqlite", limit=3, db_path=TEST_DB)
+    finally:
+        with bus.db_write(TEST_DB) as wconn:
+            wconn.set_trace_callback(None)
+    assert len(ids) == 3 and ids == sorted(ids)
+    assert statements and not any("RETURNING" in s.upper() for s in statements)
+    rows = conn.execute(
+        "SELECT id, claimed_by, claim_attempts FROM messages "
+        "WHERE claimed_by IS NOT NULL").fetchall()
+    assert sorted(r["id"] for r in rows) == ids
+    assert all(r["claimed_by"] == "old-sqlite" and r["claim_attempts"] == 1 for r in rows)
+    assert len(bus.claim_messages("other", db_path=TEST_DB)) == 2
+    conn.close()
+    teardown()
+
+
+# ── Test 17: In-memory agent directory ──────────────────────────────
+
+def test_agent_directory_lookups_and_invalidation():
+    """Routing/name lookups come from the directory and track every write."""
+    agents = setup()
+    boss = agents["boss"]["id"]
+    w1 = agents["worker_1"]["id"]
+
+    directory = bus._agent_directory(TEST_DB)
+    assert bus._agent_directory(TEST_DB) is directory  # no change, no reload
+    assert bus.lookup_agent(w1, db_path=TEST_DB)["name"] == "Worker-1"
+    assert bus.find_agent("worker-1", db_path=TEST_DB)["id"] == w1
+    assert bus.find_agent("Nobody", db_path=TEST_DB) is None
+
+    # Raw SQL (another process, a test) is picked up through data_versions
+    conn = bus.get_conn(TEST_DB)
+    conn.execute("UPDATE agents SET title='Research Lead' WHERE id=?", (w1,))
+    conn.commit()
+    conn.close()
+    assert bus.find_agent("research lead", db_path=TEST_DB)["id"] == w1
+    assert bus.get_agent_by_name("Research Lead", db_path=TEST_DB)["id"] == w1
+
+    # Bus writers invalidate it too; routing sees the change immediately
+    bus.quarantine_agent(w1, db_path=TEST_DB)
+    try:
+        bus.send_message(boss, w1, "task", "blocked", db_path=TEST_DB)
+        assert False, "quarantined recipient should be blocked"
+    except PermissionError:
+        pass
+    bus.restore_agent(w1, db_path=TEST_DB)
+    assert bus.crew_dm(boss, "Research", "partial title", db_path=TEST_DB)["ok"]
+
+    created = bus.create_agent("Scout", db_path=TEST_DB)
+    assert bus.lookup_agent(created["agent_id"], db_path=TEST_DB)["name"] == "Scout"
+    print("  PASS: directory lookups stay current across bus and raw SQL writes")
+    teardown()
+
+
+# ── Test 18: Deferred read-path accounting ──────────────────────────
+
+def test_reads_defer_audit_and_access_counts():
+    """read_inbox / get_agent_memories never write; the flusher does it in bulk."""
+    agents = setup()
+    boss = agents["boss"]["id"]
+    w0 = agents["worker_0"]["id"]
+    bus.send_message(boss, w0, "task", "hello", db_path=TEST_DB)
+    mem_id = bus.remember(w0, "Prefers morning standups", db_path=TEST_DB)
+    bus.flush_accounting(TEST_DB)
+    bus.flush_telemetry(TEST_DB)
+
+    writes_before = bus.get_writer_stats(TEST_DB)["writes"]
+    with bus._accounting._flush_lock:  # keep the background flusher out of the count
+        for _ in range(20):
+            assert len(bus.read_inbox(w0, db_path=TEST_DB)) == 1
+            assert bus.get_agent_memories(w0, db_path=TEST_DB)[0]["id"] == mem_id
+        assert bus.get_writer_stats(TEST_DB)["writes"] == writes_before
+        stats = bus.get_accounting_stats()
+    assert stats["pending"] >= 21  # 20 audit events + 1 aggregated memory counter
+    assert stats["pending_age_ms"] >= 0
+
+    # Audit readers flush first; counters land in a single flush
+    reads = [e for e in bus.get_audit_trail(agent_id=w0, db_path=TEST_DB)
+             if e["event_type"] == "inbox_read"]
+    assert len(reads) == 20
+    conn = bus.get_conn(TEST_DB)
+    count = conn.execute("SELECT access_count FROM agent_memory WHERE id=?",
+                         (mem_id,)).fetchone()[0]
+    conn.close()
+    assert count == 20
+    assert bus.get_writer_stats(TEST_DB)["writes"] == writes_before + 1
+    assert bus.get_accounting_stats()["last_lag_ms"] >= 0
+    print("  PASS: 40 reads, 0 inline writes, 1 bulk flush")
+    teardown()
+
+
+# ── Test 19: Keyset pagination and projections ──────────────────────
+
+def test_keyset_pagination_and_projection():
+    """Inbox/audit pages walk history by id; header-only reads skip bodies."""
+    agents = setup()
+    boss = agents["boss"]["id"]
+    w0 = agents["worker_0"]["id"]
+    for i in range(25):
+        bus.send_message(boss, w0, "report", f"msg {i}", body="x" * (i + 1),
+                         db_path=TEST_DB)
+
+    # Walk back 10 at a time: newest first, no overlap, nothing missed
+    seen, before = [], None
+    while True:
+        page = bus.read_inbox(w0, limit=10, before_id=before, db_path=TEST_DB)
+        if not page:
+            break
+        seen.extend(m["id"] for m in page)
+        before = page[-1]["id"]
+    assert len(seen) == 25 and seen == sorted(seen, reverse=True)
+
+    # Forward polling returns only newer mail, oldest first
+    newer = bus.read_inbox(w0, after_id=seen[3], db_path=TEST_DB)
+    assert [m["id"] for m in newer] == sorted(seen[:3])
+
+    # Header-only page carries body_length; body fetched on demand
+    headers = bus.read_inbox(w0, limit=1, include_body=False, db_path=TEST_DB)
+    assert "body" not in headers[0] and headers[0]["body_length"] == 25
+    assert bus.get_message_body(headers[0]["id"], to_agent_id=w0,
+                                db_path=TEST_DB) == "x" * 25
+    assert bus.get_message_body(headers[0]["id"], to_agent_id=boss,
+                                db_path=TEST_DB) is None
+
+    # Multi-status filter
+    bus.mark_read(seen[0], db_path=TEST_DB)
+    unread = bus.read_inbox(w0, status_filter=("queued", "delivered"),
+                            db_path=TEST_DB)
+    assert len(unread) == 24 and seen[0] not in [m["id"] for m in unread]
+
+    # Audit trail pages the same way; details projection is optional
+    trail = bus.get_audit_trail(agent_id=w0, limit=5, db_path=TEST_DB)
+    older = bus.get_audit_trail(agent_id=w0, limit=5, before_id=trail[-1]["id"],
+                                db_path=TEST_DB)
+    assert len(trail) == 5 and older and older[0]["id"] < trail[-1]["id"]
+    slim = bus.get_audit_trail(agent_id=w0, limit=5, include_details=False,
+                               db_path=TEST_DB)
+    assert [e["id"] for e in slim] == [e["id"] for e in trail]
+    assert "details" not in slim[0]
+    print("  PASS: 25 messages paged 10 at a time, headers + lazy body")
+    teardown()
+
+
 # ── Runner ───────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
@@ -419,6 +838,15 @@ if __name__ == "__main__":
         ("Large bodies (50 × 10KB)", test_large_message_bodies),
         ("Inbox query (1000 messages)", test_inbox_query_performance),
         ("Private session rapid (100 msgs)", test_private_session_rapid_messages),
+        ("Group commit: 6 writers + 1 failing", test_group_commit_concurrent_writers),
+        ("submit_write futures", test_submit_write_future_lastrowid),
+        ("Durability profile PRAGMAs", test_db_profile_applies_pragmas),
+        ("Buffered telemetry sink", test_telemetry_spans_buffered_and_flushed),
+        ("Telemetry rollup percentiles", test_telemetry_rollup_percentiles),
+        ("Lease claims across workers", test_lease_claims_no_double_processing),
+        ("Agent directory lookups", test_agent_directory_lookups_and_invalidation),
+        ("Deferred read accounting", test_reads_defer_audit_and_access_counts),
+        ("Keyset pagination + projection", test_keyset_pagination_and_projection),
     ]
 
     print("=" * 60)
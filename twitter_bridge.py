@@ -28,6 +28,7 @@ from pathlib import Path
 from typing import Optional
 
 import bus
+import http_pool
 
 # ---------------------------------------------------------------------------
 # Credential helpers
@@ -146,7 +147,7 @@ def _api_request(method: str, url: str, creds: dict,
 
     req = urllib.request.Request(url, data=body, headers=headers, method=method)
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
+        with http_pool.urlopen(req, timeout=30) as resp:
             raw = resp.read().decode("utf-8")
             return json.loads(raw) if raw.strip() else {"ok": True}
     except urllib.error.HTTPError as e:
@@ -460,7 +461,7 @@ def _bearer_get(url: str, db_path: Optional[Path] = None) -> dict:
     headers = {"Authorization": f"Bearer {bearer}", "User-Agent": "CrewBus/1.0"}
     req = urllib.request.Request(url, headers=headers, method="GET")
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
+        with http_pool.urlopen(req, timeout=30) as resp:
             raw = resp.read().decode("utf-8")
             return json.loads(raw) if raw.strip() else {"ok": True}
     except urllib.error.HTTPError as e:
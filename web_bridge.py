@@ -24,6 +24,7 @@ from pathlib import Path
 from typing import Optional
 
 import bus
+import http_pool
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -101,7 +102,7 @@ def search_web(query: str, max_results: int = _DEFAULT_MAX_RESULTS,
             "Accept-Language": "en-US,en;q=0.9",
         })
 
-        with urllib.request.urlopen(req, timeout=_SEARCH_TIMEOUT) as resp:
+        with http_pool.urlopen(req, timeout=_SEARCH_TIMEOUT) as resp:
             raw = resp.read().decode("utf-8", errors="replace")
 
         results = _parse_ddg_results(raw, max_results)
@@ -249,7 +250,7 @@ def read_url(url: str, max_chars: int = _DEFAULT_MAX_CHARS,
             "Accept-Language": "en-US,en;q=0.9",
         })
 
-        with urllib.request.urlopen(req, timeout=_READ_TIMEOUT) as resp:
+        with http_pool.urlopen(req, timeout=_READ_TIMEOUT) as resp:
             # Read up to 1MB to avoid memory issues
             raw_bytes = resp.read(1_000_000)
             content_type = resp.headers.get("Content-Type", "")